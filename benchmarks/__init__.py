@@ -0,0 +1 @@
+"""Offline microbenchmarks (not part of the test suite)."""
@@ -0,0 +1,101 @@
+"""
+Compare per-request overhead of the pure ASGI correlation middleware with the previous BaseHTTPMiddleware.
+Run from project root: PYTHONPATH=src python -m benchmarks.bench_correlation_middleware
+Calls each ASGI app directly (no server, no socket), so the difference is the middleware cost only.
+"""
+
+import asyncio
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from dicom_middleware.correlation import CORRELATION_ID_HEADER, CorrelationIdMiddleware
+from dicom_middleware.observability.logging import correlation_id_ctx
+
+REQUESTS = 5000
+REPEATS = 5
+
+
+class LegacyCorrelationIdMiddleware(BaseHTTPMiddleware):
+    """Previous implementation: BaseHTTPMiddleware, correlation ID only (no request metrics)."""
+
+    async def dispatch(self, request: Request, call_next):
+        correlation_id = request.headers.get(CORRELATION_ID_HEADER) or str(uuid.uuid4())
+        correlation_id_ctx.set(correlation_id)
+        response = await call_next(request)
+        response.headers[CORRELATION_ID_HEADER] = correlation_id
+        return response
+
+
+def make_app(middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/ingestion/jobs/{correlation_id}")
+    async def job(correlation_id: str) -> dict:
+        return {"correlation_id": correlation_id}
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+def _scope() -> dict:
+    path = f"/api/v1/ingestion/jobs/{uuid.uuid4()}"
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+
+async def _receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message: dict) -> None:
+    pass
+
+
+async def measure(app) -> float:
+    """Median microseconds per request over REPEATS runs of REQUESTS sequential requests."""
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await app(_scope(), _receive, _send)
+        runs.append((time.perf_counter() - start) / REQUESTS)
+    return statistics.median(runs) * 1e6
+
+
+async def run() -> None:
+    variants = {
+        "no_middleware": make_app(None),
+        "base_http_middleware": make_app(LegacyCorrelationIdMiddleware),
+        "pure_asgi": make_app(CorrelationIdMiddleware),
+    }
+    results = {name: await measure(app) for name, app in variants.items()}
+    baseline = results["no_middleware"]
+    print(f"{'variant':<22} {'us_per_req':>10} {'overhead_us':>12}")
+    for name, us in results.items():
+        print(f"{name:<22} {us:>10.1f} {us - baseline:>12.1f}")
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
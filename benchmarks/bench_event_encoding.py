@@ -0,0 +1,67 @@
+"""
+Compare the JSON and Avro wire encodings of dicom.metadata.v1 events: message size and encode/decode cost.
+Run from project root: PYTHONPATH=src python -m benchmarks.bench_event_encoding
+Encode is event -> (value, headers) and decode is (value, headers) -> event, as the producer and consumers do them.
+"""
+
+import statistics
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+from uuid import uuid4
+
+from dicom_middleware.config import Settings
+from dicom_middleware.domain.events import DicomMetadataEvent
+from dicom_middleware.infrastructure.event_codec import decode_metadata_event, encode_metadata_event
+
+EVENTS = 2000
+REPEATS = 5
+
+
+def make_events(n: int) -> list[DicomMetadataEvent]:
+    return [
+        DicomMetadataEvent(
+            correlation_id=str(uuid4()),
+            study_instance_uid=f"1.2.826.0.1.3680043.8.498.{i}",
+            patient_id=f"P{i:06d}",
+            modality="CT",
+            study_date="20250101",
+            storage_path=f"gs://dicom-bucket/studies/1.2.826.0.1.3680043.8.498.{i}/",
+            instance_count=i % 500 or None,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+        )
+        for i in range(n)
+    ]
+
+
+def _median_us(fn, items: list) -> float:
+    """Median microseconds per item over REPEATS passes."""
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        runs.append((time.perf_counter() - start) / len(items))
+    return statistics.median(runs) * 1e6
+
+
+def measure(encoding: str, events: list[DicomMetadataEvent]) -> tuple[float, float, float]:
+    """(mean bytes per message, encode us, decode us) for one encoding."""
+    with patch("dicom_middleware.config._settings", Settings(kafka_event_encoding=encoding)):
+        messages = [encode_metadata_event(e) for e in events]
+        encode_us = _median_us(encode_metadata_event, events)
+    decode_us = _median_us(lambda m: decode_metadata_event(*m), messages)
+    return statistics.mean(len(value) for value, _ in messages), encode_us, decode_us
+
+
+def main() -> None:
+    events = make_events(EVENTS)
+    results = {encoding: measure(encoding, events) for encoding in ("json", "avro")}
+    json_bytes = results["json"][0]
+    print(f"{'encoding':<10} {'bytes':>8} {'ratio':>7} {'encode_us':>10} {'decode_us':>10}")
+    for encoding, (size, encode_us, decode_us) in results.items():
+        print(f"{encoding:<10} {size:>8.1f} {size / json_bytes:>7.2f} {encode_us:>10.2f} {decode_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare header-only metadata extraction with the previous full-dataset parse.
+Run from project root: PYTHONPATH=src python -m benchmarks.bench_extract_metadata
+Reports median parse time and peak traced memory (tracemalloc) per DICOM size.
+"""
+
+import io
+import statistics
+import time
+import tracemalloc
+
+from pydicom import dcmread
+
+from benchmarks.synthetic_dicom import make_dicom
+from dicom_middleware.infrastructure.dicom_extract import extract_metadata
+
+SIZES_MB = (1, 16, 64)
+REPEATS = 5
+PREFIX_BYTES = 65536
+
+
+def legacy_extract(dicom_bytes: bytes) -> str:
+    """Previous implementation: full dcmread, pixel data included."""
+    ds = dcmread(io.BytesIO(dicom_bytes), force=True)
+    return str(ds.StudyInstanceUID)
+
+
+def measure(fn, data: bytes) -> tuple[float, int]:
+    times = []
+    peak = 0
+    for _ in range(REPEATS):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(data)
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main() -> None:
+    print(f"{'size':>8} {'variant':<16} {'median_ms':>10} {'peak_kib':>10}")
+    for size_mb in SIZES_MB:
+        data = make_dicom(size_mb * 1024 * 1024)
+        variants = {
+            "full_dcmread": lambda d: legacy_extract(d),
+            "header_only": lambda d: extract_metadata(d),
+            "prefix_64k": lambda d: extract_metadata(d[:PREFIX_BYTES], truncated=True),
+        }
+        for name, fn in variants.items():
+            median_s, peak = measure(fn, data)
+            print(f"{size_mb:>6}MB {name:<16} {median_s * 1000:>10.3f} {peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Offline microbenchmark suite for the ingestion hot paths.
+Run from project root: PYTHONPATH=src python -m benchmarks.suite [--quick] [--only GROUP] [--compare OLD.json]
+Writes one JSON document per run (default benchmarks/results/<commit>.json) so runs can be diffed
+across commits. No Orthanc, database, Kafka or network is needed: I/O boundaries are replaced by
+in-process fakes and storage writes go to a temporary directory.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from unittest.mock import patch
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from benchmarks.synthetic_dicom import MALFORMED_KINDS, TRANSFER_SYNTAXES, malformed, multi_frame, single_frame
+from dicom_middleware.application import orthanc_poller
+from dicom_middleware.config import Settings
+from dicom_middleware.domain.entities import StudyMetadata
+from dicom_middleware.domain.events import DicomMetadataEvent, DLQPayload
+from dicom_middleware.infrastructure.dicom_extract import extract_metadata
+from dicom_middleware.infrastructure.event_codec import decode_metadata_event, encode_metadata_event
+from dicom_middleware.infrastructure.local_storage import LocalStorageBackend
+from dicom_middleware.infrastructure.repository import build_upsert_statement, outbox_row, study_row
+from dicom_middleware.infrastructure.study_cache import StudyCache
+
+GROUPS = ("extract", "serialization", "storage", "upsert", "poller")
+RESULTS_DIR = Path(__file__).parent / "results"
+PREFIX_BYTES = 65536
+
+
+@dataclass
+class Result:
+    group: str
+    name: str
+    params: dict = field(default_factory=dict)
+    repeats: int = 0
+    number: int = 0
+    median_us: float = 0.0
+    min_us: float = 0.0
+    max_us: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.group}/{self.name}"
+
+
+class Runner:
+    """Times callables: each repeat runs `number` calls, `number` is calibrated to about `target_seconds`."""
+
+    def __init__(self, repeats: int, target_seconds: float) -> None:
+        self.repeats = repeats
+        self.target_seconds = target_seconds
+        self.results: list[Result] = []
+        self._loop = asyncio.new_event_loop()
+
+    def close(self) -> None:
+        self._loop.close()
+
+    def bench(self, group: str, name: str, fn, items: int = 1, **params) -> Result:
+        """Time `fn`; with `items` > 1 one call handles that many items and times are reported per item."""
+        fn()  # warm-up and calibration
+        start = time.perf_counter()
+        fn()
+        once = max(time.perf_counter() - start, 1e-7)
+        number = max(1, int(self.target_seconds / once))
+        per_call = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            per_call.append((time.perf_counter() - start) / number / items * 1e6)
+        result = Result(
+            group, name, params, self.repeats, number,
+            round(statistics.median(per_call), 3), round(min(per_call), 3), round(max(per_call), 3),
+        )
+        self.results.append(result)
+        print(f"{result.key:<52} {result.median_us:>12.2f} us  (x{number})")
+        return result
+
+    def bench_async(self, group: str, name: str, coro_fn, items: int = 1, **params) -> Result:
+        """Time an async callable; `items` awaits run back to back per loop entry to amortize its cost."""
+
+        async def run_items() -> None:
+            for _ in range(items):
+                await coro_fn()
+
+        return self.bench(group, name, lambda: self._loop.run_until_complete(run_items()), items=items, **params)
+
+    def run_async(self, coro_fn) -> None:
+        """Await `coro_fn()` once on the runner's loop (untimed)."""
+        self._loop.run_until_complete(coro_fn())
+
+
+def _rejects(data: bytes) -> None:
+    try:
+        extract_metadata(data)
+    except ValueError:
+        return
+    raise AssertionError("malformed sample was accepted")
+
+
+def bench_extract(runner: Runner, quick: bool) -> None:
+    sizes_mb = (16,) if quick else (16, 64)
+    for ts_name, ts in TRANSFER_SYNTAXES.items():
+        data = single_frame(ts)
+        runner.bench("extract", f"single_frame/{ts_name}", lambda d=data: extract_metadata(d), bytes=len(data))
+    for size_mb in sizes_mb:
+        data = multi_frame(size_mb * 1024 * 1024)
+        runner.bench("extract", f"multi_frame_{size_mb}mb/full", lambda d=data: extract_metadata(d), bytes=len(data))
+        prefix = data[:PREFIX_BYTES]
+        runner.bench(
+            "extract",
+            f"multi_frame_{size_mb}mb/prefix_64k",
+            lambda p=prefix: extract_metadata(p, truncated=True),
+            bytes=len(prefix),
+        )
+    for kind in MALFORMED_KINDS:
+        data = malformed(kind)
+        runner.bench("extract", f"malformed/{kind}", lambda d=data: _rejects(d), bytes=len(data))
+
+
+def _event() -> DicomMetadataEvent:
+    return DicomMetadataEvent(
+        correlation_id=str(uuid4()),
+        study_instance_uid="1.2.826.0.1.3680043.8.498.12345678901234567890",
+        patient_id="P001",
+        modality="CT",
+        study_date="20250101",
+        storage_path="gs://dicom-bucket/studies/1.2.826.0.1.3680043.8.498.12345678901234567890.dcm",
+        timestamp=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def bench_serialization(runner: Runner, quick: bool) -> None:
+    event = _event()
+    encoded_event = event.to_json_bytes()
+    dlq = DLQPayload(
+        original_payload={"orthanc_study_id": "6b9e19d9-62094390-5f9ddb01-4a191ae7-9766b715"},
+        error_reason="Metadata parsing failure",
+        correlation_id=event.correlation_id,
+    )
+    encoded_dlq = dlq.to_json_bytes()
+    runner.bench("serialization", "metadata_event/encode", event.to_json_bytes, bytes=len(encoded_event))
+    runner.bench(
+        "serialization", "metadata_event/decode", lambda: DicomMetadataEvent.model_validate_json(encoded_event)
+    )
+    runner.bench("serialization", "metadata_event/outbox_row", lambda: outbox_row("dicom.metadata.v1", event))
+    with patch("dicom_middleware.config._settings", Settings(kafka_event_encoding="avro")):
+        avro_value, avro_headers = encode_metadata_event(event)
+        runner.bench(
+            "serialization", "metadata_event/avro_encode", lambda: encode_metadata_event(event), bytes=len(avro_value)
+        )
+    runner.bench(
+        "serialization", "metadata_event/avro_decode", lambda: decode_metadata_event(avro_value, avro_headers)
+    )
+    runner.bench("serialization", "dlq_payload/encode", dlq.to_json_bytes, bytes=len(encoded_dlq))
+    runner.bench("serialization", "dlq_payload/decode", lambda: DLQPayload.model_validate_json(encoded_dlq))
+
+
+def bench_storage(runner: Runner, quick: bool) -> None:
+    sizes_mb = (1,) if quick else (1, 16)
+    backend = LocalStorageBackend()
+    with tempfile.TemporaryDirectory(prefix="bench-storage-") as tmp:
+        for dedup in (False, True):
+            settings = Settings(storage_path=Path(tmp), storage_dedup_enabled=dedup)
+            with patch("dicom_middleware.config._settings", settings):
+                for size_mb in sizes_mb:
+                    data = b"\0" * (size_mb * 1024 * 1024)
+                    name = f"local_save_{size_mb}mb/{'dedup_unchanged' if dedup else 'overwrite'}"
+                    runner.bench("storage", name, lambda d=data: backend.save("1.2.3", d), bytes=len(data))
+
+
+def bench_upsert(runner: Runner, quick: bool) -> None:
+    dialect = postgresql.dialect()
+    for n in (1, 100) if quick else (1, 100, 1000):
+        metadata = [
+            StudyMetadata(study_instance_uid=f"1.2.3.{i}", patient_id="P", modality="CT", study_date="20250101")
+            for i in range(n)
+        ]
+        rows = [study_row(uuid4(), m) for m in metadata]
+        runner.bench("upsert", f"build/{n}_rows", lambda r=rows: build_upsert_statement(r), rows=n)
+        runner.bench(
+            "upsert",
+            f"build_and_compile/{n}_rows",
+            lambda r=rows: build_upsert_statement(r).compile(dialect=dialect),
+            rows=n,
+        )
+
+
+# Round trips the poller fakes simulate, so the cache's savings show up: a REST call to an Orthanc on
+# the same network and an indexed single-row Postgres query.
+_ORTHANC_LATENCY_S = 0.002
+_DB_LATENCY_S = 0.0005
+
+
+@dataclass
+class _IOCalls:
+    orthanc: int = 0
+    db: int = 0
+
+
+class _FakeOrthanc:
+    def __init__(self, changes_page: dict, calls: _IOCalls) -> None:
+        self._changes_page = changes_page
+        self._calls = calls
+
+    async def get_changes(self, since: int, limit: int) -> dict:
+        self._calls.orthanc += 1
+        await asyncio.sleep(_ORTHANC_LATENCY_S)
+        return self._changes_page
+
+    async def get_study_instance_uid(self, orthanc_study_id: str) -> str:
+        self._calls.orthanc += 1
+        await asyncio.sleep(_ORTHANC_LATENCY_S)
+        return f"1.2.3.{orthanc_study_id}"
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+def _fake_session_factory():
+    return _FakeSession
+
+
+def bench_poller(runner: Runner, quick: bool) -> None:
+    """
+    _process_study_if_new for each outcome, and one /changes page of known studies (cache hits are
+    confirmed with one batched query, stubbed here like the per-study exists-check). The Orthanc and
+    DB fakes sleep for a typical round trip, and each case reports the I/O calls one decision makes.
+    """
+    cache = StudyCache(max_entries=10000, ttl_seconds=3600, bloom_capacity=100000, bloom_error_rate=0.001)
+    page_size = 1000
+    for i in range(page_size):
+        cache.record(f"s{i}", f"1.2.3.s{i}")
+    calls = _IOCalls()
+
+    async def exists(_session, _uid) -> bool:
+        calls.db += 1
+        await asyncio.sleep(_DB_LATENCY_S)
+        return True
+
+    async def not_exists(_session, _uid) -> bool:
+        calls.db += 1
+        await asyncio.sleep(_DB_LATENCY_S)
+        return False
+
+    async def all_exist(_session, uids) -> set[str]:
+        calls.db += 1
+        await asyncio.sleep(_DB_LATENCY_S)
+        return set(uids)
+
+    async def ingest(_orthanc_study_id) -> None:
+        return None
+
+    async def no_store(_seq) -> None:
+        return None
+
+    def io_per_call(coro_fn) -> dict[str, int]:
+        calls.orthanc = calls.db = 0
+        runner.run_async(coro_fn)
+        return {"orthanc_calls": calls.orthanc, "db_calls": calls.db}
+
+    page = {
+        "Changes": [
+            {"ChangeType": "StableStudy", "ResourceType": "Study", "ID": f"s{i}", "Seq": i} for i in range(page_size)
+        ],
+        "Done": True,
+        "Last": page_size,
+    }
+    client = _FakeOrthanc(page, calls)
+
+    def decide():
+        return orthanc_poller._process_study_if_new(client, "s1")
+
+    def decide_cached_uid():
+        return orthanc_poller._process_study_if_new(client, "s1", cache.get_uid("s1"))
+
+    def changes_page():
+        return orthanc_poller._poll_changes(client, 0, page_size)
+
+    module = "dicom_middleware.application.orthanc_poller"
+    with (
+        patch(f"{module}.get_session_factory", _fake_session_factory),
+        patch(f"{module}._ingest_study", ingest),
+        patch(f"{module}._store_cursor", no_store),
+    ):
+        with (
+            patch(f"{module}.get_study_cache", lambda: cache),
+            patch(f"{module}.exists_by_study_instance_uid", exists),
+            patch(f"{module}.existing_study_instance_uids", all_exist),
+        ):
+            runner.bench_async(
+                "poller", "decision/cached_uid_known", decide_cached_uid, items=10, **io_per_call(decide_cached_uid)
+            )
+            runner.bench_async(
+                "poller", f"changes_page/{page_size}_known", changes_page, studies=page_size, **io_per_call(changes_page)
+            )
+        with patch(f"{module}.get_study_cache", lambda: None):
+            with patch(f"{module}.exists_by_study_instance_uid", exists):
+                runner.bench_async("poller", "decision/no_cache_known", decide, items=10, **io_per_call(decide))
+            with patch(f"{module}.exists_by_study_instance_uid", not_exists):
+                runner.bench_async("poller", "decision/no_cache_new", decide, items=10, **io_per_call(decide))
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "serialization": bench_serialization,
+    "storage": bench_storage,
+    "upsert": bench_upsert,
+    "poller": bench_poller,
+}
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _environment(quick: bool) -> dict:
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "quick": quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "packages": {name: version(name) for name in ("pydicom", "pydantic", "SQLAlchemy")},
+    }
+
+
+def compare(old_path: Path, results: list[Result]) -> None:
+    """Print the median change per case against an earlier results file."""
+    old = {f"{r['group']}/{r['name']}": r["median_us"] for r in json.loads(old_path.read_text())["results"]}
+    print(f"\n{'case':<52} {'old_us':>12} {'new_us':>12} {'change':>8}")
+    for r in results:
+        if r.key in old and old[r.key]:
+            change = (r.median_us / old[r.key] - 1) * 100
+            print(f"{r.key:<52} {old[r.key]:>12.2f} {r.median_us:>12.2f} {change:>+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the offline microbenchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="Fewer repeats and smaller inputs")
+    parser.add_argument("--only", action="append", choices=GROUPS, help="Run only this group (repeatable)")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare medians with")
+    args = parser.parse_args()
+
+    runner = Runner(repeats=3 if args.quick else 7, target_seconds=0.02 if args.quick else 0.1)
+    try:
+        for group in args.only or GROUPS:
+            BENCHMARKS[group](runner, args.quick)
+    finally:
+        runner.close()
+
+    environment = _environment(args.quick)
+    output = args.output or RESULTS_DIR / f"{environment['commit'] or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"environment": environment, "results": [asdict(r) for r in runner.results]}, indent=2) + "\n"
+    )
+    print(f"\nwrote {len(runner.results)} results to {output}")
+    if args.compare:
+        compare(args.compare, runner.results)
+
+
+if __name__ == "__main__":
+    main()
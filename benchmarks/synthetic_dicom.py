@@ -0,0 +1,133 @@
+"""
+Synthetic DICOM files for benchmarks and load tests: single-frame, large multi-frame and malformed.
+Write a sample set to disk: PYTHONPATH=src python -m benchmarks.synthetic_dicom --out /tmp/dicom
+Everything is generated in memory with pydicom; no real patient data and no network access.
+"""
+
+import argparse
+import io
+import zlib
+from pathlib import Path
+
+from pydicom import Dataset, dcmread
+from pydicom.dataset import FileMetaDataset
+from pydicom.encaps import encapsulate
+from pydicom.uid import (
+    UID,
+    DeflatedExplicitVRLittleEndian,
+    ExplicitVRBigEndian,
+    ExplicitVRLittleEndian,
+    ImplicitVRLittleEndian,
+    JPEGBaseline8Bit,
+)
+
+CT_IMAGE_STORAGE = "1.2.840.10008.5.1.4.1.1.2"
+
+# Short names used in benchmark case names and on the command line.
+TRANSFER_SYNTAXES: dict[str, UID] = {
+    "explicit_le": ExplicitVRLittleEndian,
+    "implicit_le": ImplicitVRLittleEndian,
+    "explicit_be": ExplicitVRBigEndian,
+    "deflated": DeflatedExplicitVRLittleEndian,
+    "jpeg_baseline": JPEGBaseline8Bit,
+}
+
+MALFORMED_KINDS = ("not_dicom", "truncated_header", "missing_study_uid", "empty")
+
+_ROWS = _COLUMNS = 512
+_FRAME_BYTES = _ROWS * _COLUMNS * 2
+
+
+def make_dicom(
+    pixel_bytes: int,
+    transfer_syntax: UID = ExplicitVRLittleEndian,
+    study_instance_uid: str = "1.2.3",
+    sop_instance_uid: str = "1.2.3.4.5.6",
+    patient_id: str = "P001",
+    modality: str = "CT",
+) -> bytes:
+    """
+    One CT instance with about `pixel_bytes` of pixel data split into 512x512x16-bit frames.
+    Compressed syntaxes get encapsulated dummy fragments of the same total size (not decodable).
+    """
+    frames = max(1, pixel_bytes // _FRAME_BYTES)
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = transfer_syntax
+    ds.file_meta.MediaStorageSOPClassUID = CT_IMAGE_STORAGE
+    ds.file_meta.MediaStorageSOPInstanceUID = sop_instance_uid
+    ds.SOPClassUID = CT_IMAGE_STORAGE
+    ds.SOPInstanceUID = sop_instance_uid
+    ds.StudyInstanceUID = study_instance_uid
+    ds.SeriesInstanceUID = f"{study_instance_uid}.1"
+    ds.PatientID = patient_id
+    ds.Modality = modality
+    ds.StudyDate = "20250101"
+    ds.Rows = _ROWS
+    ds.Columns = _COLUMNS
+    ds.BitsAllocated = 16
+    ds.BitsStored = 16
+    ds.HighBit = 15
+    ds.PixelRepresentation = 0
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.NumberOfFrames = frames
+    if transfer_syntax.is_compressed and transfer_syntax != DeflatedExplicitVRLittleEndian:
+        fragment = b"\xff\xd8" + b"\0" * max(0, pixel_bytes // frames - 4) + b"\xff\xd9"
+        ds.PixelData = encapsulate([fragment] * frames)
+    else:
+        ds.PixelData = b"\0" * pixel_bytes
+    buf = io.BytesIO()
+    ds.save_as(buf, enforce_file_format=True)
+    return buf.getvalue()
+
+
+def single_frame(transfer_syntax: UID = ExplicitVRLittleEndian, **tags: str) -> bytes:
+    """One 512x512 16-bit frame (~512 KiB), the typical CT slice."""
+    return make_dicom(_FRAME_BYTES, transfer_syntax, **tags)
+
+
+def multi_frame(size_bytes: int, transfer_syntax: UID = ExplicitVRLittleEndian, **tags: str) -> bytes:
+    """Enhanced-style multi-frame instance of about `size_bytes` (e.g. 64 MiB for a large CT series)."""
+    return make_dicom(size_bytes, transfer_syntax, **tags)
+
+
+def malformed(kind: str) -> bytes:
+    """
+    Bytes that extract_metadata must reject with ValueError:
+    not_dicom (random-looking bytes), truncated_header (a valid file cut inside the header),
+    missing_study_uid (valid file without Study Instance UID), empty (zero bytes).
+    """
+    if kind == "not_dicom":
+        return zlib.compress(b"not a dicom file" * 4096)
+    if kind == "truncated_header":
+        # Cut inside the Study Instance UID element header (tag and VR of explicit VR little endian).
+        data = single_frame()
+        return data[: data.index(b"\x20\x00\x0d\x00UI") + 5]
+    if kind == "missing_study_uid":
+        ds = dcmread(io.BytesIO(single_frame()))
+        del ds.StudyInstanceUID
+        out = io.BytesIO()
+        ds.save_as(out, enforce_file_format=True)
+        return out.getvalue()
+    if kind == "empty":
+        return b""
+    raise ValueError(f"Unknown malformed kind {kind!r}; expected one of {MALFORMED_KINDS}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic DICOM files for benchmarks and load tests.")
+    parser.add_argument("--out", type=Path, required=True, help="Output directory")
+    parser.add_argument("--multi-frame-mb", type=int, default=64, help="Size of the multi-frame sample")
+    args = parser.parse_args()
+    args.out.mkdir(parents=True, exist_ok=True)
+    for name, ts in TRANSFER_SYNTAXES.items():
+        (args.out / f"single_frame_{name}.dcm").write_bytes(single_frame(ts))
+    (args.out / f"multi_frame_{args.multi_frame_mb}mb.dcm").write_bytes(multi_frame(args.multi_frame_mb * 1024 * 1024))
+    for kind in MALFORMED_KINDS:
+        (args.out / f"malformed_{kind}.dcm").write_bytes(malformed(kind))
+    print(f"wrote {len(TRANSFER_SYNTAXES) + 1 + len(MALFORMED_KINDS)} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
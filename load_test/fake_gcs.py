@@ -0,0 +1,158 @@
+"""
+Fake Google Cloud Storage JSON API for the offline load harness.
+
+The google-cloud-storage client talks to it when STORAGE_EMULATOR_HOST is set. It supports what
+GCSStorageBackend uses: object metadata reads (dedup), multipart uploads (upload_from_string) and
+resumable uploads (blob.open("wb")). Only object sizes and checksums are kept, never the bytes.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import unquote
+from uuid import uuid4
+
+import google_crc32c
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from load_test.profiles import FaultProfile
+
+_CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+@dataclass
+class _Object:
+    size: int
+    md5: str
+    crc32c: str
+    content_type: str | None
+    metadata: dict | None
+    generation: int
+
+
+class _Upload:
+    """An open resumable upload session; checksums are updated chunk by chunk."""
+
+    def __init__(self, bucket: str, resource: dict) -> None:
+        self.bucket = bucket
+        self.resource = resource
+        self.received = 0
+        self.md5 = hashlib.md5()
+        self.crc32c = google_crc32c.Checksum()
+
+    def write(self, data: bytes) -> None:
+        self.received += len(data)
+        self.md5.update(data)
+        self.crc32c.update(data)
+
+
+def _b64(digest: bytes) -> str:
+    return base64.b64encode(digest).decode("ascii")
+
+
+def create_fake_gcs(profile: FaultProfile, seed: int = 0) -> Starlette:
+    rng = random.Random(seed)
+    objects: dict[tuple[str, str], _Object] = {}
+    uploads: dict[str, _Upload] = {}
+    generations = iter(range(1, 1 << 62))
+
+    async def faults() -> Response | None:
+        await asyncio.sleep(profile.gcs_latency.sample(rng))
+        if profile.gcs_error_rate and rng.random() < profile.gcs_error_rate:
+            return JSONResponse({"error": {"code": 503, "message": "injected fault"}}, status_code=503)
+        return None
+
+    def resource(bucket: str, name: str) -> dict:
+        obj = objects[(bucket, name)]
+        return {
+            "kind": "storage#object",
+            "id": f"{bucket}/{name}/{obj.generation}",
+            "bucket": bucket,
+            "name": name,
+            "generation": str(obj.generation),
+            "size": str(obj.size),
+            "md5Hash": obj.md5,
+            "crc32c": obj.crc32c,
+            "contentType": obj.content_type,
+            "metadata": obj.metadata,
+        }
+
+    def store(bucket: str, meta: dict, size: int, md5: bytes, crc32c: bytes) -> dict:
+        name = meta["name"]
+        objects[(bucket, name)] = _Object(
+            size, _b64(md5), _b64(crc32c), meta.get("contentType"), meta.get("metadata"), next(generations)
+        )
+        return resource(bucket, name)
+
+    async def get_object(request: Request) -> Response:
+        bucket, name = request.path_params["bucket"], unquote(request.path_params["name"])
+        fault = await faults()
+        if fault is not None:
+            return fault
+        if (bucket, name) not in objects:
+            return JSONResponse({"error": {"code": 404, "message": "No such object"}}, status_code=404)
+        return JSONResponse(resource(bucket, name))
+
+    async def start_upload(request: Request) -> Response:
+        bucket = request.path_params["bucket"]
+        fault = await faults()
+        if fault is not None:
+            return fault
+        upload_type = request.query_params.get("uploadType")
+        if upload_type == "multipart":
+            body = await request.body()
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode() + body
+            )
+            meta_part, data_part = message.get_payload()
+            meta = json.loads(meta_part.get_payload(decode=True))
+            data = data_part.get_payload(decode=True)
+            meta.setdefault("name", request.query_params.get("name"))
+            crc = google_crc32c.Checksum(data)
+            return JSONResponse(store(bucket, meta, len(data), hashlib.md5(data).digest(), crc.digest()))
+        if upload_type == "resumable":
+            meta = json.loads(await request.body() or b"{}")
+            meta.setdefault("name", request.query_params.get("name"))
+            upload_id = uuid4().hex
+            uploads[upload_id] = _Upload(bucket, meta)
+            location = f"{request.base_url}upload/storage/v1/b/{bucket}/o?uploadType=resumable&upload_id={upload_id}"
+            return Response(status_code=200, headers={"Location": location})
+        return PlainTextResponse(f"unsupported uploadType {upload_type!r}", status_code=400)
+
+    async def continue_upload(request: Request) -> Response:
+        upload = uploads.get(request.query_params.get("upload_id", ""))
+        if upload is None:
+            return PlainTextResponse("unknown upload session", status_code=404)
+        fault = await faults()
+        if fault is not None:
+            return fault
+        data = await request.body()
+        match = _CONTENT_RANGE.fullmatch(request.headers.get("content-range", ""))
+        if match is None:
+            return PlainTextResponse("missing Content-Range", status_code=400)
+        upload.write(data)
+        total = match.group(3)
+        if total == "*" or upload.received < int(total):
+            headers = {"Range": f"bytes=0-{upload.received - 1}"} if upload.received else {}
+            return Response(status_code=308, headers=headers)
+        del uploads[request.query_params["upload_id"]]
+        return JSONResponse(
+            store(upload.bucket, upload.resource, upload.received, upload.md5.digest(), upload.crc32c.digest())
+        )
+
+    return Starlette(
+        routes=[
+            Route("/storage/v1/b/{bucket}/o/{name:path}", get_object),
+            Route("/upload/storage/v1/b/{bucket}/o", start_upload, methods=["POST"]),
+            Route("/upload/storage/v1/b/{bucket}/o", continue_upload, methods=["PUT"]),
+        ]
+    )
@@ -0,0 +1,171 @@
+"""
+Fake Orthanc REST API serving generated studies, for the offline load harness.
+
+Study i (0-based) has Orthanc ID `study-000042`, one series and `instances_per_study` instances of
+synthetic DICOM (benchmarks/synthetic_dicom.py), with Study Instance UID `<UID_ROOT>.42`. Only the
+endpoints the middleware calls are implemented. Latency and 503s follow the run's fault profile.
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from benchmarks.synthetic_dicom import make_dicom
+from load_test.profiles import FaultProfile
+
+UID_ROOT = "1.2.826.0.1.3680043.10.543"
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+@dataclass(frozen=True)
+class StudySet:
+    studies: int
+    instances_per_study: int = 1
+    instance_bytes: int = 64 * 1024
+
+    def study_id(self, index: int) -> str:
+        return f"study-{index:06d}"
+
+    def study_ids(self) -> list[str]:
+        return [self.study_id(i) for i in range(self.studies)]
+
+    def index(self, resource_id: str) -> int | None:
+        """Study index of a study, series or instance ID, or None if it is not one of ours."""
+        try:
+            index = int(resource_id.split("-")[1])
+        except (IndexError, ValueError):
+            return None
+        return index if 0 <= index < self.studies else None
+
+    def study_uid(self, index: int) -> str:
+        return f"{UID_ROOT}.{index}"
+
+    def instance_ids(self, index: int) -> list[str]:
+        return [f"instance-{index:06d}-{j:04d}" for j in range(self.instances_per_study)]
+
+    def sop_uid(self, instance_id: str) -> str:
+        _, index, number = instance_id.split("-")
+        return f"{self.study_uid(int(index))}.1.{int(number) + 1}"
+
+
+def create_fake_orthanc(study_set: StudySet, profile: FaultProfile, seed: int = 0) -> Starlette:
+    rng = random.Random(seed)
+
+    @lru_cache(maxsize=1024)
+    def instance_file(instance_id: str) -> bytes:
+        index = study_set.index(instance_id)
+        return make_dicom(
+            study_set.instance_bytes,
+            study_instance_uid=study_set.study_uid(index),
+            sop_instance_uid=study_set.sop_uid(instance_id),
+            patient_id=f"P{index:06d}",
+        )
+
+    async def faults() -> Response | None:
+        await asyncio.sleep(profile.orthanc_latency.sample(rng))
+        if profile.orthanc_error_rate and rng.random() < profile.orthanc_error_rate:
+            return PlainTextResponse("injected fault", status_code=503)
+        return None
+
+    def not_found() -> Response:
+        return PlainTextResponse("Unknown resource", status_code=404)
+
+    def instance_json(instance_id: str) -> dict:
+        return {
+            "ID": instance_id,
+            "Type": "Instance",
+            "MainDicomTags": {"SOPInstanceUID": study_set.sop_uid(instance_id)},
+        }
+
+    async def list_studies(request: Request) -> Response:
+        return await faults() or JSONResponse(study_set.study_ids())
+
+    async def get_study(request: Request) -> Response:
+        index = study_set.index(request.path_params["id"])
+        if index is None:
+            return not_found()
+        return await faults() or JSONResponse(
+            {
+                "ID": study_set.study_id(index),
+                "Type": "Study",
+                "MainDicomTags": {"StudyInstanceUID": study_set.study_uid(index)},
+                "Series": [f"series-{index:06d}"],
+            }
+        )
+
+    async def get_series(request: Request) -> Response:
+        index = study_set.index(request.path_params["id"])
+        if index is None:
+            return not_found()
+        return await faults() or JSONResponse(
+            {"ID": request.path_params["id"], "Type": "Series", "Instances": study_set.instance_ids(index)}
+        )
+
+    async def get_study_instances(request: Request) -> Response:
+        index = study_set.index(request.path_params["id"])
+        if index is None:
+            return not_found()
+        return await faults() or JSONResponse([instance_json(i) for i in study_set.instance_ids(index)])
+
+    async def get_instance_file(request: Request) -> Response:
+        instance_id = request.path_params["id"]
+        if study_set.index(instance_id) is None:
+            return not_found()
+        fault = await faults()
+        if fault is not None:
+            return fault
+        data = instance_file(instance_id)
+        match = _RANGE.fullmatch(request.headers.get("range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else len(data) - 1, len(data) - 1)
+            return Response(
+                data[start : end + 1],
+                status_code=206,
+                media_type="application/dicom",
+                headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"},
+            )
+        return Response(data, media_type="application/dicom")
+
+    async def get_instance_md5(request: Request) -> Response:
+        instance_id = request.path_params["id"]
+        if study_set.index(instance_id) is None:
+            return not_found()
+        return await faults() or PlainTextResponse(hashlib.md5(instance_file(instance_id)).hexdigest())
+
+    async def find(request: Request) -> Response:
+        body = await request.json()
+        since, limit = int(body.get("Since", 0)), int(body.get("Limit", 100))
+        page = range(since, min(since + limit, study_set.studies))
+        return await faults() or JSONResponse(
+            [
+                {"ID": study_set.study_id(i), "MainDicomTags": {"StudyInstanceUID": study_set.study_uid(i)}}
+                for i in page
+            ]
+        )
+
+    async def changes(request: Request) -> Response:
+        # The harness drives the ingestion API; the poller sees an empty change log.
+        since = int(request.query_params.get("since", 0))
+        return JSONResponse({"Changes": [], "Done": True, "Last": since})
+
+    return Starlette(
+        routes=[
+            Route("/studies", list_studies),
+            Route("/studies/{id}", get_study),
+            Route("/studies/{id}/instances", get_study_instances),
+            Route("/series/{id}", get_series),
+            Route("/instances/{id}/file", get_instance_file),
+            Route("/instances/{id}/attachments/dicom/md5", get_instance_md5),
+            Route("/tools/find", find, methods=["POST"]),
+            Route("/changes", changes),
+        ]
+    )
@@ -0,0 +1,44 @@
+"""
+In-memory stand-in for AIOKafkaProducer, for the offline load harness.
+
+It implements the producer methods the middleware calls (start, stop, send, send_and_wait). Messages
+are counted per topic and dropped. Ack latency and broker outages follow the run's fault profile.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter
+
+from aiokafka.errors import KafkaConnectionError
+
+from load_test.profiles import FaultProfile
+
+
+class InMemoryKafkaSink:
+    def __init__(self, profile: FaultProfile, seed: int = 0) -> None:
+        self._profile = profile
+        self._rng = random.Random(seed)
+        self._started_at = time.monotonic()
+        self.delivered: Counter[str] = Counter()
+        self.failed: Counter[str] = Counter()
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def send(self, topic: str, value: bytes, key: bytes | None = None, headers=None) -> asyncio.Future:
+        """Enqueue like AIOKafkaProducer.send: returns a future that resolves once the "broker" acks."""
+        return asyncio.ensure_future(self._deliver(topic))
+
+    async def send_and_wait(self, topic: str, value: bytes, key: bytes | None = None, headers=None) -> None:
+        await self._deliver(topic)
+
+    async def _deliver(self, topic: str) -> None:
+        await asyncio.sleep(self._profile.kafka_latency.sample(self._rng))
+        if not self._profile.kafka_available(time.monotonic() - self._started_at):
+            self.failed[topic] += 1
+            raise KafkaConnectionError("injected fault: broker unavailable")
+        self.delivered[topic] += 1
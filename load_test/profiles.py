@@ -0,0 +1,70 @@
+"""Fault-injection profiles for the offline load harness (latency and errors of each stand-in)."""
+
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Latency:
+    """`base_ms` plus uniform jitter; with `tail_probability` a response takes `tail_ms` instead."""
+
+    base_ms: float = 0.0
+    jitter_ms: float = 0.0
+    tail_probability: float = 0.0
+    tail_ms: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """One delay in seconds."""
+        if self.tail_probability and rng.random() < self.tail_probability:
+            return self.tail_ms / 1000
+        return (self.base_ms + rng.random() * self.jitter_ms) / 1000
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """
+    Behaviour of the stand-ins for one run. Error rates are the fraction of requests answered with
+    503 (Orthanc, GCS). Kafka flaps: for `kafka_down_seconds` at the start of every
+    `kafka_flap_period_seconds`, every send fails as if the broker were unreachable.
+    """
+
+    name: str
+    description: str
+    orthanc_latency: Latency = field(default_factory=lambda: Latency(base_ms=2, jitter_ms=2))
+    orthanc_error_rate: float = 0.0
+    gcs_latency: Latency = field(default_factory=lambda: Latency(base_ms=5, jitter_ms=5))
+    gcs_error_rate: float = 0.0
+    kafka_latency: Latency = field(default_factory=lambda: Latency(base_ms=2, jitter_ms=3))
+    kafka_down_seconds: float = 0.0
+    kafka_flap_period_seconds: float = 0.0
+
+    def kafka_available(self, elapsed_seconds: float) -> bool:
+        if not self.kafka_flap_period_seconds:
+            return True
+        return elapsed_seconds % self.kafka_flap_period_seconds >= self.kafka_down_seconds
+
+
+PROFILES: dict[str, FaultProfile] = {
+    p.name: p
+    for p in (
+        FaultProfile("baseline", "Fast, healthy dependencies: measures our own overhead."),
+        FaultProfile(
+            "slow-orthanc",
+            "Orthanc answers in 50-80 ms and 2% of responses take 2 s.",
+            orthanc_latency=Latency(base_ms=50, jitter_ms=30, tail_probability=0.02, tail_ms=2000),
+        ),
+        FaultProfile("flaky-orthanc", "5% of Orthanc responses are 503.", orthanc_error_rate=0.05),
+        FaultProfile(
+            "slow-gcs",
+            "GCS uploads take 100-200 ms and 1% of them take 3 s.",
+            gcs_latency=Latency(base_ms=100, jitter_ms=100, tail_probability=0.01, tail_ms=3000),
+        ),
+        FaultProfile("flaky-gcs", "2% of GCS requests are 503.", gcs_error_rate=0.02),
+        FaultProfile(
+            "flapping-kafka",
+            "Kafka is unreachable for 2 s out of every 10 s.",
+            kafka_down_seconds=2,
+            kafka_flap_period_seconds=10,
+        ),
+    )
+}
@@ -1,13 +1,14 @@
 """OpenAPI tags, descriptions, shared response schemas, and metadata."""
 
-from typing import Literal
+from datetime import datetime
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
 OPENAPI_TAGS = [
     {
         "name": "Health",
-        "description": "**Liveness** (`/health`) indicates the process is running. **Readiness** (`/ready`) indicates the service is ready to accept traffic (currently always 200; DB/Kafka checks can be added later). Both return `{\"status\": \"ok\"}`.",
+        "description": "**Liveness** (`/health`) indicates the process is running. **Readiness** (`/ready`) indicates the service is ready to accept traffic and reports each dependency's circuit breaker; it stays 200 with `status: degraded` while a breaker is open. `/health` returns `{\"status\": \"ok\"}`.",
     },
     {
         "name": "Metrics",
@@ -15,7 +16,11 @@ OPENAPI_TAGS = [
     },
     {
         "name": "Ingestion",
-        "description": "Receive Orthanc study notifications via `POST /api/v1/ingestion/studies`. Triggers the full pipeline: fetch DICOM from Orthanc, extract metadata, upsert to DB, save raw DICOM (local or GCS), publish to Kafka. Request body includes Orthanc study `ID` and optional `Path`. Response includes `correlation_id` for tracing.",
+        "description": "Receive Orthanc study notifications via `POST /api/v1/ingestion/studies`. Triggers the full pipeline: fetch DICOM from Orthanc, extract metadata, upsert to DB, save raw DICOM (local or GCS), publish to Kafka. Request body includes Orthanc study `ID` and optional `Path`. Response includes `correlation_id` for tracing. With `INGESTION_MODE=async` the study is queued, the endpoint returns 202, and progress is available at `GET /api/v1/ingestion/jobs/{correlation_id}`.",
+    },
+    {
+        "name": "Admin",
+        "description": "Operational endpoints under `/api/v1/admin`, only mounted when `ADMIN_API_ENABLED=true` (no built-in auth). `POST /api/v1/admin/dlq/replay` starts a background replay of `dicom.metadata.dlq`; `GET` on the same path reports its progress.",
     },
 ]
 
@@ -26,6 +31,29 @@ class HealthResponse(BaseModel):
     status: Literal["ok"] = Field(description="Always 'ok' when the probe succeeds.")
 
 
+class ReadinessResponse(BaseModel):
+    """Readiness payload with the circuit breaker state of each dependency."""
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "status": "degraded",
+                "circuit_breakers": {
+                    "orthanc": "open",
+                    "postgres": "closed",
+                    "storage": "closed",
+                    "kafka": "half_open",
+                },
+            },
+        }
+    )
+
+    status: Literal["ok", "degraded"] = Field(description="'degraded' while any circuit breaker is open.")
+    circuit_breakers: dict[str, Literal["closed", "open", "half_open"]] = Field(
+        description="Breaker state per dependency (orthanc, postgres, storage, kafka)."
+    )
+
+
 class IngestionSuccessResponse(BaseModel):
     """Study accepted for processing."""
 
@@ -39,6 +67,60 @@ class IngestionSuccessResponse(BaseModel):
     correlation_id: str = Field(description="Request correlation ID for tracing.")
 
 
+class IngestionJobStatusResponse(BaseModel):
+    """Status of a queued ingestion job (async mode)."""
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "correlation_id": "a1b2c3d4-e5f6-7890-abcd-ef1234567890",
+                "orthanc_study_id": "abc-123-orthanc-id",
+                "status": "succeeded",
+                "error": None,
+                "created_at": "2025-02-19T12:00:00+00:00",
+                "updated_at": "2025-02-19T12:00:02+00:00",
+            },
+        }
+    )
+
+    correlation_id: str = Field(description="Correlation ID returned when the job was accepted.")
+    orthanc_study_id: str = Field(description="Orthanc study ID being ingested.")
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] = Field(
+        description="Current job state ('cancelled': dropped or interrupted at shutdown)."
+    )
+    error: str | None = Field(default=None, description="Failure detail when status is 'failed' or 'cancelled'.")
+    created_at: str = Field(description="ISO 8601 time the job was enqueued.")
+    updated_at: str = Field(description="ISO 8601 time of the last status change.")
+
+
+class DlqReplayRequest(BaseModel):
+    """Which dead-lettered studies to replay, and how fast."""
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {"reasons": ["Storage write failure"], "since": "2025-02-19T10:00:00Z", "rate_per_second": 20},
+        }
+    )
+
+    reasons: list[str] = Field(default_factory=list, description="Only replay these error_reason values (all if empty).")
+    since: datetime | None = Field(default=None, description="Only messages dead-lettered at or after this time.")
+    until: datetime | None = Field(default=None, description="Stop at messages dead-lettered at or after this time (default: now).")
+    concurrency: int | None = Field(default=None, ge=1, le=256, description="Pipelines in flight (default: DLQ_REPLAY_CONCURRENCY).")
+    rate_per_second: float | None = Field(default=None, gt=0, le=10000, description="Pipelines started per second (default: DLQ_REPLAY_RATE_PER_SECOND).")
+    max_messages: int | None = Field(default=None, ge=1, description="Stop after scanning this many DLQ messages.")
+
+
+class DlqReplayStatusResponse(BaseModel):
+    """State of the most recent DLQ replay in this process."""
+
+    running: bool = Field(description="True while a replay is in progress.")
+    report: dict[str, Any] | None = Field(
+        default=None,
+        description="scanned, matched, replayed, failed, checkpoints, elapsed_seconds, throughput_per_second, started_at, finished_at.",
+    )
+    error: str | None = Field(default=None, description="Why the last replay stopped early, if it did.")
+
+
 def custom_openapi_schema(app):
     """Add tags, servers, and ensure consistent API docs."""
     if app.openapi_schema:
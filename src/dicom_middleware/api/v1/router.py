@@ -2,7 +2,10 @@
 
 from fastapi import APIRouter
 
-from dicom_middleware.api.v1.routes import ingestion
+from dicom_middleware.api.v1.routes import admin, ingestion
+from dicom_middleware.config import get_settings
 
 api_router = APIRouter()
 api_router.include_router(ingestion.router, prefix="/ingestion", tags=["Ingestion"])
+if get_settings().admin_api_enabled:
+    api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
@@ -0,0 +1,94 @@
+"""Admin API - operational actions (DLQ replay). Mounted only when ADMIN_API_ENABLED=true."""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+
+from dicom_middleware.api.errors import ErrorResponse
+from dicom_middleware.api.openapi import DlqReplayRequest, DlqReplayStatusResponse
+from dicom_middleware.application.dlq_replay import DlqReplayer, ReplayFilter, replay_dlq
+from dicom_middleware.observability.logging import get_logger
+
+_log = get_logger(__name__)
+
+router = APIRouter()
+
+# One replay per process; its live replayer exposes progress while it runs.
+_replay_task: asyncio.Task | None = None
+_replayer: DlqReplayer | None = None
+_replay_error: str | None = None
+
+
+def _set_replayer(replayer: DlqReplayer) -> None:
+    global _replayer
+    _replayer = replayer
+
+
+async def _run_replay(body: DlqReplayRequest) -> None:
+    global _replay_error
+    try:
+        await replay_dlq(
+            ReplayFilter(reasons=frozenset(body.reasons), since=body.since, until=body.until),
+            concurrency=body.concurrency,
+            rate=body.rate_per_second,
+            max_messages=body.max_messages,
+            on_start=_set_replayer,
+        )
+    except Exception as e:
+        _replay_error = str(e)
+        _log.exception("dlq_replay_aborted", error=str(e))
+
+
+def _status() -> DlqReplayStatusResponse:
+    running = _replay_task is not None and not _replay_task.done()
+    return DlqReplayStatusResponse(
+        running=running,
+        report=_replayer.report.to_dict() if _replayer is not None else None,
+        error=_replay_error,
+    )
+
+
+@router.post(
+    "/dlq/replay",
+    summary="Start a DLQ replay",
+    description=(
+        "Consumes `dicom.metadata.dlq` in the background and re-runs the pipeline for matching studies, "
+        "with bounded concurrency and a token-bucket rate limit. Offsets are committed per batch in the "
+        "DLQ_REPLAY_GROUP_ID consumer group, so a new replay resumes where an interrupted one stopped."
+    ),
+    response_model=DlqReplayStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        202: {"description": "Replay started", "model": DlqReplayStatusResponse},
+        409: {"description": "A replay is already running in this process", "model": ErrorResponse},
+    },
+)
+async def start_dlq_replay(body: DlqReplayRequest) -> DlqReplayStatusResponse:
+    global _replay_task, _replayer, _replay_error
+    if _replay_task is not None and not _replay_task.done():
+        raise HTTPException(status_code=409, detail="A DLQ replay is already running")
+    _replayer = None
+    _replay_error = None
+    _replay_task = asyncio.create_task(_run_replay(body), name="dlq-replay")
+    return _status()
+
+
+@router.get(
+    "/dlq/replay",
+    summary="Get DLQ replay progress",
+    description="Progress and throughput of the running or most recent DLQ replay started in this process.",
+    response_model=DlqReplayStatusResponse,
+    responses={200: {"description": "Replay status", "model": DlqReplayStatusResponse}},
+)
+async def get_dlq_replay() -> DlqReplayStatusResponse:
+    return _status()
+
+
+async def cancel_dlq_replay() -> None:
+    """Stop a running replay at shutdown; its last committed batch is the resume point."""
+    if _replay_task is not None and not _replay_task.done():
+        _replay_task.cancel()
+        try:
+            await _replay_task
+        except asyncio.CancelledError:
+            pass
@@ -2,7 +2,8 @@
 
 from fastapi import APIRouter
 
-from dicom_middleware.api.openapi import HealthResponse
+from dicom_middleware.api.openapi import HealthResponse, ReadinessResponse
+from dicom_middleware.infrastructure.circuit_breaker import circuit_breaker_states
 
 router = APIRouter(tags=["Health"])
 
@@ -21,9 +22,17 @@ async def health() -> HealthResponse:
 @router.get(
     "/ready",
     summary="Readiness probe",
-    description="Returns 200 if the service is ready to accept traffic. DB/Kafka checks can be added later.",
-    response_model=HealthResponse,
-    responses={200: {"description": "Service is ready to accept traffic", "model": HealthResponse}},
+    description=(
+        "Returns 200 if the service is ready to accept traffic, with the circuit breaker state of each dependency. "
+        "An open breaker makes the status 'degraded' but not 503: the dependencies are shared by all replicas, "
+        "so failing readiness would take every replica out of rotation at once, while requests already fail fast."
+    ),
+    response_model=ReadinessResponse,
+    responses={200: {"description": "Service is ready to accept traffic", "model": ReadinessResponse}},
 )
-async def ready() -> HealthResponse:
-    return HealthResponse(status="ok")
+async def ready() -> ReadinessResponse:
+    states = circuit_breaker_states()
+    return ReadinessResponse(
+        status="degraded" if "open" in states.values() else "ok",
+        circuit_breakers=states,
+    )
@@ -1,15 +1,22 @@
 """Ingestion API - Orthanc webhook receiver."""
 
-from fastapi import APIRouter, Depends, HTTPException
+import math
+from contextlib import nullcontext
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel, ConfigDict, Field
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from dicom_middleware.api.deps import get_correlation_id
 from dicom_middleware.api.errors import ErrorResponse
-from dicom_middleware.api.openapi import IngestionSuccessResponse
-from dicom_middleware.application.use_cases import process_new_study
+from dicom_middleware.api.openapi import IngestionJobStatusResponse, IngestionSuccessResponse
+from dicom_middleware.application.admission import AdmissionRejectedError, get_ingestion_admission
+from dicom_middleware.application.job_queue import DuplicateJobError, QueueFullError, get_job_queue
+from dicom_middleware.application.use_cases import process_new_study, request_ingestion
+from dicom_middleware.config import get_settings
 from dicom_middleware.db.session import get_db
+from dicom_middleware.infrastructure.circuit_breaker import circuit_open_cause
 from dicom_middleware.observability.logging import get_logger
 
 _log = get_logger(__name__)
@@ -38,27 +45,120 @@ class IngestionRequest(BaseModel):
         "Uses the Orthanc study ID to fetch the study, then runs the full pipeline: extract metadata, "
         "upsert to DB, save raw DICOM (local or GCS), and publish to Kafka. "
         "The correlation ID is set by middleware and returned for tracing. "
-        "Idempotent: processing the same study again updates the DB row and produces a single Kafka event."
+        "Idempotent: processing the same study again updates the DB row; with change detection enabled an "
+        "unchanged study is not re-uploaded or re-published. "
+        "With INGESTION_MODE=async the study is queued and 202 is returned immediately; poll "
+        "`GET /api/v1/ingestion/jobs/{correlation_id}` for the outcome. "
+        "With INGESTION_MODE=kafka a request is published to the ingestion topic for the pipeline workers "
+        "and 202 is returned once Kafka acknowledged it. "
+        "At most INGESTION_MAX_IN_FLIGHT requests are handled at once; others wait up to "
+        "INGESTION_ADMISSION_TIMEOUT_SECONDS for a slot and otherwise get 429 with Retry-After."
     ),
     response_model=IngestionSuccessResponse,
     responses={
-        200: {"description": "Study accepted for processing", "model": IngestionSuccessResponse},
+        200: {"description": "Study processed (sync mode)", "model": IngestionSuccessResponse},
+        202: {"description": "Study queued for processing (async or kafka mode)", "model": IngestionSuccessResponse},
+        409: {
+            "description": "Async mode: a job with this X-Correlation-ID already exists (use a new ID)",
+            "model": ErrorResponse,
+        },
         422: {"description": "Validation error (e.g. missing or invalid body)", "model": ErrorResponse},
+        429: {
+            "description": "Too many ingestion requests in flight; retry after `Retry-After` seconds",
+            "model": ErrorResponse,
+        },
         502: {"description": "Pipeline failed (e.g. Orthanc unreachable, storage or Kafka error)", "model": ErrorResponse},
+        503: {
+            "description": (
+                "Ingestion queue is full (async mode), the request could not be published (kafka mode), "
+                "or a dependency's circuit breaker is open (sync mode)"
+            ),
+            "model": ErrorResponse,
+        },
         500: {"description": "Internal error (e.g. missing correlation ID)", "model": ErrorResponse},
     },
 )
 async def ingest_study(
     body: IngestionRequest,
+    response: Response,
     session: AsyncSession = Depends(get_db),
 ) -> IngestionSuccessResponse:
-    """Accept Orthanc study notification and run pipeline. Correlation ID is set by middleware."""
+    """Accept Orthanc study notification and run (or enqueue) the pipeline. Correlation ID is set by middleware."""
     correlation_id = get_correlation_id()
     if not correlation_id:
         raise HTTPException(status_code=500, detail="Missing correlation ID")
+    admission = get_ingestion_admission()
+    try:
+        async with admission.admit() if admission is not None else nullcontext():
+            return await _ingest(correlation_id, body.ID, response, session)
+    except AdmissionRejectedError as e:
+        _log.warning("ingestion_throttled", correlation_id=correlation_id, reason=e.reason, retry_after=e.retry_after)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}) from e
+
+
+async def _ingest(
+    correlation_id: str, orthanc_study_id: str, response: Response, session: AsyncSession
+) -> IngestionSuccessResponse:
+    mode = get_settings().ingestion_mode
+    if mode == "kafka":
+        try:
+            await request_ingestion(correlation_id, orthanc_study_id, source="api")
+        except Exception as e:
+            _log.warning("ingestion_request_publish_failed", correlation_id=correlation_id, error=str(e))
+            raise HTTPException(
+                status_code=503, detail="Could not queue ingestion request", headers={"Retry-After": "1"}
+            ) from e
+        response.status_code = status.HTTP_202_ACCEPTED
+        return IngestionSuccessResponse(status="accepted", correlation_id=correlation_id)
+    if mode == "async":
+        try:
+            get_job_queue().submit(correlation_id, orthanc_study_id)
+        except DuplicateJobError as e:
+            _log.warning("ingestion_duplicate_correlation_id", correlation_id=correlation_id)
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        except QueueFullError as e:
+            _log.warning("ingestion_rejected", correlation_id=correlation_id, error=str(e))
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"}) from e
+        response.status_code = status.HTTP_202_ACCEPTED
+        return IngestionSuccessResponse(status="accepted", correlation_id=correlation_id)
     try:
-        await process_new_study(correlation_id, body.ID, session)
+        await process_new_study(correlation_id, orthanc_study_id, session)
         return IngestionSuccessResponse(status="accepted", correlation_id=correlation_id)
     except Exception as e:
+        circuit_open = circuit_open_cause(e)
+        if circuit_open is not None:
+            _log.warning("ingestion_failed_fast", correlation_id=correlation_id, dependency=circuit_open.dependency)
+            raise HTTPException(
+                status_code=503,
+                detail=str(circuit_open),
+                headers={"Retry-After": str(max(1, math.ceil(circuit_open.retry_after)))},
+            ) from e
         _log.exception("ingestion_failed", correlation_id=correlation_id, error=str(e))
         raise HTTPException(status_code=502, detail=f"Pipeline failed: {e}") from e
+
+
+@router.get(
+    "/jobs/{correlation_id}",
+    summary="Get ingestion job status",
+    description=(
+        "Returns the status of a study queued via `POST /api/v1/ingestion/studies` in async mode. "
+        "Statuses are kept in memory for the most recent INGESTION_JOB_RETENTION jobs of this process."
+    ),
+    response_model=IngestionJobStatusResponse,
+    responses={
+        200: {"description": "Job status", "model": IngestionJobStatusResponse},
+        404: {"description": "Unknown correlation ID (never queued here, or evicted)", "model": ErrorResponse},
+    },
+)
+async def get_ingestion_job(correlation_id: str) -> IngestionJobStatusResponse:
+    job = get_job_queue().get(correlation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No ingestion job for correlation ID {correlation_id}")
+    return IngestionJobStatusResponse(
+        correlation_id=job.correlation_id,
+        orthanc_study_id=job.orthanc_study_id,
+        status=job.status,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
@@ -1,8 +1,9 @@
 """Prometheus metrics endpoint."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import Response
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import REGISTRY
+from prometheus_client.exposition import choose_encoder
 
 router = APIRouter(tags=["Metrics"])
 
@@ -12,8 +13,11 @@ router = APIRouter(tags=["Metrics"])
     summary="Prometheus metrics (text format)",
     description=(
         "Prometheus scrape endpoint. Returns `text/plain; charset=utf-8` in Prometheus exposition format. "
-        "Used by Prometheus or compatible scrapers. Exposes pipeline, request, storage, and DLQ metrics."
+        "Used by Prometheus or compatible scrapers. Exposes pipeline, request, storage, and DLQ metrics. "
+        "Scrapers that accept `application/openmetrics-text` get OpenMetrics, which includes the "
+        "correlation ID exemplars on pipeline stage histograms."
     ),
 )
-async def metrics() -> Response:
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request) -> Response:
+    encoder, content_type = choose_encoder(request.headers.get("accept"))
+    return Response(content=encoder(REGISTRY), media_type=content_type)
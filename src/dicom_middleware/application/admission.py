@@ -0,0 +1,141 @@
+"""Admission control: bound the work in flight and reject the excess fast (429 + Retry-After)."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from dicom_middleware.config import get_settings
+from dicom_middleware.observability.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_WAIT_SECONDS,
+    ADMISSION_REJECTED,
+    ADMISSION_WAITING,
+)
+
+_MAX_RETRY_AFTER_SECONDS = 60
+_SERVICE_TIME_WEIGHT = 0.2
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is not admitted; `retry_after` is the suggested wait in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"Too many requests in flight ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    At most `max_in_flight` holders at a time; others wait in FIFO order for up to `queue_timeout`
+    seconds. A request whose estimated wait (waiters ahead x mean service time / slots) already
+    exceeds the deadline is rejected at once instead of queueing only to time out. Retry-After
+    is the estimated time until the current queue drains. Freed slots pass directly to the next waiter.
+    """
+
+    def __init__(self, max_in_flight: int, queue_timeout: float, scope: str) -> None:
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self._scope = scope
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._service_seconds: float | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until the request at queue `position` (0-based) gets a slot, from the mean service time."""
+        service = self._service_seconds if self._service_seconds is not None else self.queue_timeout
+        return (position + 1) * service / self.max_in_flight
+
+    def retry_after(self) -> int:
+        return min(_MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(self.estimated_wait(len(self._waiters)))))
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold one slot for the body. Raises AdmissionRejectedError if none frees up by the deadline."""
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe_service_time(time.perf_counter() - started)
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._update_gauges()
+            ADMISSION_QUEUE_WAIT_SECONDS.labels(scope=self._scope).observe(0)
+            return
+        if self._service_seconds is not None and self.estimated_wait(len(self._waiters)) > self.queue_timeout:
+            self._reject("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on.
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("timeout")
+        ADMISSION_QUEUE_WAIT_SECONDS.labels(scope=self._scope).observe(time.perf_counter() - started)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # slot handed over; _in_flight is unchanged
+                self._update_gauges()
+                return
+        self._in_flight -= 1
+        self._update_gauges()
+
+    def _reject(self, reason: str) -> None:
+        ADMISSION_REJECTED.labels(scope=self._scope, reason=reason).inc()
+        raise AdmissionRejectedError(reason, self.retry_after())
+
+    def _observe_service_time(self, seconds: float) -> None:
+        if self._service_seconds is None:
+            self._service_seconds = seconds
+        else:
+            self._service_seconds += _SERVICE_TIME_WEIGHT * (seconds - self._service_seconds)
+
+    def _update_gauges(self) -> None:
+        ADMISSION_IN_FLIGHT.labels(scope=self._scope).set(self._in_flight)
+        ADMISSION_WAITING.labels(scope=self._scope).set(len(self._waiters))
+
+
+_ingestion_admission: AdmissionController | None = None
+
+
+def get_ingestion_admission() -> AdmissionController | None:
+    """Controller for POST /api/v1/ingestion/studies, or None when INGESTION_MAX_IN_FLIGHT=0."""
+    global _ingestion_admission
+    settings = get_settings()
+    if settings.ingestion_max_in_flight == 0:
+        return None
+    if _ingestion_admission is None:
+        _ingestion_admission = AdmissionController(
+            max_in_flight=settings.ingestion_max_in_flight,
+            queue_timeout=settings.ingestion_admission_timeout_seconds,
+            scope="ingestion",
+        )
+    return _ingestion_admission
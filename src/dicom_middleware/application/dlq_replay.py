@@ -0,0 +1,245 @@
+"""Replay dead-lettered studies: consume dicom.metadata.dlq and re-run process_new_study."""
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.errors import KafkaError
+from pydantic import ValidationError
+
+from dicom_middleware.application.use_cases import process_new_study
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.domain.events import DLQPayload
+from dicom_middleware.observability.logging import correlation_id_ctx, get_logger
+from dicom_middleware.observability.metrics import DLQ_REPLAY_CHECKPOINTS, DLQ_REPLAY_MESSAGES
+
+_log = get_logger(__name__)
+
+# A fetch that returns nothing for this long means the replay caught up with the topic.
+_IDLE_TIMEOUT_MS = 2000
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+@dataclass
+class ReplayFilter:
+    """Which DLQ messages to replay. Times are compared with the Kafka record timestamp."""
+
+    reasons: frozenset[str] = frozenset()
+    since: datetime | None = None
+    until: datetime | None = None
+
+    def matches(self, payload: DLQPayload, timestamp_ms: int) -> bool:
+        if self.reasons and payload.error_reason not in self.reasons:
+            return False
+        return self.since is None or timestamp_ms >= self.since.timestamp() * 1000
+
+    def ends_before(self, timestamp_ms: int) -> bool:
+        """True once a partition reaches messages newer than `until` (they are left uncommitted)."""
+        return self.until is not None and timestamp_ms >= self.until.timestamp() * 1000
+
+
+@dataclass
+class ReplayReport:
+    """Progress of one replay run."""
+
+    scanned: int = 0
+    matched: int = 0
+    replayed: int = 0
+    failed: int = 0
+    checkpoints: int = 0
+    elapsed_seconds: float = 0.0
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    finished_at: str | None = None
+
+    @property
+    def throughput_per_second(self) -> float:
+        return self.matched / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "throughput_per_second": round(self.throughput_per_second, 3)}
+
+
+class DlqReplayer:
+    """
+    Consumes the DLQ in batches of up to `batch_size`, replays matching studies with at most
+    `concurrency` pipelines in flight and at most `rate` starts per second, and commits the batch's
+    offsets afterwards as a checkpoint. An interrupted replay with the same consumer group resumes
+    after the last committed batch. Replays that fail again are dead-lettered again by the pipeline.
+    """
+
+    def __init__(
+        self,
+        consumer: AIOKafkaConsumer,
+        replay_filter: ReplayFilter,
+        batch_size: int,
+        concurrency: int,
+        rate: float,
+        max_messages: int | None = None,
+    ) -> None:
+        self._consumer = consumer
+        self._filter = replay_filter
+        self._batch_size = batch_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate, burst=concurrency)
+        self._max_messages = max_messages
+        self.report = ReplayReport()
+
+    async def run(self) -> ReplayReport:
+        """Replay until the topic is drained (or `max_messages` were scanned); returns the final report."""
+        start = time.perf_counter()
+        try:
+            while self._max_messages is None or self.report.scanned < self._max_messages:
+                limit = self._batch_size
+                if self._max_messages is not None:
+                    limit = min(limit, self._max_messages - self.report.scanned)
+                batch = await self._consumer.getmany(timeout_ms=_IDLE_TIMEOUT_MS, max_records=limit)
+                if not any(batch.values()):
+                    break
+                await self._replay_batch(batch)
+                self.report.elapsed_seconds = time.perf_counter() - start
+        finally:
+            self.report.elapsed_seconds = time.perf_counter() - start
+            self.report.finished_at = datetime.now(timezone.utc).isoformat()
+        _log.info("dlq_replay_finished", **self.report.to_dict())
+        return self.report
+
+    async def _replay_batch(self, batch: dict) -> None:
+        tasks = []
+        checkpoint = {}
+        for tp, records in batch.items():
+            for record in records:
+                if self._filter.ends_before(record.timestamp):
+                    # Stop reading this partition; later messages stay available to future replays.
+                    self._consumer.pause(tp)
+                    break
+                checkpoint[tp] = record.offset + 1
+                self.report.scanned += 1
+                payload = _decode(record.value)
+                if payload is None or not self._filter.matches(payload, record.timestamp):
+                    DLQ_REPLAY_MESSAGES.labels(result="skipped").inc()
+                    continue
+                orthanc_study_id = payload.original_payload.get("orthanc_study_id")
+                if not orthanc_study_id:
+                    DLQ_REPLAY_MESSAGES.labels(result="skipped").inc()
+                    continue
+                self.report.matched += 1
+                await self._slots.acquire()
+                await self._bucket.acquire()
+                tasks.append(asyncio.create_task(self._replay(str(orthanc_study_id), payload.correlation_id)))
+        await asyncio.gather(*tasks)
+        if not checkpoint:
+            return
+        try:
+            await self._consumer.commit(checkpoint)
+        except KafkaError as e:
+            # The batch is replayed again on resume; ingestion is idempotent.
+            _log.warning("dlq_replay_checkpoint_failed", error=str(e))
+            return
+        self.report.checkpoints += 1
+        DLQ_REPLAY_CHECKPOINTS.inc()
+
+    async def _replay(self, orthanc_study_id: str, original_correlation_id: str) -> None:
+        correlation_id = str(uuid4())
+        correlation_id_ctx.set(correlation_id)
+        try:
+            factory = get_session_factory()
+            async with factory() as session:
+                await process_new_study(correlation_id, orthanc_study_id, session)
+        except Exception as e:
+            self.report.failed += 1
+            DLQ_REPLAY_MESSAGES.labels(result="failed").inc()
+            _log.warning(
+                "dlq_replay_failed",
+                orthanc_study_id=orthanc_study_id,
+                original_correlation_id=original_correlation_id,
+                error=str(e),
+            )
+        else:
+            self.report.replayed += 1
+            DLQ_REPLAY_MESSAGES.labels(result="replayed").inc()
+            _log.info(
+                "dlq_replayed",
+                orthanc_study_id=orthanc_study_id,
+                original_correlation_id=original_correlation_id,
+            )
+        finally:
+            self._slots.release()
+
+
+def _decode(value: bytes) -> DLQPayload | None:
+    try:
+        return DLQPayload.model_validate_json(value)
+    except ValidationError as e:
+        _log.warning("dlq_replay_invalid_message", error=str(e))
+        return None
+
+
+def dlq_consumer(group_id: str | None = None) -> AIOKafkaConsumer:
+    """DLQ consumer with manual commits; the group's committed offsets are the replay checkpoints."""
+    settings = get_settings()
+    return AIOKafkaConsumer(
+        settings.kafka_dlq_topic,
+        bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
+        group_id=group_id or settings.dlq_replay_group_id,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+    )
+
+
+async def replay_dlq(
+    replay_filter: ReplayFilter,
+    concurrency: int | None = None,
+    rate: float | None = None,
+    max_messages: int | None = None,
+    group_id: str | None = None,
+    on_start=None,
+) -> ReplayReport:
+    """
+    Run one replay with a fresh DLQ consumer. Without an explicit `until`, only messages dead-lettered
+    before the replay started are replayed, so studies that fail again are not picked up in a loop.
+    `on_start` receives the DlqReplayer (to expose live progress).
+    """
+    settings = get_settings()
+    if replay_filter.until is None:
+        replay_filter.until = datetime.now(timezone.utc)
+    consumer = dlq_consumer(group_id)
+    await consumer.start()
+    try:
+        replayer = DlqReplayer(
+            consumer,
+            replay_filter,
+            batch_size=settings.dlq_replay_batch_size,
+            concurrency=concurrency or settings.dlq_replay_concurrency,
+            rate=rate or settings.dlq_replay_rate_per_second,
+            max_messages=max_messages,
+        )
+        if on_start is not None:
+            on_start(replayer)
+        return await replayer.run()
+    finally:
+        await consumer.stop()
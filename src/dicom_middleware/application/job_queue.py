@@ -0,0 +1,168 @@
+"""In-process ingestion job queue and worker pool (INGESTION_MODE=async)."""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Literal
+
+from dicom_middleware.application.use_cases import process_new_study
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.observability.logging import correlation_id_ctx, get_logger
+from dicom_middleware.observability.metrics import INGESTION_JOBS_TOTAL, INGESTION_QUEUE_DEPTH
+
+_log = get_logger(__name__)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue is at capacity."""
+
+
+class DuplicateJobError(Exception):
+    """Raised when a job with the same correlation ID is already tracked."""
+
+
+@dataclass
+class IngestionJob:
+    """Status of one queued study ingestion, keyed by correlation ID."""
+
+    correlation_id: str
+    orthanc_study_id: str
+    status: JobStatus = "queued"
+    error: str | None = None
+    created_at: str = field(default_factory=_now)
+    updated_at: str = field(default_factory=_now)
+
+    def set_status(self, status: JobStatus, error: str | None = None) -> None:
+        self.status = status
+        self.error = error
+        self.updated_at = _now()
+
+
+class IngestionJobQueue:
+    """
+    Bounded queue drained by a fixed pool of asyncio workers.
+    Job statuses are kept in memory (most recent `retention` jobs); queued jobs are lost on restart.
+    """
+
+    def __init__(self, maxsize: int, workers: int, retention: int) -> None:
+        self._queue: asyncio.Queue[IngestionJob] = asyncio.Queue(maxsize=maxsize)
+        self._worker_count = workers
+        self._retention = retention
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self._workers: list[asyncio.Task] = []
+
+    def submit(self, correlation_id: str, orthanc_study_id: str) -> IngestionJob:
+        """
+        Enqueue a job without waiting. Raises QueueFullError when the queue is at capacity and
+        DuplicateJobError when `correlation_id` already names a tracked job (its status is kept).
+        """
+        if correlation_id in self._jobs:
+            INGESTION_JOBS_TOTAL.labels(status="duplicate").inc()
+            raise DuplicateJobError(f"An ingestion job with correlation ID {correlation_id} already exists")
+        job = IngestionJob(correlation_id=correlation_id, orthanc_study_id=orthanc_study_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            INGESTION_JOBS_TOTAL.labels(status="rejected").inc()
+            raise QueueFullError("Ingestion queue is full") from e
+        self._jobs[correlation_id] = job
+        self._jobs.move_to_end(correlation_id)
+        self._evict()
+        INGESTION_JOBS_TOTAL.labels(status="enqueued").inc()
+        INGESTION_QUEUE_DEPTH.set(self._queue.qsize())
+        return job
+
+    def get(self, correlation_id: str) -> IngestionJob | None:
+        return self._jobs.get(correlation_id)
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs once more than `retention` are tracked."""
+        while len(self._jobs) > self._retention:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self._jobs[oldest_id]
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self._worker_count)
+        ]
+        _log.info("ingestion_workers_started", workers=self._worker_count)
+
+    async def stop(self) -> None:
+        """Cancel the workers; running and still-queued jobs end as "cancelled"."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if not self._queue.empty():
+            _log.warning("ingestion_queue_dropped", pending=self._queue.qsize())
+        while not self._queue.empty():
+            self._cancel(self._queue.get_nowait(), "Dropped from the queue at shutdown")
+        INGESTION_QUEUE_DEPTH.set(0)
+
+    @staticmethod
+    def _cancel(job: IngestionJob, reason: str) -> None:
+        job.set_status("cancelled", error=reason)
+        INGESTION_JOBS_TOTAL.labels(status="cancelled").inc()
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self._queue.get()
+            INGESTION_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob) -> None:
+        correlation_id_ctx.set(job.correlation_id)
+        job.set_status("running")
+        try:
+            factory = get_session_factory()
+            async with factory() as session:
+                await process_new_study(job.correlation_id, job.orthanc_study_id, session)
+        except asyncio.CancelledError:
+            self._cancel(job, "Cancelled at shutdown")
+            _log.warning("ingestion_job_cancelled", correlation_id=job.correlation_id)
+            raise
+        except Exception as e:
+            job.set_status("failed", error=str(e))
+            INGESTION_JOBS_TOTAL.labels(status="failed").inc()
+            _log.warning("ingestion_job_failed", correlation_id=job.correlation_id, error=str(e))
+            return
+        job.set_status("succeeded")
+        INGESTION_JOBS_TOTAL.labels(status="succeeded").inc()
+
+
+_job_queue: IngestionJobQueue | None = None
+
+
+def get_job_queue() -> IngestionJobQueue:
+    global _job_queue
+    if _job_queue is None:
+        settings = get_settings()
+        _job_queue = IngestionJobQueue(
+            maxsize=settings.ingestion_queue_maxsize,
+            workers=settings.ingestion_workers,
+            retention=settings.ingestion_job_retention,
+        )
+    return _job_queue
+
+
+async def close_job_queue() -> None:
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue = None
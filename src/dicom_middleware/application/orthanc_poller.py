@@ -1,56 +1,270 @@
 """Background poller: detect new studies in Orthanc and run pipeline (alternative to webhook)."""
 
 import asyncio
+import time
 from uuid import uuid4
 
+import httpx
+
+from dicom_middleware.config import get_settings
 from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.infrastructure.circuit_breaker import CircuitOpenError, circuit_open_cause
 from dicom_middleware.infrastructure.orthanc import OrthancClient
+from dicom_middleware.infrastructure.study_cache import get_study_cache
 from dicom_middleware.observability.logging import get_logger
-from dicom_middleware.application.use_cases import process_new_study
-from dicom_middleware.infrastructure.repository import exists_by_study_instance_uid
+from dicom_middleware.observability.metrics import (
+    ORTHANC_CHANGES_CURSOR,
+    ORTHANC_CHANGES_PROCESSED,
+    ORTHANC_POLL_CYCLE_DURATION_SECONDS,
+    ORTHANC_POLL_CYCLE_STUDIES,
+    ORTHANC_POLL_INTERVAL_SECONDS,
+)
+from dicom_middleware.application.use_cases import process_new_study, request_ingestion
+from dicom_middleware.infrastructure.repository import (
+    exists_by_study_instance_uid,
+    existing_study_instance_uids,
+    get_poller_cursor,
+    save_poller_cursor,
+)
 
 _log = get_logger(__name__)
 
-POLL_INTERVAL_SEC = 15
+CHANGES_CURSOR_NAME = "orthanc_changes"
+# Only StableStudy (no instance arrived for Orthanc's StableAge): NewStudy fires on the first instance,
+# and ingesting then would store a partial study that the exists-check never revisits.
+STUDY_CHANGE_TYPES = frozenset({"StableStudy"})
+# Study cache hits confirmed against the studies table per query.
+_CONFIRM_BATCH_UIDS = 10000
 
 
-async def _process_study_if_new(orthanc_study_id: str) -> None:
-    """If this study is not yet in our DB, run pipeline."""
-    factory = get_session_factory()
-    async with factory() as session:
-        client = OrthancClient()
+async def _process_study_if_new(
+    client: OrthancClient, orthanc_study_id: str, study_instance_uid: str | None = None
+) -> bool:
+    """
+    If this study is not yet in our DB, run pipeline. Returns True if the pipeline was started.
+    `study_instance_uid` comes from the study cache when known; otherwise Orthanc is asked.
+    A study Orthanc no longer knows (4xx) is skipped; any other lookup failure (timeout, 5xx) is
+    raised so the caller retries it rather than losing the study.
+    The exists-check session is closed before the pipeline runs, so its connection is not held
+    (idle in transaction) while the pipeline takes its own.
+    """
+    cache = get_study_cache()
+    if not study_instance_uid:
         try:
             study_instance_uid = await client.get_study_instance_uid(orthanc_study_id)
-        except Exception as e:
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                raise
             _log.warning("orthanc_get_uid_failed", orthanc_study_id=orthanc_study_id, error=str(e))
-            return
+            return False
         if not study_instance_uid:
-            return
+            return False
+        if cache:
+            cache.set_uid(orthanc_study_id, study_instance_uid)
+    factory = get_session_factory()
+    async with factory() as session:
         exists = await exists_by_study_instance_uid(session, study_instance_uid)
-        if exists:
+    if exists:
+        if cache:
+            cache.mark_ingested(study_instance_uid)
+        return False
+    await _ingest_study(orthanc_study_id)
+    return True
+
+
+async def _skip_confirmed(study_ids: list[str]) -> list[tuple[str, str | None]]:
+    """
+    Drop the studies the cache's filter reports as ingested, once the DB confirms them in one query
+    per _CONFIRM_BATCH_UIDS hits: a Bloom filter hit may be a false positive, so it is never trusted
+    alone. Returns (Orthanc ID, cached UID or None) for the studies still to check one by one.
+    """
+    cache = get_study_cache()
+    if cache is None:
+        return [(sid, None) for sid in study_ids]
+    uids = {sid: cache.get_uid(sid) for sid in study_ids}
+    hits = list({uid for uid in uids.values() if uid and cache.is_ingested(uid)})
+    confirmed: set[str] = set()
+    if hits:
+        factory = get_session_factory()
+        async with factory() as session:
+            for start in range(0, len(hits), _CONFIRM_BATCH_UIDS):
+                confirmed |= await existing_study_instance_uids(session, hits[start : start + _CONFIRM_BATCH_UIDS])
+        cache.record_false_positives(len(hits) - len(confirmed))
+    return [(sid, uid) for sid, uid in uids.items() if uid not in confirmed]
+
+
+async def _ingest_study(orthanc_study_id: str) -> None:
+    """
+    Run the pipeline for a study known to be new; failures are logged (the pipeline already dead-lettered).
+    With INGESTION_MODE=kafka only an ingestion request is published; a worker runs the pipeline.
+    A fast-fail of an open circuit breaker is re-raised so the poll cycle stops and the poller pauses.
+    """
+    correlation_id = str(uuid4())
+    try:
+        if get_settings().ingestion_mode == "kafka":
+            await request_ingestion(correlation_id, orthanc_study_id, source="poller")
             return
-        correlation_id = str(uuid4())
+        await process_new_study(correlation_id, orthanc_study_id)
+    except Exception as e:
+        circuit_open = circuit_open_cause(e)
+        if circuit_open is not None:
+            raise circuit_open from None
+        _log.warning(
+            "poller_pipeline_failed",
+            orthanc_study_id=orthanc_study_id,
+            correlation_id=correlation_id,
+            error=str(e),
+        )
+
+
+async def _poll_all_studies(client: OrthancClient) -> tuple[int, int]:
+    """Full mode: one cycle over every study in Orthanc. Returns (studies scanned, studies processed)."""
+    study_ids = await client.get_study_ids()
+    new = 0
+    for sid, uid in await _skip_confirmed(study_ids):
+        new += await _process_study_if_new(client, sid, uid)
+    return len(study_ids), new
+
+
+async def _ingest_bounded(semaphore: asyncio.Semaphore, orthanc_study_id: str) -> None:
+    async with semaphore:
+        await _ingest_study(orthanc_study_id)
+
+
+async def _poll_bulk(client: OrthancClient, page_size: int, concurrency: int) -> tuple[int, int]:
+    """
+    Bulk mode: resolve a page of studies with one /tools/find call, check all their UIDs with one
+    DB query, and run the pipeline for the unseen ones with at most `concurrency` in flight.
+    Returns (studies scanned, new studies sent to the pipeline).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    factory = get_session_factory()
+    cache = get_study_cache()
+    scanned = new = 0
+    since = 0
+    while True:
+        page = await client.find_studies(page_size, since)
+        since += len(page)
+        scanned += len(page)
+        # The cache's filter is not consulted: a hit would need confirming by this same query anyway.
+        by_uid = {s["study_instance_uid"]: s["orthanc_study_id"] for s in page if s["study_instance_uid"]}
+        seen: set[str] = set()
+        if by_uid:
+            async with factory() as session:
+                seen = await existing_study_instance_uids(session, list(by_uid))
+        if cache:
+            for uid in seen:
+                cache.mark_ingested(uid)
+        unseen = [sid for uid, sid in by_uid.items() if uid not in seen]
+        new += len(unseen)
+        await asyncio.gather(*(_ingest_bounded(semaphore, sid) for sid in unseen))
+        if len(page) < page_size:
+            return scanned, new
+
+
+async def _load_cursor() -> int:
+    factory = get_session_factory()
+    async with factory() as session:
+        seq = await get_poller_cursor(session, CHANGES_CURSOR_NAME)
+    return seq or 0
+
+
+async def _store_cursor(seq: int) -> None:
+    factory = get_session_factory()
+    async with factory() as session:
+        await save_poller_cursor(session, CHANGES_CURSOR_NAME, seq)
+    ORTHANC_CHANGES_CURSOR.set(seq)
+
+
+async def _poll_changes(client: OrthancClient, since: int, limit: int) -> tuple[int, int, bool]:
+    """
+    Changes mode: handle one page of /changes after `since` and persist the new cursor.
+    Returns (new cursor, study changes handled, done). The cursor is stored only after the
+    page's studies were processed; a crash or a failed UID lookup raises before that, so the page
+    is read again (the pipeline is idempotent).
+    """
+    page = await client.get_changes(since, limit)
+    study_ids: dict[str, None] = {}
+    for change in page.get("Changes", []):
+        change_type = change.get("ChangeType")
+        if change_type in STUDY_CHANGE_TYPES and change.get("ResourceType") == "Study":
+            ORTHANC_CHANGES_PROCESSED.labels(change_type=change_type).inc()
+            study_ids.setdefault(change["ID"], None)
+    for sid, uid in await _skip_confirmed(list(study_ids)):
+        await _process_study_if_new(client, sid, uid)
+    last = int(page.get("Last", since))
+    if last != since:
+        await _store_cursor(last)
+    return last, len(study_ids), bool(page.get("Done", True))
+
+
+async def _pause(error: CircuitOpenError, min_seconds: float) -> None:
+    """Sleep until the open breaker lets probes through, instead of polling into fast-fails."""
+    seconds = max(error.retry_after, min_seconds)
+    _log.warning("orthanc_poller_paused", dependency=error.dependency, seconds=round(seconds, 1))
+    await asyncio.sleep(seconds)
+
+
+async def _run_changes_poller(client: OrthancClient) -> None:
+    """
+    Follow /changes from the persisted cursor. Pages are read back to back until Orthanc reports
+    Done; after that the interval drops to the minimum when studies changed and doubles while idle.
+    While a dependency's circuit breaker is open the poller pauses until it lets probes through;
+    the interrupted page is not committed, so it is read again.
+    """
+    settings = get_settings()
+    max_interval = settings.orthanc_poll_interval_seconds
+    min_interval = min(settings.orthanc_poll_min_interval_seconds, max_interval)
+    interval = min_interval
+    since: int | None = None
+    while True:
         try:
-            await process_new_study(correlation_id, orthanc_study_id, session)
+            if since is None:
+                since = await _load_cursor()
+                ORTHANC_CHANGES_CURSOR.set(since)
+                _log.info("orthanc_changes_cursor_loaded", since=since)
+            since, handled, done = await _poll_changes(client, since, settings.orthanc_changes_batch_limit)
+            if not done:
+                continue
+            interval = min_interval if handled else min(interval * 2, max_interval)
+        except asyncio.CancelledError:
+            break
+        except CircuitOpenError as e:
+            await _pause(e, min_interval)
+            continue
         except Exception as e:
-            _log.warning(
-                "poller_pipeline_failed",
-                orthanc_study_id=orthanc_study_id,
-                correlation_id=correlation_id,
-                error=str(e),
-            )
+            _log.warning("orthanc_poller_error", error=str(e))
+            interval = max_interval
+        ORTHANC_POLL_INTERVAL_SECONDS.set(interval)
+        await asyncio.sleep(interval)
 
 
 async def run_orthanc_poller() -> None:
     """Poll Orthanc for new studies and process them. Runs until cancelled."""
+    settings = get_settings()
     client = OrthancClient()
+    if settings.orthanc_poller_mode == "changes":
+        await _run_changes_poller(client)
+        return
+    mode = settings.orthanc_poller_mode
+    ORTHANC_POLL_INTERVAL_SECONDS.set(settings.orthanc_poll_interval_seconds)
     while True:
+        start = time.perf_counter()
         try:
-            study_ids = await client.get_study_ids()
-            for sid in study_ids:
-                await _process_study_if_new(sid)
+            if mode == "bulk":
+                scanned, new = await _poll_bulk(
+                    client, settings.orthanc_bulk_page_size, settings.orthanc_bulk_concurrency
+                )
+            else:
+                scanned, new = await _poll_all_studies(client)
+            ORTHANC_POLL_CYCLE_STUDIES.labels(mode=mode, kind="scanned").observe(scanned)
+            ORTHANC_POLL_CYCLE_STUDIES.labels(mode=mode, kind="new").observe(new)
         except asyncio.CancelledError:
             break
+        except CircuitOpenError as e:
+            await _pause(e, settings.orthanc_poll_interval_seconds)
+            continue
         except Exception as e:
             _log.warning("orthanc_poller_error", error=str(e))
-        await asyncio.sleep(POLL_INTERVAL_SEC)
+        ORTHANC_POLL_CYCLE_DURATION_SECONDS.labels(mode=mode).observe(time.perf_counter() - start)
+        await asyncio.sleep(settings.orthanc_poll_interval_seconds)
@@ -1,20 +1,49 @@
-"""Pipeline: extract -> DB -> local storage -> Kafka; on failure -> DLQ."""
+"""Pipeline: extract -> DB -> storage -> Kafka (or storage -> DB + outbox); on failure -> DLQ."""
 
+import asyncio
+import hashlib
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import datetime, timezone
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from dicom_middleware.application.single_flight import SingleFlight
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.locks import advisory_lock
+from dicom_middleware.db.session import get_session_factory
 from dicom_middleware.domain.entities import StudyMetadata
+from dicom_middleware.domain.storage import AsyncStorageBackend, SourceMD5
 from dicom_middleware.domain.events import DicomMetadataEvent, DLQPayload
-from dicom_middleware.infrastructure.dicom_extract import extract_metadata
+from dicom_middleware.infrastructure.circuit_breaker import KAFKA, POSTGRES, STORAGE, CircuitOpenError, guard
+from dicom_middleware.infrastructure.dicom_extract import TruncatedHeaderError, extract_metadata
 from dicom_middleware.infrastructure.dlq import send_to_dlq
 from dicom_middleware.infrastructure.kafka_producer import publish_metadata_event
 from dicom_middleware.infrastructure.orthanc import OrthancClient
 from dicom_middleware.infrastructure.storage_factory import get_storage_backend
-from dicom_middleware.infrastructure.repository import upsert_study
+from dicom_middleware.infrastructure.repository import (
+    exists_by_study_instance_uid,
+    get_content_fingerprint,
+    outbox_row,
+    set_content_fingerprint,
+    upsert_study,
+)
+from dicom_middleware.infrastructure.upsert_batcher import get_upsert_batcher
 from dicom_middleware.observability.logging import get_logger
-from dicom_middleware.observability.metrics import PIPELINE_FAILURE, PIPELINE_SUCCESS
+from dicom_middleware.observability.metrics import (
+    FULL_STUDY_DURATION_SECONDS,
+    FULL_STUDY_INSTANCES,
+    FULL_STUDY_INSTANCES_IN_FLIGHT,
+    INGESTION_COALESCED,
+    PIPELINE_DURATION_SECONDS,
+    PIPELINE_FAILURE,
+    PIPELINE_SKIPPED_BYTES,
+    PIPELINE_SKIPPED_STAGES,
+    PIPELINE_SUCCESS,
+    PIPELINE_UNCHANGED,
+)
+from dicom_middleware.observability.stages import StageTimings, current_timings, stage
 
 _log = get_logger(__name__)
 
@@ -23,118 +52,613 @@ DLQ_REASON_DB = "DB write failure"
 DLQ_REASON_STORAGE = "Storage write failure"
 DLQ_REASON_KAFKA = "Kafka publish failure"
 DLQ_REASON_VALIDATION = "Schema validation failure"
+DLQ_REASON_CIRCUIT_OPEN = "Dependency unavailable (circuit open)"
 
+# Streaming mode gives up if no complete header is found in this many leading bytes.
+_MAX_HEADER_BYTES = 16 * 1024 * 1024
 
-async def run_pipeline(
+# Write stages in flight per Study Instance UID (INGESTION_DEDUP_MODE=local|advisory_lock).
+_uid_flight = SingleFlight("study_instance_uid")
+
+# Process-wide cap on instance transfers in full-study mode: (event loop, semaphore).
+_instance_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+class DeadLetteredError(Exception):
+    """
+    A pipeline failure that was sent to the DLQ. `error` is the original exception (also `__cause__`).
+    Any other exception out of run_pipeline means the study was neither ingested nor dead-lettered.
+    """
+
+    def __init__(self, reason: str, error: BaseException) -> None:
+        super().__init__(f"{reason}: {error}")
+        self.reason = reason
+        self.error = error
+
+
+async def _dead_letter(
+    original_payload: dict, correlation_id: str, reason: str, error: BaseException
+) -> DeadLetteredError:
+    """
+    Send the failed study to the DLQ and count the failure. Fast-fails of an open breaker get their own reason.
+    Returns the DeadLetteredError for the caller to raise; a failed DLQ send raises its own error instead.
+    """
+    if isinstance(error, CircuitOpenError):
+        reason = DLQ_REASON_CIRCUIT_OPEN
+    await send_to_dlq(
+        DLQPayload(
+            original_payload=original_payload,
+            error_reason=reason,
+            correlation_id=correlation_id,
+        ),
+        reason=reason,
+    )
+    PIPELINE_FAILURE.labels(reason=reason).inc()
+    return DeadLetteredError(reason, error)
+
+
+def _metadata_event(
+    correlation_id: str, metadata: StudyMetadata, storage_path: str, instance_count: int | None = None
+) -> DicomMetadataEvent:
+    return DicomMetadataEvent(
+        correlation_id=correlation_id,
+        study_instance_uid=metadata.study_instance_uid,
+        patient_id=metadata.patient_id,
+        modality=metadata.modality,
+        study_date=metadata.study_date,
+        storage_path=storage_path,
+        instance_count=instance_count,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+async def _persist_metadata(
+    session: AsyncSession,
+    cid_uuid: UUID,
+    metadata: StudyMetadata,
+    event: DicomMetadataEvent | None = None,
+    content_fingerprint: str | None = None,
+) -> None:
+    """
+    Idempotent upsert; optionally coalesced with concurrent pipelines.
+    With `event` (outbox mode) the event is written to the outbox in the same transaction,
+    together with the content fingerprint.
+    """
+    settings = get_settings()
+    outbox = outbox_row(settings.kafka_topic, event) if event is not None else None
+    with stage("db"), guard(POSTGRES):
+        if settings.db_upsert_batch_enabled:
+            await get_upsert_batcher().submit(cid_uuid, metadata, outbox, content_fingerprint)
+        else:
+            await upsert_study(session, cid_uuid, metadata, outbox, content_fingerprint)
+
+
+async def _unchanged(
+    session: AsyncSession, metadata: StudyMetadata, content_fingerprint: str | None, size: int | None = None
+) -> bool:
+    """True if the last completed ingestion of this study had the same fingerprint (write stages can be skipped)."""
+    if content_fingerprint is None:
+        return False
+    try:
+        with stage("db"), guard(POSTGRES):
+            stored = await get_content_fingerprint(session, metadata.study_instance_uid)
+    except Exception as e:
+        _log.warning("fingerprint_lookup_failed", study_instance_uid=metadata.study_instance_uid, error=str(e))
+        return False
+    if stored != content_fingerprint:
+        return False
+    PIPELINE_UNCHANGED.inc()
+    for skipped in ("db", "storage", "kafka"):
+        PIPELINE_SKIPPED_STAGES.labels(stage=skipped).inc()
+    if size:
+        PIPELINE_SKIPPED_BYTES.inc(size)
+    _log.info("study_unchanged_skipped", study_instance_uid=metadata.study_instance_uid)
+    return True
+
+
+async def _record_fingerprint(session: AsyncSession, metadata: StudyMetadata, content_fingerprint: str | None) -> None:
+    """After a completed publish, remember the fingerprint. A failure only costs a redundant re-run later."""
+    if content_fingerprint is None:
+        return
+    try:
+        with stage("db"), guard(POSTGRES):
+            await set_content_fingerprint(session, metadata.study_instance_uid, content_fingerprint)
+    except Exception as e:
+        _log.warning("fingerprint_update_failed", study_instance_uid=metadata.study_instance_uid, error=str(e))
+
+
+async def _read_header(chunks: AsyncIterator[bytes], prefix_bytes: int) -> tuple[StudyMetadata, list[bytes]]:
+    """
+    Consume leading chunks until the DICOM header parses. Returns the metadata and the consumed
+    chunks, which must be written to storage before the rest of the stream.
+    """
+    consumed: list[bytes] = []
+    size = 0
+    parse_at = prefix_bytes
+    async for chunk in chunks:
+        consumed.append(chunk)
+        size += len(chunk)
+        if size < parse_at:
+            continue
+        try:
+            return extract_metadata(b"".join(consumed), truncated=True), consumed
+        except TruncatedHeaderError:
+            if parse_at >= _MAX_HEADER_BYTES:
+                raise ValueError(f"No complete DICOM header in the first {_MAX_HEADER_BYTES} bytes")
+            parse_at *= 2
+    return extract_metadata(b"".join(consumed)), consumed
+
+
+def _source_md5(client: OrthancClient, orthanc_instance_id: str, known: str | None = None) -> SourceMD5:
+    """Orthanc's MD5 of an instance for storage dedup; fetched only if the storage backend asks for it."""
+
+    async def md5() -> str | None:
+        return known or await client.get_instance_md5(orthanc_instance_id)
+
+    return md5
+
+
+async def _replay(consumed: list[bytes], rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield already-consumed chunks (releasing them as we go), then the remainder of the stream."""
+    while consumed:
+        yield consumed.pop(0)
+    async for chunk in rest:
+        yield chunk
+
+
+async def _publish(
     correlation_id: str,
-    orthanc_study_id: str,
+    metadata: StudyMetadata,
+    storage_path: str,
+    original_payload: dict,
+    instance_count: int | None = None,
+) -> None:
+    """5. Publish to Kafka (not used in outbox mode: the event commits with the upsert and the relay publishes it)."""
+    try:
+        with stage("kafka"), guard(KAFKA):
+            await publish_metadata_event(_metadata_event(correlation_id, metadata, storage_path, instance_count))
+    except Exception as e:
+        dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_KAFKA, e)
+        _log.exception("kafka_publish_failed", correlation_id=correlation_id)
+        raise dead_lettered from e
+
+
+async def _already_ingested(study_instance_uid: str) -> bool:
+    factory = get_session_factory()
+    async with factory() as session:
+        return await exists_by_study_instance_uid(session, study_instance_uid)
+
+
+async def _locked_write(study_instance_uid: str, write: Callable[[], Awaitable[None]]) -> None:
+    """Serialize writes for one UID across replicas; skip them if another replica just ingested it."""
+    settings = get_settings()
+    async with advisory_lock(f"study:{study_instance_uid}", settings.ingestion_dedup_lock_timeout_seconds) as free:
+        if not free and await _already_ingested(study_instance_uid):
+            INGESTION_COALESCED.labels(scope="replica").inc()
+            return
+        await write()
+
+
+async def _coalesce_by_uid(
+    study_instance_uid: str,
     session: AsyncSession,
+    write: Callable[[AsyncSession], Awaitable[None]],
 ) -> None:
     """
-    Run the full pipeline for one study. On any failure, send to DLQ and re-raise or return.
-    Idempotent: duplicate study_instance_uid results in upsert and single Kafka message.
+    Run the write stages (DB, storage, Kafka) once per Study Instance UID among concurrent pipelines;
+    callers for the same UID share the outcome. Only the executing pipeline dead-letters a failure.
+    The shared run writes through its own session: the first caller's `session` may be closed
+    (request finished or cancelled) while the run and its followers still need one.
+    """
+    mode = get_settings().ingestion_dedup_mode
+    if mode == "off":
+        await write(session)
+        return
+
+    async def shared() -> None:
+        factory = get_session_factory()
+        async with factory() as own_session:
+            if mode == "advisory_lock":
+                await _locked_write(study_instance_uid, lambda: write(own_session))
+            else:
+                await write(own_session)
+
+    await _uid_flight.do(study_instance_uid, shared)
+
+
+async def _write_buffered(
+    session: AsyncSession,
+    correlation_id: str,
+    metadata: StudyMetadata,
+    dicom_bytes: bytes,
+    original_payload: dict,
+    content_fingerprint: str | None = None,
+) -> None:
+    """
+    Upsert, store and publish a buffered instance; skip all three if its content is unchanged.
+    In outbox mode storage runs first so the event (with its storage path) commits with the upsert.
     """
-    original_payload = {"orthanc_study_id": orthanc_study_id}
     cid_uuid = UUID(correlation_id) if isinstance(correlation_id, str) else correlation_id
+    outbox = get_settings().kafka_outbox_enabled
+    if await _unchanged(session, metadata, content_fingerprint, len(dicom_bytes)):
+        return
 
-    try:
-        # 1. Fetch DICOM from Orthanc (first instance)
-        client = OrthancClient()
+    # 3. Persist to DB (idempotent upsert)
+    if not outbox:
         try:
-            dicom_bytes = await client.get_first_instance_archive(orthanc_study_id)
+            await _persist_metadata(session, cid_uuid, metadata)
         except Exception as e:
-            await send_to_dlq(
-                DLQPayload(
-                    original_payload=original_payload,
-                    error_reason=DLQ_REASON_METADATA,
-                    correlation_id=correlation_id,
-                ),
-                reason=DLQ_REASON_METADATA,
-            )
-            PIPELINE_FAILURE.labels(reason=DLQ_REASON_METADATA).inc()
-            _log.warning("orthanc_fetch_failed", error=str(e), correlation_id=correlation_id)
-            raise
+            dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_DB, e)
+            _log.exception("db_write_failed", correlation_id=correlation_id)
+            raise dead_lettered from e
+
+    # 4. Save raw DICOM (local or GCS via factory); blocking I/O runs on the storage executor
+    try:
+        storage = get_storage_backend()
+        with stage("storage"), guard(STORAGE):
+            storage_path = await storage.save_async(metadata.study_instance_uid, dicom_bytes)
+    except Exception as e:
+        dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_STORAGE, e)
+        _log.exception("storage_write_failed", correlation_id=correlation_id)
+        raise dead_lettered from e
 
-        # 2. Extract metadata
+    # 3'. Outbox mode: upsert and event in one transaction
+    if outbox:
         try:
-            metadata = extract_metadata(dicom_bytes)
-        except ValueError as e:
-            await send_to_dlq(
-                DLQPayload(
-                    original_payload=original_payload,
-                    error_reason=DLQ_REASON_METADATA,
-                    correlation_id=correlation_id,
-                ),
-                reason=DLQ_REASON_METADATA,
+            await _persist_metadata(
+                session,
+                cid_uuid,
+                metadata,
+                _metadata_event(correlation_id, metadata, storage_path),
+                content_fingerprint,
             )
-            PIPELINE_FAILURE.labels(reason=DLQ_REASON_METADATA).inc()
-            _log.warning("metadata_extract_failed", error=str(e), correlation_id=correlation_id)
-            raise
+        except Exception as e:
+            dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_DB, e)
+            _log.exception("db_write_failed", correlation_id=correlation_id)
+            raise dead_lettered from e
+
+    if not outbox:
+        await _publish(correlation_id, metadata, storage_path, original_payload)
+        await _record_fingerprint(session, metadata, content_fingerprint)
+
+
+async def _ingest_buffered(
+    client: OrthancClient,
+    correlation_id: str,
+    orthanc_study_id: str,
+    session: AsyncSession,
+    original_payload: dict,
+) -> StudyMetadata:
+    """Fetch the first instance into memory, extract its metadata, then upsert, store and publish it."""
+    # 1. Fetch DICOM from Orthanc (first instance)
+    try:
+        with stage("orthanc_fetch"):
+            dicom_bytes = await client.get_first_instance_archive(orthanc_study_id)
+    except Exception as e:
+        dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_METADATA, e)
+        _log.warning("orthanc_fetch_failed", error=str(e), correlation_id=correlation_id)
+        raise dead_lettered from e
 
+    # 2. Extract metadata
+    try:
+        with stage("parse"):
+            metadata = extract_metadata(dicom_bytes)
+    except ValueError as e:
+        dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_METADATA, e)
+        _log.warning("metadata_extract_failed", error=str(e), correlation_id=correlation_id)
+        raise dead_lettered from e
+
+    content_fingerprint = None
+    if get_settings().pipeline_change_detection_enabled:
+        with stage("parse"):
+            digest = await asyncio.to_thread(lambda: hashlib.sha256(dicom_bytes).hexdigest())
+        content_fingerprint = f"sha256:{digest}"
+
+    # 3-5. Write stages, coalesced per Study Instance UID
+    await _coalesce_by_uid(
+        metadata.study_instance_uid,
+        session,
+        lambda write_session: _write_buffered(
+            write_session, correlation_id, metadata, dicom_bytes, original_payload, content_fingerprint
+        ),
+    )
+    return metadata
+
+
+async def _write_streaming(
+    session: AsyncSession,
+    correlation_id: str,
+    metadata: StudyMetadata,
+    chunks: AsyncIterator[bytes],
+    original_payload: dict,
+    content_fingerprint: str | None = None,
+    source_md5: SourceMD5 | None = None,
+) -> None:
+    """
+    Upsert, pipe the stream into storage and publish (storage first in outbox mode).
+    If the content is unchanged the rest of the stream is never read.
+    """
+    cid_uuid = UUID(correlation_id) if isinstance(correlation_id, str) else correlation_id
+    outbox = get_settings().kafka_outbox_enabled
+    if await _unchanged(session, metadata, content_fingerprint):
+        return
+    reason = DLQ_REASON_DB
+    try:
         # 3. Persist to DB (idempotent upsert)
-        try:
-            await upsert_study(session, cid_uuid, metadata)
-        except Exception as e:
-            await send_to_dlq(
-                DLQPayload(
-                    original_payload=original_payload,
-                    error_reason=DLQ_REASON_DB,
-                    correlation_id=correlation_id,
-                ),
-                reason=DLQ_REASON_DB,
+        if not outbox:
+            await _persist_metadata(session, cid_uuid, metadata)
+
+        # 4. Pipe the rest of the body into storage
+        reason = DLQ_REASON_STORAGE
+        storage = get_storage_backend()
+        with stage("storage"), guard(STORAGE):
+            storage_path = await storage.save_stream_async(metadata.study_instance_uid, chunks, source_md5)
+
+        # 3'. Outbox mode: upsert and event in one transaction
+        if outbox:
+            reason = DLQ_REASON_DB
+            await _persist_metadata(
+                session,
+                cid_uuid,
+                metadata,
+                _metadata_event(correlation_id, metadata, storage_path),
+                content_fingerprint,
             )
-            PIPELINE_FAILURE.labels(reason=DLQ_REASON_DB).inc()
-            _log.exception("db_write_failed", correlation_id=correlation_id)
-            raise
+    except Exception as e:
+        dead_lettered = await _dead_letter(original_payload, correlation_id, reason, e)
+        _log.warning("streaming_ingest_failed", reason=reason, error=str(e), correlation_id=correlation_id)
+        raise dead_lettered from e
 
-        # 4. Save raw DICOM (local or GCS via factory)
-        try:
-            storage = get_storage_backend()
-            storage_path = storage.save(metadata.study_instance_uid, dicom_bytes)
-        except Exception as e:
-            await send_to_dlq(
-                DLQPayload(
-                    original_payload=original_payload,
-                    error_reason=DLQ_REASON_STORAGE,
-                    correlation_id=correlation_id,
+    if not outbox:
+        await _publish(correlation_id, metadata, storage_path, original_payload)
+        await _record_fingerprint(session, metadata, content_fingerprint)
+
+
+async def _ingest_streaming(
+    client: OrthancClient,
+    correlation_id: str,
+    orthanc_study_id: str,
+    session: AsyncSession,
+    original_payload: dict,
+) -> StudyMetadata:
+    """
+    Stream the first instance from Orthanc: parse metadata from the leading chunks, upsert,
+    then pipe the chunks straight into storage. Memory per study is bounded by the chunk size
+    (plus the header prefix), not the object size.
+    """
+    settings = get_settings()
+    header_read = False
+    try:
+        # 1-2. Open the instance and extract metadata from the header prefix
+        with stage("orthanc_fetch"):
+            instance_id = await client.get_first_instance_id(orthanc_study_id)
+            content_fingerprint = md5 = None
+            if settings.pipeline_change_detection_enabled:
+                md5 = await client.get_instance_md5(instance_id)
+                content_fingerprint = f"md5:{md5}" if md5 else None
+        async with client.stream_instance(instance_id, settings.orthanc_stream_chunk_bytes) as chunks:
+            with stage("orthanc_fetch"):
+                metadata, consumed = await _read_header(chunks, settings.dicom_header_prefix_bytes)
+            header_read = True
+
+            # 3-5. Write stages (dead-letter their own failures), coalesced per Study Instance UID
+            await _coalesce_by_uid(
+                metadata.study_instance_uid,
+                session,
+                lambda write_session: _write_streaming(
+                    write_session,
+                    correlation_id,
+                    metadata,
+                    _replay(consumed, chunks),
+                    original_payload,
+                    content_fingerprint,
+                    _source_md5(client, instance_id, md5),
                 ),
-                reason=DLQ_REASON_STORAGE,
             )
-            PIPELINE_FAILURE.labels(reason=DLQ_REASON_STORAGE).inc()
-            _log.exception("storage_write_failed", correlation_id=correlation_id)
+    except Exception as e:
+        if header_read:
             raise
+        dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_METADATA, e)
+        _log.warning("streaming_ingest_failed", reason=DLQ_REASON_METADATA, error=str(e), correlation_id=correlation_id)
+        raise dead_lettered from e
+    return metadata
 
-        # 5. Publish to Kafka
-        event = DicomMetadataEvent(
-            correlation_id=correlation_id,
-            study_instance_uid=metadata.study_instance_uid,
-            patient_id=metadata.patient_id,
-            modality=metadata.modality,
-            study_date=metadata.study_date,
-            storage_path=storage_path,
-            timestamp=datetime.now(timezone.utc).isoformat(),
+
+def _global_instance_slots() -> asyncio.Semaphore:
+    """Semaphore shared by all studies on the running loop (PIPELINE_FULL_STUDY_GLOBAL_CONCURRENCY)."""
+    global _instance_slots
+    loop = asyncio.get_running_loop()
+    if _instance_slots is None or _instance_slots[0] is not loop:
+        _instance_slots = (loop, asyncio.Semaphore(get_settings().pipeline_full_study_global_concurrency))
+    return _instance_slots[1]
+
+
+async def _store_instances(
+    client: OrthancClient,
+    storage: AsyncStorageBackend,
+    study_instance_uid: str,
+    instances: list[dict[str, str]],
+    first_chunks: AsyncIterator[bytes],
+) -> None:
+    """
+    Stream every instance from Orthanc into storage, at most PIPELINE_FULL_STUDY_CONCURRENCY at a time
+    for this study and PIPELINE_FULL_STUDY_GLOBAL_CONCURRENCY across studies. The first instance is
+    already open (its header was parsed) and is written from `first_chunks`.
+    Raises the first transfer error; the remaining transfers are cancelled.
+    """
+    settings = get_settings()
+    global_slots = _global_instance_slots()
+    pending = iter([(instances[0], first_chunks)] + [(instance, None) for instance in instances[1:]])
+
+    async def _store(instance: dict[str, str], chunks: AsyncIterator[bytes]) -> None:
+        await storage.save_instance_stream_async(
+            study_instance_uid,
+            instance["sop_instance_uid"],
+            chunks,
+            _source_md5(client, instance["orthanc_instance_id"]),
         )
-        try:
-            await publish_metadata_event(event)
-        except Exception as e:
-            await send_to_dlq(
-                DLQPayload(
-                    original_payload=original_payload,
-                    error_reason=DLQ_REASON_KAFKA,
-                    correlation_id=correlation_id,
+
+    async def _worker() -> None:
+        for instance, chunks in pending:
+            async with global_slots:
+                FULL_STUDY_INSTANCES_IN_FLIGHT.inc()
+                try:
+                    if chunks is not None:
+                        await _store(instance, chunks)
+                        continue
+                    async with client.stream_instance(
+                        instance["orthanc_instance_id"], settings.orthanc_stream_chunk_bytes
+                    ) as body:
+                        await _store(instance, body)
+                finally:
+                    FULL_STUDY_INSTANCES_IN_FLIGHT.dec()
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(settings.pipeline_full_study_concurrency, len(instances))):
+                tg.create_task(_worker())
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0] from None
+
+
+async def _write_full_study(
+    session: AsyncSession,
+    client: OrthancClient,
+    correlation_id: str,
+    metadata: StudyMetadata,
+    instances: list[dict[str, str]],
+    first_chunks: AsyncIterator[bytes],
+    original_payload: dict,
+) -> None:
+    """Upsert, store every instance under the study prefix and publish one event for the study."""
+    cid_uuid = UUID(correlation_id) if isinstance(correlation_id, str) else correlation_id
+    outbox = get_settings().kafka_outbox_enabled
+    reason = DLQ_REASON_DB
+    try:
+        # 3. Persist to DB (idempotent upsert)
+        if not outbox:
+            await _persist_metadata(session, cid_uuid, metadata)
+
+        # 4. Fan out instance transfers into storage
+        reason = DLQ_REASON_STORAGE
+        storage = get_storage_backend()
+        with stage("storage"), guard(STORAGE):
+            await _store_instances(client, storage, metadata.study_instance_uid, instances, first_chunks)
+        storage_path = storage.study_prefix(metadata.study_instance_uid)
+
+        # 3'. Outbox mode: upsert and event in one transaction
+        if outbox:
+            reason = DLQ_REASON_DB
+            await _persist_metadata(
+                session,
+                cid_uuid,
+                metadata,
+                _metadata_event(correlation_id, metadata, storage_path, len(instances)),
+            )
+    except Exception as e:
+        dead_lettered = await _dead_letter(original_payload, correlation_id, reason, e)
+        _log.warning("full_study_ingest_failed", reason=reason, error=str(e), correlation_id=correlation_id)
+        raise dead_lettered from e
+
+    if not outbox:
+        await _publish(correlation_id, metadata, storage_path, original_payload, len(instances))
+
+
+async def _ingest_full_study(
+    client: OrthancClient,
+    correlation_id: str,
+    orthanc_study_id: str,
+    session: AsyncSession,
+    original_payload: dict,
+) -> StudyMetadata:
+    """
+    List every instance of the study, parse metadata from the first instance's header, then stream
+    all instances into storage in parallel. Nothing is buffered beyond one chunk per transfer.
+    """
+    settings = get_settings()
+    start = time.perf_counter()
+    header_read = False
+    try:
+        # 1-2. List instances and extract metadata from the first one's header prefix
+        with stage("orthanc_fetch"):
+            instances = await client.get_study_instances(orthanc_study_id)
+        if not instances:
+            raise ValueError(f"No instances in study {orthanc_study_id}")
+        async with client.stream_instance(
+            instances[0]["orthanc_instance_id"], settings.orthanc_stream_chunk_bytes
+        ) as chunks:
+            with stage("orthanc_fetch"):
+                metadata, consumed = await _read_header(chunks, settings.dicom_header_prefix_bytes)
+            header_read = True
+
+            # 3-5. Write stages (dead-letter their own failures), coalesced per Study Instance UID
+            await _coalesce_by_uid(
+                metadata.study_instance_uid,
+                session,
+                lambda write_session: _write_full_study(
+                    write_session, client, correlation_id, metadata, instances, _replay(consumed, chunks), original_payload
                 ),
-                reason=DLQ_REASON_KAFKA,
             )
-            PIPELINE_FAILURE.labels(reason=DLQ_REASON_KAFKA).inc()
-            _log.exception("kafka_publish_failed", correlation_id=correlation_id)
+    except Exception as e:
+        if header_read:
             raise
-
-        PIPELINE_SUCCESS.inc()
-        _log.info(
-            "pipeline_success",
-            study_instance_uid=metadata.study_instance_uid,
-            correlation_id=correlation_id,
+        dead_lettered = await _dead_letter(original_payload, correlation_id, DLQ_REASON_METADATA, e)
+        _log.warning(
+            "full_study_ingest_failed", reason=DLQ_REASON_METADATA, error=str(e), correlation_id=correlation_id
         )
-    except (ValueError, Exception):
-        # Already sent to DLQ and incremented metric where applicable; re-raise for HTTP layer
-        raise
+        raise dead_lettered from e
+    duration = time.perf_counter() - start
+    FULL_STUDY_DURATION_SECONDS.observe(duration)
+    FULL_STUDY_INSTANCES.observe(len(instances))
+    _log.info(
+        "full_study_stored",
+        study_instance_uid=metadata.study_instance_uid,
+        instances=len(instances),
+        duration_seconds=round(duration, 3),
+        correlation_id=correlation_id,
+    )
+    return metadata
+
+
+async def run_pipeline(
+    correlation_id: str,
+    orthanc_study_id: str,
+    session: AsyncSession,
+) -> StudyMetadata:
+    """
+    Run the full pipeline for one study and return its metadata. On a failure, send to DLQ and raise
+    DeadLetteredError (any other exception means the DLQ send itself failed, or the failure was outside a stage).
+    Idempotent: duplicate study_instance_uid results in upsert; with change detection an unchanged
+    study skips storage and Kafka.
+    Concurrent pipelines for the same Study Instance UID share one execution of the write stages.
+    In outbox mode the event is committed with the upsert and published by the outbox relay,
+    so this call does not wait on Kafka. In full-study mode every instance is stored and the event
+    carries the study's storage prefix and instance count.
+    """
+    original_payload = {"orthanc_study_id": orthanc_study_id}
+    client = OrthancClient()
+    settings = get_settings()
+    timings = StageTimings(correlation_id)
+    token = current_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        if settings.pipeline_full_study_enabled:
+            metadata = await _ingest_full_study(client, correlation_id, orthanc_study_id, session, original_payload)
+        elif settings.pipeline_streaming_enabled:
+            metadata = await _ingest_streaming(client, correlation_id, orthanc_study_id, session, original_payload)
+        else:
+            metadata = await _ingest_buffered(client, correlation_id, orthanc_study_id, session, original_payload)
+    finally:
+        duration = time.perf_counter() - start
+        PIPELINE_DURATION_SECONDS.observe(duration, exemplar={"correlation_id": str(correlation_id)})
+        current_timings.reset(token)
+
+    PIPELINE_SUCCESS.inc()
+    _log.info(
+        "pipeline_success",
+        study_instance_uid=metadata.study_instance_uid,
+        correlation_id=correlation_id,
+        duration_ms=round(duration * 1000, 2),
+        **timings.as_log_fields(),
+    )
+    return metadata
@@ -0,0 +1,45 @@
+"""Single-flight: concurrent calls with the same key share one execution and its result."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+from dicom_middleware.observability.metrics import INGESTION_COALESCED
+
+T = TypeVar("T")
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # The result is delivered to waiters; avoid "exception was never retrieved" if they were all cancelled.
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """
+    The first caller for a key starts `fn()` as a task; callers arriving while it runs await the
+    same task and receive its return value or exception. The work is shielded, so a cancelled
+    caller does not cancel it for the others. Keys are forgotten as soon as the task finishes.
+    """
+
+    def __init__(self, scope: str) -> None:
+        self._scope = scope
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(_consume_exception)
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            INGESTION_COALESCED.labels(scope=self._scope).inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -1,14 +1,68 @@
 """Use case: process new study (ingestion entry point)."""
 
+from datetime import datetime, timezone
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from dicom_middleware.application.pipeline import run_pipeline
+from dicom_middleware.application.single_flight import SingleFlight
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.domain.events import IngestionRequestEvent
+from dicom_middleware.infrastructure.kafka_producer import publish_ingestion_request
+from dicom_middleware.infrastructure.study_cache import get_study_cache
+from dicom_middleware.observability.metrics import INGESTION_REQUESTS_PUBLISHED
+
+# Pipelines in flight per Orthanc study ID: webhook retries and the poller share one run.
+_study_flight = SingleFlight("orthanc_study_id")
+
+
+async def _run_and_record(correlation_id: str, orthanc_study_id: str, session: AsyncSession) -> None:
+    metadata = await run_pipeline(correlation_id, orthanc_study_id, session)
+    cache = get_study_cache()
+    if cache is not None:
+        cache.record(orthanc_study_id, metadata.study_instance_uid)
 
 
 async def process_new_study(
     correlation_id: str,
     orthanc_study_id: str,
-    session: AsyncSession,
+    session: AsyncSession | None = None,
 ) -> None:
-    """Process a new study: run pipeline (extract -> DB -> storage -> Kafka). Idempotent by study_instance_uid."""
-    await run_pipeline(correlation_id, orthanc_study_id, session)
+    """
+    Process a new study: run pipeline (extract -> DB -> storage -> Kafka). Idempotent by study_instance_uid.
+    Concurrent calls for the same Orthanc study ID share the first caller's run and its outcome
+    (unless INGESTION_DEDUP_MODE=off). `session` is only used with INGESTION_DEDUP_MODE=off: the
+    shared run opens its own, since `session` is usually request-scoped and closes when the first
+    caller returns or is cancelled. Without `session` the run always opens its own.
+    """
+    dedup_off = get_settings().ingestion_dedup_mode == "off"
+    if dedup_off and session is not None:
+        await _run_and_record(correlation_id, orthanc_study_id, session)
+        return
+
+    async def own_session_run() -> None:
+        factory = get_session_factory()
+        async with factory() as own_session:
+            await _run_and_record(correlation_id, orthanc_study_id, own_session)
+
+    if dedup_off:
+        await own_session_run()
+        return
+    await _study_flight.do(orthanc_study_id, own_session_run)
+
+
+async def request_ingestion(correlation_id: str, orthanc_study_id: str, source: str) -> None:
+    """
+    Hand a study to the pipeline workers (INGESTION_MODE=kafka): publish a request to
+    KAFKA_INGESTION_TOPIC keyed by Orthanc study ID. Returns once the broker acknowledged it.
+    """
+    await publish_ingestion_request(
+        IngestionRequestEvent(
+            correlation_id=correlation_id,
+            orthanc_study_id=orthanc_study_id,
+            source=source,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+        )
+    )
+    INGESTION_REQUESTS_PUBLISHED.labels(source=source).inc()
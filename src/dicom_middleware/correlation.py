@@ -1,20 +1,87 @@
 """Correlation ID middleware and context."""
 
+import time
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from dicom_middleware.observability.logging import correlation_id_ctx
+from dicom_middleware.observability.metrics import REQUEST_COUNT, REQUEST_LATENCY
 
 CORRELATION_ID_HEADER = "X-Correlation-ID"
+_HEADER_KEY = CORRELATION_ID_HEADER.lower().encode("latin-1")
+
+# Requests that matched no route share one label value, so unknown paths cannot grow label cardinality.
+_UNMATCHED_ROUTE = "unmatched"
+
 
+class CorrelationIdMiddleware:
+    """
+    Pure ASGI middleware: generate or propagate the correlation ID, set it in context for the request,
+    add it to the response headers, and record request count / latency by route template.
+    Unlike BaseHTTPMiddleware it adds no extra task or response stream per request.
+    """
 
-class CorrelationIdMiddleware(BaseHTTPMiddleware):
-    """Generate or propagate correlation ID and set in context for the request."""
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-    async def dispatch(self, request: Request, call_next):
-        correlation_id = request.headers.get(CORRELATION_ID_HEADER) or str(uuid.uuid4())
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = _request_correlation_id(scope) or str(uuid.uuid4())
         correlation_id_ctx.set(correlation_id)
-        response = await call_next(request)
-        response.headers[CORRELATION_ID_HEADER] = correlation_id
-        return response
+        header = (_HEADER_KEY, correlation_id.encode("latin-1"))
+        status_code = 500
+
+        async def send_with_correlation_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [(k, v) for k, v in message.get("headers", ()) if k.lower() != _HEADER_KEY]
+                message["headers"] = [*headers, header]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_correlation_id)
+        finally:
+            endpoint = _route_template(scope)
+            REQUEST_COUNT.labels(method=scope["method"], endpoint=endpoint, status=str(status_code)).inc()
+            REQUEST_LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    Route path with parameter names, e.g. /api/v1/ingestion/jobs/{correlation_id}: the mount prefix
+    (root_path beyond app_root_path), the include_router prefix, then the matched route's path_format.
+    Depending on the FastAPI version the route's own path may lack the include_router prefix; the
+    prefix is then the part of the request path before the suffix the route's pattern matches.
+    Parameter values never appear, however many segments they span.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return _UNMATCHED_ROUTE
+    root_path = scope.get("root_path", "")
+    app_root_path = scope.get("app_root_path", "")
+    mount_prefix = root_path[len(app_root_path) :] if root_path.startswith(app_root_path) else ""
+    path = scope["path"]
+    route_path = path[len(root_path) :] if root_path and path.startswith(root_path) else path
+    return mount_prefix + _include_prefix(route, route_path) + path_format
+
+
+def _include_prefix(route, route_path: str) -> str:
+    # Leftmost split: the prefix is literal, and the route pattern is anchored at both ends.
+    for i, char in enumerate(route_path):
+        if char == "/" and route.path_regex.match(route_path[i:]):
+            return route_path[:i]
+    return ""
+
+
+def _request_correlation_id(scope: Scope) -> str | None:
+    for key, value in scope["headers"]:
+        if key == _HEADER_KEY:
+            return value.decode("latin-1") or None
+    return None
@@ -0,0 +1,39 @@
+"""PostgreSQL advisory locks for cross-replica coordination."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+
+from dicom_middleware.db.session import get_engine
+
+_TRY_LOCK = text("SELECT pg_try_advisory_lock(hashtextextended(:key, 0))")
+_LOCK = text("SELECT pg_advisory_lock(hashtextextended(:key, 0))")
+_UNLOCK = text("SELECT pg_advisory_unlock(hashtextextended(:key, 0))")
+
+
+@asynccontextmanager
+async def advisory_lock(key: str, timeout_seconds: float) -> AsyncIterator[bool]:
+    """
+    Hold a session-level advisory lock for `key` on a dedicated connection (not the caller's
+    session, whose transactions commit independently). Yields True if the lock was free, False if
+    another holder had to finish first. Raises if the lock is not obtained within `timeout_seconds`.
+    The lock outlives the acquiring transaction, which is committed at once: the connection stays
+    checked out while the body runs, but idle rather than idle in transaction.
+    """
+    async with get_engine().connect() as conn:
+        acquired = (await conn.execute(_TRY_LOCK, {"key": key})).scalar()
+        if not acquired:
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{int(timeout_seconds * 1000)}ms'"))
+            await conn.execute(_LOCK, {"key": key})
+        await conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            try:
+                await conn.execute(_UNLOCK, {"key": key})
+                await conn.commit()
+            except Exception:
+                # Never return a connection that may still hold the lock to the pool.
+                await conn.invalidate()
+                raise
@@ -3,10 +3,10 @@
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import DateTime, String, Text, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 
 class Base(DeclarativeBase):
@@ -25,4 +25,41 @@ class StudyRecord(Base):
     patient_id: Mapped[str | None] = mapped_column(String(256), nullable=True)
     modality: Mapped[str | None] = mapped_column(String(64), nullable=True)
     study_date: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # Hash of the ingested DICOM ("sha256:..." or Orthanc's "md5:..."); set once storage and publish succeeded.
+    content_fingerprint: Mapped[str | None] = mapped_column(String(80), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class PollerCursorRecord(Base):
+    """Last processed position of a change feed (e.g. the Orthanc /changes sequence number)."""
+
+    __tablename__ = "poller_cursors"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class OutboxRecord(Base):
+    """Kafka message written in the same transaction as the study upsert; published by the outbox relay."""
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # The relay only scans unsent rows, in insertion order.
+        Index("ix_outbox_unsent", "id", postgresql_where=text("sent_at IS NULL")),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    topic: Mapped[str] = mapped_column(String(256), nullable=False)
+    message_key: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    headers: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
+    correlation_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Failed publishes; at OUTBOX_RELAY_MAX_ATTEMPTS the row is parked and the relay skips it.
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    parked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,25 +1,78 @@
 """Async database engine and session."""
 
+import time
 from collections.abc import AsyncGenerator
+from sqlalchemy import exc as sa_exc, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from dicom_middleware.config import get_settings
 from dicom_middleware.db.models import Base
+from dicom_middleware.observability.metrics import (
+    DB_POOL_CAPACITY,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_DURATION_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_SATURATION,
+)
 
 _engine = None
 _session_factory = None
 
 
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout duration and timeouts."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except sa_exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_DURATION_SECONDS.observe(time.perf_counter() - start)
+
+
+def _checked_out() -> int:
+    if _engine is None or not isinstance(_engine.pool, AsyncAdaptedQueuePool):
+        return 0
+    return _engine.pool.checkedout()
+
+
+def _saturation() -> float:
+    if _engine is None or not isinstance(_engine.pool, AsyncAdaptedQueuePool):
+        return 0.0
+    settings = get_settings()
+    return _checked_out() / (settings.db_pool_size + settings.db_pool_max_overflow)
+
+
+DB_POOL_CHECKED_OUT.set_function(_checked_out)
+DB_POOL_SATURATION.set_function(_saturation)
+
+
 def get_engine():
     global _engine
     if _engine is None:
         settings = get_settings()
-        _engine = create_async_engine(
-            settings.database_url,
-            poolclass=NullPool,
-            echo=False,
-        )
+        if settings.db_pool_enabled:
+            _engine = create_async_engine(
+                settings.database_url,
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_pool_max_overflow,
+                pool_pre_ping=settings.db_pool_pre_ping,
+                pool_recycle=settings.db_pool_recycle_seconds,
+                pool_timeout=settings.db_pool_timeout_seconds,
+                echo=False,
+            )
+            DB_POOL_CAPACITY.set(settings.db_pool_size + settings.db_pool_max_overflow)
+        else:
+            _engine = create_async_engine(
+                settings.database_url,
+                poolclass=NullPool,
+                echo=False,
+            )
     return _engine
 
 
@@ -35,11 +88,31 @@ def get_session_factory():
     return _session_factory
 
 
+# create_all never alters an existing table: columns added after a table shipped are added here (idempotent).
+_ADDED_COLUMNS = (
+    "ALTER TABLE studies ADD COLUMN IF NOT EXISTS content_fingerprint VARCHAR(80)",
+    "ALTER TABLE outbox ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE outbox ADD COLUMN IF NOT EXISTS last_error TEXT",
+    "ALTER TABLE outbox ADD COLUMN IF NOT EXISTS parked_at TIMESTAMP WITH TIME ZONE",
+)
+
+
 async def init_db() -> None:
-    """Create tables if they do not exist."""
+    """Create tables if they do not exist and add columns missing from tables created by older versions."""
     engine = get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in _ADDED_COLUMNS:
+            await conn.execute(text(statement))
+
+
+async def close_engine() -> None:
+    """Dispose the engine and close pooled connections (app shutdown)."""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,55 @@
+"""
+DLQ replay CLI: re-run dead-lettered studies after an outage.
+
+    python -m dicom_middleware.dlq_replay --reason "Storage write failure" --since 2025-02-19T10:00:00Z
+
+Progress is checkpointed in the DLQ_REPLAY_GROUP_ID consumer group; rerunning the same command
+resumes after the last committed batch. Prints the final report as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime
+
+from dicom_middleware.application.dlq_replay import ReplayFilter, replay_dlq
+from dicom_middleware.worker import close_pipeline_resources, open_pipeline_resources
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay studies from the dead letter queue.")
+    parser.add_argument(
+        "--reason", action="append", default=[], help="Only replay this error_reason (repeatable; default: all)"
+    )
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only messages dead-lettered at/after (ISO 8601)")
+    parser.add_argument(
+        "--until", type=datetime.fromisoformat, help="Stop at messages dead-lettered at/after (default: now)"
+    )
+    parser.add_argument("--concurrency", type=int, help="Pipelines in flight (default: DLQ_REPLAY_CONCURRENCY)")
+    parser.add_argument("--rate", type=float, help="Pipelines started per second (default: DLQ_REPLAY_RATE_PER_SECOND)")
+    parser.add_argument("--max-messages", type=int, help="Stop after scanning this many messages")
+    parser.add_argument("--group-id", help="Checkpoint consumer group (default: DLQ_REPLAY_GROUP_ID)")
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    await open_pipeline_resources()
+    try:
+        report = await replay_dlq(
+            ReplayFilter(reasons=frozenset(args.reason), since=args.since, until=args.until),
+            concurrency=args.concurrency,
+            rate=args.rate,
+            max_messages=args.max_messages,
+            group_id=args.group_id,
+        )
+    finally:
+        await close_pipeline_resources()
+    return report.to_dict()
+
+
+def main(argv: list[str] | None = None) -> None:
+    print(json.dumps(asyncio.run(_run(_parse_args(argv))), indent=2))
+
+
+if __name__ == "__main__":
+    main()
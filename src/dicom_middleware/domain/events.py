@@ -14,13 +14,30 @@ class DicomMetadataEvent(BaseModel):
     patient_id: str | None = Field(default=None, description="Patient ID")
     modality: str | None = Field(default=None, description="Modality")
     study_date: str | None = Field(default=None, description="Study Date")
-    storage_path: str = Field(description="Path or URI to raw DICOM (e.g. file:///data/dicom/studies/...)")
+    storage_path: str = Field(
+        description="Path or URI to raw DICOM (e.g. file:///data/dicom/studies/...); a prefix in full-study mode"
+    )
+    instance_count: int | None = Field(
+        default=None, description="Instances stored under storage_path (full-study mode only)"
+    )
     timestamp: str = Field(description="ISO 8601 timestamp when event was created")
 
     def to_json_bytes(self) -> bytes:
         return self.model_dump_json().encode("utf-8")
 
 
+class IngestionRequestEvent(BaseModel):
+    """Request to ingest one study, published to the internal ingestion topic (INGESTION_MODE=kafka)."""
+
+    correlation_id: str = Field(description="Request correlation ID for tracing")
+    orthanc_study_id: str = Field(description="Orthanc study ID (internal identifier)")
+    source: str = Field(description="Who requested the ingestion (api or poller)")
+    timestamp: str = Field(description="ISO 8601 timestamp when the request was created")
+
+    def to_json_bytes(self) -> bytes:
+        return self.model_dump_json().encode("utf-8")
+
+
 class DLQPayload(BaseModel):
     """Payload sent to dicom.metadata.dlq on failure."""
 
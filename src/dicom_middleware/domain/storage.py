@@ -1,7 +1,12 @@
-"""Abstract storage interface for raw DICOM. Implementations: LocalStorageBackend (GCS later)."""
+"""Abstract storage interface for raw DICOM. Implementations: LocalStorageBackend, GCSStorageBackend."""
 
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Protocol
 
+# Returns the source's MD5 (hex) of a streamed object, e.g. Orthanc's, or None if unknown. Only called by
+# backends that can compare it with what they already store, so a local backend costs no extra request.
+SourceMD5 = Callable[[], Awaitable[str | None]]
+
 
 class StorageBackend(Protocol):
     """Store DICOM bytes under Study Instance UID; return path/URI for the event."""
@@ -9,3 +14,34 @@ class StorageBackend(Protocol):
     def save(self, study_instance_uid: str, data: bytes) -> str:
         """Write DICOM bytes and return a stable path or URI (e.g. file://... or gs://...)."""
         ...
+
+
+class AsyncStorageBackend(StorageBackend, Protocol):
+    """Storage backend usable from the event loop without blocking it."""
+
+    async def save_async(self, study_instance_uid: str, data: bytes) -> str:
+        """Same contract as save(), but blocking I/O runs off the event loop."""
+        ...
+
+    async def save_stream_async(
+        self, study_instance_uid: str, chunks: AsyncIterator[bytes], source_md5: SourceMD5 | None = None
+    ) -> str:
+        """
+        Write DICOM streamed as chunks without holding the whole object in memory; return path/URI.
+        With STORAGE_DEDUP_ENABLED identical content already stored is not replaced.
+        """
+        ...
+
+    async def save_instance_stream_async(
+        self,
+        study_instance_uid: str,
+        sop_instance_uid: str,
+        chunks: AsyncIterator[bytes],
+        source_md5: SourceMD5 | None = None,
+    ) -> str:
+        """Stream one instance of a study to {prefix}/{SOPInstanceUID}.dcm (full-study mode); return path/URI."""
+        ...
+
+    def study_prefix(self, study_instance_uid: str) -> str:
+        """Path/URI prefix under which save_instance_stream_async stores a study's instances."""
+        ...
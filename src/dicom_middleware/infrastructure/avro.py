@@ -0,0 +1,248 @@
+"""
+Avro binary encoding (spec 1.11) for the flat record schemas of our events, plus a file-based schema registry.
+
+Supported types: null, boolean, int, long, float, double, string, bytes, records, unions, and the
+timestamp-millis / timestamp-micros logical types (as timezone-aware datetimes). Schemas are compiled
+once into reader/writer closures. Messages use the Confluent wire format (magic byte 0, 4-byte
+big-endian schema ID, Avro body), so standard Avro consumers can read them with the registered schema.
+"""
+
+import json
+import struct
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+MAGIC_BYTE = 0
+_HEADER = struct.Struct(">bI")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_TIMESTAMP_UNITS = {"timestamp-millis": 1_000, "timestamp-micros": 1_000_000}
+
+Writer = Callable[[Any, bytearray], None]
+Reader = Callable[[memoryview, int], tuple[Any, int]]
+
+
+def _write_long(n: int, out: bytearray) -> None:
+    if 0 <= n < 64:  # union indexes and most lengths: one byte
+        out.append(n << 1)
+        return
+    n = (n << 1) ^ (n >> 63)
+    while n & ~0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_long(buf: memoryview, pos: int) -> tuple[int, int]:
+    b = buf[pos]
+    if not b & 0x80:
+        return (b >> 1) ^ -(b & 1), pos + 1
+    shift = n = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return (n >> 1) ^ -(n & 1), pos
+        shift += 7
+
+
+def _write_bytes(value: bytes, out: bytearray) -> None:
+    _write_long(len(value), out)
+    out += value
+
+
+def _read_bytes(buf: memoryview, pos: int) -> tuple[bytes, int]:
+    size, pos = _read_long(buf, pos)
+    return bytes(buf[pos : pos + size]), pos + size
+
+
+def _write_string(value: str, out: bytearray) -> None:
+    _write_bytes(value.encode("utf-8"), out)
+
+
+def _read_string(buf: memoryview, pos: int) -> tuple[str, int]:
+    size, pos = _read_long(buf, pos)
+    return str(buf[pos : pos + size], "utf-8"), pos + size
+
+
+def _fixed(fmt: str) -> tuple[Writer, Reader]:
+    packer = struct.Struct(fmt)
+
+    def write(value: float, out: bytearray) -> None:
+        out += packer.pack(value)
+
+    def read(buf: memoryview, pos: int) -> tuple[float, int]:
+        return packer.unpack_from(buf, pos)[0], pos + packer.size
+
+    return write, read
+
+
+def _write_null(value: None, out: bytearray) -> None:
+    return None
+
+
+def _read_null(buf: memoryview, pos: int) -> tuple[None, int]:
+    return None, pos
+
+
+def _write_boolean(value: bool, out: bytearray) -> None:
+    out.append(1 if value else 0)
+
+
+def _read_boolean(buf: memoryview, pos: int) -> tuple[bool, int]:
+    return buf[pos] == 1, pos + 1
+
+
+_PRIMITIVES: dict[str, tuple[Writer, Reader, tuple[type, ...]]] = {
+    "null": (_write_null, _read_null, (type(None),)),
+    "boolean": (_write_boolean, _read_boolean, (bool,)),
+    "int": (_write_long, _read_long, (int,)),
+    "long": (_write_long, _read_long, (int,)),
+    "float": (*_fixed("<f"), (float, int)),
+    "double": (*_fixed("<d"), (float, int)),
+    "string": (_write_string, _read_string, (str,)),
+    "bytes": (_write_bytes, _read_bytes, (bytes, bytearray)),
+}
+
+
+def _timestamp(unit: int) -> tuple[Writer, Reader, tuple[type, ...]]:
+    def write(value: datetime, out: bytearray) -> None:
+        delta = value - _EPOCH
+        _write_long((delta.days * 86_400 + delta.seconds) * unit + delta.microseconds * unit // 1_000_000, out)
+
+    def read(buf: memoryview, pos: int) -> tuple[datetime, int]:
+        n, pos = _read_long(buf, pos)
+        return _EPOCH + timedelta(microseconds=n * 1_000_000 // unit), pos
+
+    return write, read, (datetime,)
+
+
+def _compile(schema: Any) -> tuple[Writer, Reader, tuple[type, ...]]:
+    """(writer, reader, Python types accepted) for one schema node. Raises ValueError if unsupported."""
+    if isinstance(schema, str):
+        if schema not in _PRIMITIVES:
+            raise ValueError(f"Unsupported Avro type {schema!r}")
+        return _PRIMITIVES[schema]
+    if isinstance(schema, list):
+        return _compile_union(schema)
+    if isinstance(schema, dict):
+        if schema.get("logicalType") in _TIMESTAMP_UNITS and schema.get("type") == "long":
+            return _timestamp(_TIMESTAMP_UNITS[schema["logicalType"]])
+        if schema.get("type") == "record":
+            return _compile_record(schema)
+        return _compile(schema.get("type"))
+    raise ValueError(f"Unsupported Avro schema {schema!r}")
+
+
+def _compile_union(branches: list) -> tuple[Writer, Reader, tuple[type, ...]]:
+    compiled = [_compile(branch) for branch in branches]
+
+    def write(value: Any, out: bytearray) -> None:
+        for index, (branch_write, _, types) in enumerate(compiled):
+            # bool is an int subclass; only a boolean branch takes it.
+            if isinstance(value, types) and not (isinstance(value, bool) and bool not in types):
+                _write_long(index, out)
+                branch_write(value, out)
+                return
+        raise ValueError(f"{value!r} matches no branch of union {branches}")
+
+    def read(buf: memoryview, pos: int) -> tuple[Any, int]:
+        index, pos = _read_long(buf, pos)
+        return compiled[index][1](buf, pos)
+
+    return write, read, tuple(t for _, _, types in compiled for t in types)
+
+
+def _compile_record(schema: dict) -> tuple[Writer, Reader, tuple[type, ...]]:
+    fields = [(f["name"], *_compile(f["type"])[:2]) for f in schema["fields"]]
+
+    def write(value: dict, out: bytearray) -> None:
+        for name, field_write, _ in fields:
+            field_write(value.get(name), out)
+
+    def read(buf: memoryview, pos: int) -> tuple[dict, int]:
+        record = {}
+        for name, _, field_read in fields:
+            record[name], pos = field_read(buf, pos)
+        return record, pos
+
+    return write, read, (dict,)
+
+
+@dataclass
+class RegisteredSchema:
+    """One schema version in the registry, compiled for encoding and decoding."""
+
+    id: int
+    subject: str
+    version: int
+    schema: dict
+    _writer: Writer = field(init=False, repr=False)
+    _reader: Reader = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._writer, self._reader, _ = _compile(self.schema)
+
+    def encode(self, record: dict) -> bytes:
+        """Confluent-framed Avro message for `record` (a dict keyed by field name)."""
+        out = bytearray(_HEADER.pack(MAGIC_BYTE, self.id))
+        self._writer(record, out)
+        return bytes(out)
+
+    def decode_body(self, buf: memoryview) -> dict:
+        record, _ = self._reader(buf, _HEADER.size)
+        return record
+
+
+class FileSchemaRegistry:
+    """
+    Schemas kept next to the code instead of in a registry service: `registry.json` lists
+    {"id", "subject", "version", "path"} entries and each path is an .avsc file relative to it.
+    IDs are global and never reused, so consumers can decode any message ever produced.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        manifest = json.loads((directory / "registry.json").read_text())
+        self._by_id: dict[int, RegisteredSchema] = {}
+        self._latest: dict[str, RegisteredSchema] = {}
+        for entry in manifest["schemas"]:
+            schema = RegisteredSchema(
+                id=entry["id"],
+                subject=entry["subject"],
+                version=entry["version"],
+                schema=json.loads((directory / entry["path"]).read_text()),
+            )
+            if schema.id in self._by_id:
+                raise ValueError(f"Duplicate schema id {schema.id} in {directory / 'registry.json'}")
+            self._by_id[schema.id] = schema
+            latest = self._latest.get(schema.subject)
+            if latest is None or schema.version > latest.version:
+                self._latest[schema.subject] = schema
+
+    def latest(self, subject: str) -> RegisteredSchema:
+        try:
+            return self._latest[subject]
+        except KeyError:
+            raise ValueError(f"No schema registered for subject {subject!r}") from None
+
+    def by_id(self, schema_id: int) -> RegisteredSchema:
+        try:
+            return self._by_id[schema_id]
+        except KeyError:
+            raise ValueError(f"Unknown schema id {schema_id}") from None
+
+    def decode(self, message: bytes) -> tuple[RegisteredSchema, dict]:
+        """Decode a Confluent-framed message with the writer schema named by its embedded ID."""
+        if len(message) < _HEADER.size:
+            raise ValueError("Message too short for the Avro wire format")
+        magic, schema_id = _HEADER.unpack_from(message)
+        if magic != MAGIC_BYTE:
+            raise ValueError(f"Unknown magic byte {magic}")
+        schema = self.by_id(schema_id)
+        try:
+            return schema, schema.decode_body(memoryview(message))
+        except (IndexError, UnicodeDecodeError, struct.error) as e:
+            raise ValueError(f"Malformed Avro message for schema id {schema_id}: {e}") from e
@@ -0,0 +1,226 @@
+"""Circuit breakers per downstream dependency: fail fast while a dependency is down instead of waiting out timeouts."""
+
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Literal
+
+import httpx
+from aiokafka.errors import KafkaError
+from sqlalchemy import exc as sa_exc
+
+from dicom_middleware.config import get_settings
+from dicom_middleware.observability.logging import get_logger
+from dicom_middleware.observability.metrics import (
+    CIRCUIT_BREAKER_REJECTED,
+    CIRCUIT_BREAKER_STATE,
+    CIRCUIT_BREAKER_TRANSITIONS,
+)
+
+_log = get_logger(__name__)
+
+ORTHANC = "orthanc"
+POSTGRES = "postgres"
+STORAGE = "storage"
+KAFKA = "kafka"
+DEPENDENCIES = (ORTHANC, POSTGRES, STORAGE, KAFKA)
+
+BreakerState = Literal["closed", "open", "half_open"]
+_STATE_VALUES: dict[BreakerState, int] = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open; `retry_after` is seconds until a probe."""
+
+    def __init__(self, dependency: str, retry_after: float) -> None:
+        super().__init__(f"{dependency} unavailable (circuit open, retry in {retry_after:.1f}s)")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+def circuit_open_cause(error: BaseException) -> CircuitOpenError | None:
+    """The CircuitOpenError `error` is, or was raised from (e.g. a dead-lettered fast-fail); None otherwise."""
+    while error is not None:
+        if isinstance(error, CircuitOpenError):
+            return error
+        error = error.__cause__
+    return None
+
+
+def _orthanc_failure(e: BaseException) -> bool:
+    # 4xx (unknown study, bad request) means Orthanc answered; only transport errors and 5xx count.
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+def _postgres_failure(e: BaseException) -> bool:
+    return isinstance(e, (sa_exc.OperationalError, sa_exc.InterfaceError, sa_exc.TimeoutError, OSError, TimeoutError))
+
+
+def _storage_failure(e: BaseException) -> bool:
+    # Streamed bodies come from Orthanc: their errors belong to Orthanc, not to storage.
+    return not isinstance(e, httpx.HTTPError)
+
+
+def _kafka_failure(e: BaseException) -> bool:
+    return isinstance(e, (KafkaError, OSError, TimeoutError))
+
+
+_FAILURE_PREDICATES: dict[str, Callable[[BaseException], bool]] = {
+    ORTHANC: _orthanc_failure,
+    POSTGRES: _postgres_failure,
+    STORAGE: _storage_failure,
+    KAFKA: _kafka_failure,
+}
+
+
+class CircuitBreaker:
+    """
+    Closed: calls pass and outcomes go into a window of the last `window_size` calls; once it holds
+    `min_calls` and the failure rate reaches `failure_rate`, the breaker opens. Open: calls fail fast
+    with CircuitOpenError for `open_seconds`. Half-open: up to `half_open_max_calls` probes pass; that
+    many successes close the breaker, any failure reopens it. Exceptions that `is_failure` rejects
+    (the dependency answered, e.g. 404) count as successes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int,
+        min_calls: int,
+        failure_rate: float,
+        open_seconds: float,
+        half_open_max_calls: int,
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.min_calls = min(min_calls, window_size)
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.enabled = enabled
+        self._is_failure = is_failure
+        self._clock = clock
+        self._window: deque[bool] = deque(maxlen=window_size)
+        self._state: BreakerState = "closed"
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        CIRCUIT_BREAKER_STATE.labels(dependency=name).set(_STATE_VALUES["closed"])
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state == "open" and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition("half_open")
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through (0 unless open)."""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run the body as one call to the dependency. Raises CircuitOpenError without running it if open."""
+        if not self.enabled:
+            yield
+            return
+        self._before_call()
+        try:
+            yield
+        except CircuitOpenError:
+            # Another breaker failed fast inside this call; says nothing about this dependency.
+            self._release_probe()
+            raise
+        except Exception as e:
+            if self._is_failure(e):
+                self._on_failure(e)
+            else:
+                self._on_success()
+            raise
+        except BaseException:
+            self._release_probe()  # cancelled
+            raise
+        self._on_success()
+
+    def _before_call(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half_open" and self._probes_in_flight >= self.half_open_max_calls):
+            CIRCUIT_BREAKER_REJECTED.labels(dependency=self.name).inc()
+            raise CircuitOpenError(self.name, self.retry_after())
+        if state == "half_open":
+            self._probes_in_flight += 1
+
+    def _release_probe(self) -> None:
+        if self._state == "half_open" and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def _on_success(self) -> None:
+        if self._state == "half_open":
+            self._release_probe()
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition("closed")
+            return
+        if self._state == "closed":
+            self._window.append(False)
+
+    def _on_failure(self, error: BaseException) -> None:
+        if self._state == "half_open":
+            self._transition("open", error)
+            return
+        if self._state == "open":
+            return  # a call admitted before the breaker opened
+        self._window.append(True)
+        if len(self._window) >= self.min_calls and sum(self._window) / len(self._window) >= self.failure_rate:
+            self._transition("open", error)
+
+    def _transition(self, state: BreakerState, error: BaseException | None = None) -> None:
+        previous = self._state
+        self._state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == "open":
+            self._opened_at = self._clock()
+        if state == "closed":
+            self._window.clear()
+        CIRCUIT_BREAKER_STATE.labels(dependency=self.name).set(_STATE_VALUES[state])
+        CIRCUIT_BREAKER_TRANSITIONS.labels(dependency=self.name, state=state).inc()
+        log = _log.warning if state == "open" else _log.info
+        log("circuit_breaker_transition", dependency=self.name, previous=previous, state=state, error=str(error or ""))
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(dependency: str) -> CircuitBreaker:
+    """Process-wide breaker for `dependency` (one of DEPENDENCIES), configured from CIRCUIT_BREAKER_* settings."""
+    breaker = _breakers.get(dependency)
+    if breaker is None:
+        s = get_settings()
+        breaker = CircuitBreaker(
+            dependency,
+            window_size=s.circuit_breaker_window_size,
+            min_calls=s.circuit_breaker_min_calls,
+            failure_rate=s.circuit_breaker_failure_rate,
+            open_seconds=s.circuit_breaker_open_seconds,
+            half_open_max_calls=s.circuit_breaker_half_open_max_calls,
+            is_failure=_FAILURE_PREDICATES[dependency],
+            enabled=s.circuit_breaker_enabled,
+        )
+        _breakers[dependency] = breaker
+    return breaker
+
+
+def guard(dependency: str):
+    """Shorthand for `get_circuit_breaker(dependency).guard()`."""
+    return get_circuit_breaker(dependency).guard()
+
+
+def circuit_breaker_states() -> dict[str, BreakerState]:
+    return {dependency: get_circuit_breaker(dependency).state for dependency in DEPENDENCIES}
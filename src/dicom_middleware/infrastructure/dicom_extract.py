@@ -1,21 +1,55 @@
 """Extract DICOM metadata (strict scope: StudyInstanceUID, PatientID, Modality, StudyDate)."""
 
 import io
-from pydicom import dcmread
 from pydicom.errors import InvalidDicomError
+from pydicom.filereader import read_partial
+from pydicom.tag import BaseTag
 
 from dicom_middleware.domain.entities import StudyMetadata
 
+# StudyDate, Modality, PatientID, StudyInstanceUID. Elements are stored in tag order, so the
+# header is complete for our purposes once an element after StudyInstanceUID is reached.
+_METADATA_TAGS = [BaseTag(0x00080020), BaseTag(0x00080060), BaseTag(0x00100020), BaseTag(0x0020000D)]
+_LAST_METADATA_TAG = max(_METADATA_TAGS)
 
-def extract_metadata(dicom_bytes: bytes) -> StudyMetadata:
+
+class TruncatedHeaderError(ValueError):
+    """The byte prefix ends before all metadata elements were read; fetch more bytes and retry."""
+
+
+def extract_metadata(dicom_bytes: bytes, *, truncated: bool = False) -> StudyMetadata:
     """
     Parse DICOM and extract only the four required fields.
+    Parsing stops at the first element after StudyInstanceUID, so pixel data is never read or copied.
+    `dicom_bytes` may be a prefix of the file when `truncated=True`; TruncatedHeaderError is raised
+    if the prefix ends before the metadata elements are complete.
     Raises ValueError on parse error or missing required StudyInstanceUID.
     """
+    reached_end_of_header = False
+
+    def _stop_after_metadata(tag: BaseTag, vr: str | None, length: int) -> bool:
+        nonlocal reached_end_of_header
+        if tag > _LAST_METADATA_TAG:
+            reached_end_of_header = True
+        return reached_end_of_header
+
     try:
-        ds = dcmread(io.BytesIO(dicom_bytes), force=True)
+        ds = read_partial(
+            io.BytesIO(dicom_bytes),
+            stop_when=_stop_after_metadata,
+            force=True,
+            specific_tags=_METADATA_TAGS,
+        )
     except InvalidDicomError as e:
         raise ValueError(f"Invalid DICOM: {e}") from e
+    except (EOFError, OSError, ValueError) as e:
+        if truncated:
+            raise TruncatedHeaderError(f"DICOM header prefix too short ({len(dicom_bytes)} bytes)") from e
+        raise ValueError(f"Invalid DICOM: {e}") from e
+
+    # Without reaching a later element we cannot tell whether the last value was cut off.
+    if truncated and not reached_end_of_header:
+        raise TruncatedHeaderError(f"DICOM header prefix too short ({len(dicom_bytes)} bytes)")
 
     study_instance_uid = getattr(ds, "StudyInstanceUID", None)
     if not study_instance_uid:
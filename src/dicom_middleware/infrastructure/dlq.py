@@ -5,6 +5,7 @@ from aiokafka.errors import KafkaError
 
 from dicom_middleware.config import get_settings
 from dicom_middleware.domain.events import DLQPayload
+from dicom_middleware.infrastructure.kafka_producer import producer_config, send_timed
 from dicom_middleware.observability.logging import get_logger
 from dicom_middleware.observability.metrics import DLQ_MESSAGES
 
@@ -17,11 +18,7 @@ async def get_dlq_producer() -> AIOKafkaProducer:
     global _dlq_producer
     if _dlq_producer is None:
         settings = get_settings()
-        _dlq_producer = AIOKafkaProducer(
-            bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
-            enable_idempotence=True,
-            acks="all",
-        )
+        _dlq_producer = AIOKafkaProducer(**producer_config(settings))
         await _dlq_producer.start()
     return _dlq_producer
 
@@ -34,13 +31,16 @@ async def close_dlq_producer() -> None:
 
 
 async def send_to_dlq(payload: DLQPayload, reason: str) -> None:
-    """Publish payload to dicom.metadata.dlq and record metric."""
+    """Publish payload to dicom.metadata.dlq and record metric (keyed by Orthanc study ID in batched mode)."""
     try:
         producer = await get_dlq_producer()
         settings = get_settings()
-        await producer.send_and_wait(
+        study_key = payload.original_payload.get("orthanc_study_id")
+        await send_timed(
+            producer,
             settings.kafka_dlq_topic,
             value=payload.to_json_bytes(),
+            key=str(study_key).encode("utf-8") if study_key else None,
         )
         DLQ_MESSAGES.labels(reason=payload.error_reason).inc()
         _log.info("dlq_sent", reason=payload.error_reason, correlation_id=payload.correlation_id)
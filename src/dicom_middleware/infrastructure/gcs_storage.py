@@ -1,25 +1,49 @@
 """Google Cloud Storage backend for raw DICOM. Object path: gs://{bucket}/studies/{StudyInstanceUID}.dcm"""
 
+import base64
+import hashlib
 import time
+from collections.abc import AsyncIterator
 from typing import TYPE_CHECKING
 
 from dicom_middleware.config import get_settings
+from dicom_middleware.domain.storage import SourceMD5
+from dicom_middleware.infrastructure.storage_executor import get_storage_executor
 from dicom_middleware.observability.logging import get_logger
 from dicom_middleware.observability.metrics import (
+    STORAGE_BYTES_DEDUPLICATED,
+    STORAGE_BYTES_WRITTEN,
     STORAGE_UPLOAD_DURATION_SECONDS,
     STORAGE_UPLOAD_TOTAL,
 )
 
 if TYPE_CHECKING:
-    from google.cloud.storage import Client
+    from google.cloud.storage import Blob, Client
     from google.cloud.storage.bucket import Bucket
 
 _log = get_logger(__name__)
 
 
+def _same_content(existing: "Blob", data: bytes) -> bool:
+    """
+    Compare `data` with an existing object's checksums from its metadata (no download).
+    Uses MD5 when GCS has one (not for composite objects), otherwise CRC32C.
+    """
+    if existing.size != len(data):
+        return False
+    if existing.md5_hash:
+        return existing.md5_hash == base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+    if existing.crc32c:
+        import google_crc32c
+
+        crc = google_crc32c.value(data).to_bytes(4, "big")
+        return existing.crc32c == base64.b64encode(crc).decode("ascii")
+    return False
+
+
 class GCSStorageBackend:
     """
-    Store raw DICOM in GCS; implements StorageBackend protocol.
+    Store raw DICOM in GCS; implements AsyncStorageBackend protocol.
     Uses GOOGLE_APPLICATION_CREDENTIALS for auth. Client is created in __init__ and reused.
     """
 
@@ -37,6 +61,7 @@ class GCSStorageBackend:
     def save(self, study_instance_uid: str, data: bytes) -> str:
         """
         Upload DICOM bytes to gs://{bucket}/studies/{safe_uid}.dcm.
+        With STORAGE_DEDUP_ENABLED the upload is skipped when the existing object's MD5/CRC32C matches.
         Returns the gs:// URI. Raises on GCS errors (pipeline will send to DLQ).
         """
         settings = get_settings()
@@ -45,11 +70,19 @@ class GCSStorageBackend:
             raise ValueError("GCS_BUCKET is required when using GCS storage backend")
         timeout = settings.gcs_upload_timeout_seconds
         start = time.perf_counter()
-        safe_uid = study_instance_uid.replace("/", "_").replace("\\", "_")
-        blob_name = f"studies/{safe_uid}.dcm"
+        blob_name = f"studies/{_safe_name(study_instance_uid)}.dcm"
         try:
             client = self._get_client()
             bucket: Bucket = client.bucket(bucket_name)
+            uri = f"gs://{bucket_name}/{blob_name}"
+            if settings.storage_dedup_enabled:
+                existing = bucket.get_blob(blob_name, timeout=timeout)
+                if existing is not None and _same_content(existing, data):
+                    STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="gcs").observe(time.perf_counter() - start)
+                    STORAGE_UPLOAD_TOTAL.labels(backend="gcs", status="deduplicated").inc()
+                    STORAGE_BYTES_DEDUPLICATED.labels(backend="gcs").inc(len(data))
+                    _log.info("gcs_upload_deduplicated", study_instance_uid=study_instance_uid, gcs_uri=uri)
+                    return uri
             blob = bucket.blob(blob_name)
             blob.metadata = {"study_instance_uid": study_instance_uid}
             blob.upload_from_string(
@@ -57,11 +90,11 @@ class GCSStorageBackend:
                 content_type="application/dicom",
                 timeout=timeout,
             )
-            uri = f"gs://{bucket_name}/{blob_name}"
             STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="gcs").observe(
                 time.perf_counter() - start
             )
             STORAGE_UPLOAD_TOTAL.labels(backend="gcs", status="success").inc()
+            STORAGE_BYTES_WRITTEN.labels(backend="gcs").inc(len(data))
             _log.info(
                 "gcs_upload_success",
                 study_instance_uid=study_instance_uid,
@@ -82,3 +115,116 @@ class GCSStorageBackend:
             )
             # Do not expose GCS/credential details to pipeline or logs
             raise RuntimeError("GCS upload failed") from e
+
+    async def save_async(self, study_instance_uid: str, data: bytes) -> str:
+        """save() on the bounded storage executor; the blocking upload does not stall the event loop."""
+        return await get_storage_executor().run(self.save, study_instance_uid, data)
+
+    async def save_stream_async(
+        self, study_instance_uid: str, chunks: AsyncIterator[bytes], source_md5: SourceMD5 | None = None
+    ) -> str:
+        """
+        Stream chunks to gs://{bucket}/studies/{safe_uid}.dcm with a resumable upload.
+        Memory is bounded by GCS_RESUMABLE_CHUNK_BYTES. On failure the upload session is abandoned
+        (never finalized), so a partial object is not published.
+        With STORAGE_DEDUP_ENABLED and `source_md5`, the upload is skipped without reading the chunks
+        when the existing object's MD5 equals the source's.
+        """
+        blob_name = f"studies/{_safe_name(study_instance_uid)}.dcm"
+        return await self._upload_stream(blob_name, study_instance_uid, chunks, source_md5)
+
+    async def save_instance_stream_async(
+        self,
+        study_instance_uid: str,
+        sop_instance_uid: str,
+        chunks: AsyncIterator[bytes],
+        source_md5: SourceMD5 | None = None,
+    ) -> str:
+        """Stream one instance to gs://{bucket}/studies/{safe_uid}/{safe_sop_uid}.dcm (resumable upload)."""
+        blob_name = f"studies/{_safe_name(study_instance_uid)}/{_safe_name(sop_instance_uid)}.dcm"
+        return await self._upload_stream(blob_name, study_instance_uid, chunks, source_md5)
+
+    def study_prefix(self, study_instance_uid: str) -> str:
+        """gs:// prefix holding a study's instances (full-study mode), with trailing slash."""
+        return f"gs://{get_settings().gcs_bucket}/studies/{_safe_name(study_instance_uid)}/"
+
+    async def _upload_stream(
+        self,
+        blob_name: str,
+        study_instance_uid: str,
+        chunks: AsyncIterator[bytes],
+        source_md5: SourceMD5 | None = None,
+    ) -> str:
+        settings = get_settings()
+        bucket_name = settings.gcs_bucket
+        if not bucket_name or not bucket_name.strip():
+            raise ValueError("GCS_BUCKET is required when using GCS storage backend")
+        executor = get_storage_executor()
+        start = time.perf_counter()
+        size_bytes = 0
+        try:
+            client = self._get_client()
+            bucket = client.bucket(bucket_name)
+            uri = f"gs://{bucket_name}/{blob_name}"
+            if settings.storage_dedup_enabled and source_md5 is not None:
+                existing_size = await self._stored_size_if_same(bucket, blob_name, source_md5)
+                if existing_size is not None:
+                    STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="gcs").observe(time.perf_counter() - start)
+                    STORAGE_UPLOAD_TOTAL.labels(backend="gcs", status="deduplicated").inc()
+                    STORAGE_BYTES_DEDUPLICATED.labels(backend="gcs").inc(existing_size)
+                    _log.info("gcs_upload_deduplicated", study_instance_uid=study_instance_uid, gcs_uri=uri)
+                    return uri
+            blob = bucket.blob(blob_name)
+            blob.metadata = {"study_instance_uid": study_instance_uid}
+            writer = await executor.run(
+                lambda: blob.open(
+                    "wb",
+                    chunk_size=settings.gcs_resumable_chunk_bytes,
+                    content_type="application/dicom",
+                    timeout=settings.gcs_upload_timeout_seconds,
+                )
+            )
+            async for chunk in chunks:
+                await executor.run(writer.write, chunk)
+                size_bytes += len(chunk)
+            await executor.run(writer.close)
+            STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="gcs").observe(
+                time.perf_counter() - start
+            )
+            STORAGE_UPLOAD_TOTAL.labels(backend="gcs", status="success").inc()
+            STORAGE_BYTES_WRITTEN.labels(backend="gcs").inc(size_bytes)
+            _log.info(
+                "gcs_upload_success",
+                study_instance_uid=study_instance_uid,
+                gcs_uri=uri,
+                size_bytes=size_bytes,
+            )
+            return uri
+        except Exception as e:
+            STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="gcs").observe(
+                time.perf_counter() - start
+            )
+            STORAGE_UPLOAD_TOTAL.labels(backend="gcs", status="failure").inc()
+            _log.warning(
+                "gcs_upload_failed",
+                study_instance_uid=study_instance_uid,
+                error_type=type(e).__name__,
+            )
+            raise RuntimeError("GCS upload failed") from e
+
+    async def _stored_size_if_same(self, bucket: "Bucket", blob_name: str, source_md5: SourceMD5) -> int | None:
+        """Size of the existing object if its MD5 equals the source's (no download); None otherwise."""
+        md5 = await source_md5()
+        if not md5:
+            return None
+        timeout = get_settings().gcs_upload_timeout_seconds
+        existing = await get_storage_executor().run(lambda: bucket.get_blob(blob_name, timeout=timeout))
+        if existing is None or not existing.md5_hash:
+            return None
+        if existing.md5_hash != base64.b64encode(bytes.fromhex(md5)).decode("ascii"):
+            return None
+        return existing.size or 0
+
+
+def _safe_name(uid: str) -> str:
+    return uid.replace("/", "_").replace("\\", "_")
@@ -1,24 +1,41 @@
 """Kafka producer: idempotent, acks=all, topic dicom.metadata.v1; correlation_id in headers."""
 
-from datetime import datetime, timezone
+import asyncio
+import time
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
 from aiokafka import AIOKafkaProducer
 from aiokafka.errors import KafkaError
 
-from dicom_middleware.config import get_settings
-from dicom_middleware.domain.events import DicomMetadataEvent
+from dicom_middleware.config import Settings, get_settings
+from dicom_middleware.domain.events import DicomMetadataEvent, IngestionRequestEvent
+from dicom_middleware.infrastructure.event_codec import encode_metadata_event
+from dicom_middleware.observability.metrics import KAFKA_PUBLISH_BATCH_SIZE, KAFKA_SEND_DURATION_SECONDS
 
 _producer: AIOKafkaProducer | None = None
 
 
+def producer_config(settings: Settings) -> dict[str, Any]:
+    """AIOKafkaProducer kwargs shared by the metadata and DLQ producers."""
+    config: dict[str, Any] = {
+        "bootstrap_servers": settings.kafka_bootstrap_servers.split(","),
+        "enable_idempotence": True,
+        "acks": "all",
+    }
+    if settings.kafka_publish_mode == "batched":
+        config["linger_ms"] = settings.kafka_linger_ms
+        config["max_batch_size"] = settings.kafka_max_batch_bytes
+        if settings.kafka_compression_type != "none":
+            config["compression_type"] = settings.kafka_compression_type
+    return config
+
+
 async def get_producer() -> AIOKafkaProducer:
     global _producer
     if _producer is None:
         settings = get_settings()
-        _producer = AIOKafkaProducer(
-            bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
-            enable_idempotence=True,
-            acks="all",
-        )
+        _producer = AIOKafkaProducer(**producer_config(settings))
         await _producer.start()
     return _producer
 
@@ -30,12 +47,90 @@ async def close_producer() -> None:
         _producer = None
 
 
+async def send_timed(
+    producer: AIOKafkaProducer,
+    topic: str,
+    value: bytes,
+    key: bytes | None = None,
+    headers: list[tuple[str, bytes]] | None = None,
+    always_keyed: bool = False,
+) -> None:
+    """
+    Send one message and wait for its acknowledgement, recording per-send latency.
+    In batched mode the message is enqueued first (send) so concurrent callers share producer batches.
+    Immediate mode drops the key unless `always_keyed` (for topics whose consumers rely on partitioning).
+    """
+    start = time.perf_counter()
+    try:
+        if get_settings().kafka_publish_mode == "batched":
+            delivery = await producer.send(topic, value=value, key=key, headers=headers)
+            await delivery
+        elif always_keyed:
+            await producer.send_and_wait(topic, value=value, key=key, headers=headers)
+        else:
+            await producer.send_and_wait(topic, value=value, headers=headers)
+    finally:
+        KAFKA_SEND_DURATION_SECONDS.labels(topic=topic).observe(time.perf_counter() - start)
+
+
+class KafkaMessage(NamedTuple):
+    """A pre-serialized message (e.g. an outbox row)."""
+
+    value: bytes
+    key: bytes | None = None
+    headers: list[tuple[str, bytes]] | None = None
+
+
+def _event_message(event: DicomMetadataEvent) -> KafkaMessage:
+    """Event in the configured encoding (KAFKA_EVENT_ENCODING), keyed by study, correlation_id in headers."""
+    value, encoding_headers = encode_metadata_event(event)
+    return KafkaMessage(
+        value=value,
+        key=event.study_instance_uid.encode("utf-8"),
+        headers=[("correlation_id", event.correlation_id.encode("utf-8")), *encoding_headers],
+    )
+
+
 async def publish_metadata_event(event: DicomMetadataEvent) -> None:
-    """Send event to dicom.metadata.v1 with correlation_id in headers."""
+    """Send event to dicom.metadata.v1 with correlation_id in headers (keyed by study in batched mode)."""
     producer = await get_producer()
     settings = get_settings()
-    await producer.send_and_wait(
-        settings.kafka_topic,
-        value=event.to_json_bytes(),
-        headers=[("correlation_id", event.correlation_id.encode("utf-8"))],
+    message = _event_message(event)
+    await send_timed(producer, settings.kafka_topic, value=message.value, key=message.key, headers=message.headers)
+
+
+async def publish_ingestion_request(request: IngestionRequestEvent) -> None:
+    """Send an ingestion request to the internal topic, keyed by Orthanc study ID, correlation_id in headers."""
+    producer = await get_producer()
+    topic = get_settings().kafka_ingestion_topic
+    await send_timed(
+        producer,
+        topic,
+        value=request.to_json_bytes(),
+        key=request.orthanc_study_id.encode("utf-8"),
+        headers=[("correlation_id", request.correlation_id.encode("utf-8"))],
+        always_keyed=True,
+    )
+
+
+async def publish_messages_settled(topic: str, messages: Sequence[KafkaMessage]) -> list[BaseException | None]:
+    """
+    Send pre-serialized messages to `topic` and wait for all acknowledgements concurrently.
+    Returns each message's delivery error (None once acknowledged), in order.
+    """
+    if not messages:
+        return []
+    KAFKA_PUBLISH_BATCH_SIZE.labels(topic=topic).observe(len(messages))
+    producer = await get_producer()
+    results = await asyncio.gather(
+        *(send_timed(producer, topic, value=m.value, key=m.key, headers=m.headers) for m in messages),
+        return_exceptions=True,
     )
+    return [result if isinstance(result, BaseException) else None for result in results]
+
+
+async def publish_messages(topic: str, messages: Sequence[KafkaMessage]) -> None:
+    """Like publish_messages_settled, but raises the first delivery error after every send has settled."""
+    for error in await publish_messages_settled(topic, messages):
+        if error is not None:
+            raise error
@@ -1,31 +1,52 @@
 """Local filesystem storage for raw DICOM. Path: {STORAGE_PATH}/studies/{StudyInstanceUID}.dcm"""
 
+import hashlib
+import os
 import time
+from collections.abc import AsyncIterator
 from pathlib import Path
+from typing import BinaryIO
+from uuid import uuid4
 
 from dicom_middleware.config import get_settings
+from dicom_middleware.domain.storage import SourceMD5
+from dicom_middleware.infrastructure.storage_executor import get_storage_executor
 from dicom_middleware.observability.metrics import (
+    STORAGE_BYTES_DEDUPLICATED,
+    STORAGE_BYTES_WRITTEN,
     STORAGE_UPLOAD_DURATION_SECONDS,
     STORAGE_UPLOAD_TOTAL,
 )
 
+# Hashed in slices so a large instance is not copied.
+_HASH_CHUNK_BYTES = 1024 * 1024
+
 
 class LocalStorageBackend:
-    """Store raw DICOM on local disk; implements StorageBackend protocol."""
+    """Store raw DICOM on local disk; implements AsyncStorageBackend protocol."""
 
     def save(self, study_instance_uid: str, data: bytes) -> str:
         """
         Write DICOM bytes to {STORAGE_PATH}/studies/{StudyInstanceUID}.dcm.
         Creates parent directories if needed. Overwrites if file exists (idempotent).
+        With STORAGE_DEDUP_ENABLED the write is skipped when the `.sha256` sidecar matches the data.
         Returns the storage path as file URI, e.g. file:///data/dicom/studies/1.2.3.dcm.
         """
         start = time.perf_counter()
         try:
-            uri = save_dicom(study_instance_uid, data)
+            if get_settings().storage_dedup_enabled:
+                uri, written = save_dicom_dedup(study_instance_uid, data)
+            else:
+                uri, written = save_dicom(study_instance_uid, data), True
             STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="local").observe(
                 time.perf_counter() - start
             )
-            STORAGE_UPLOAD_TOTAL.labels(backend="local", status="success").inc()
+            if written:
+                STORAGE_UPLOAD_TOTAL.labels(backend="local", status="success").inc()
+                STORAGE_BYTES_WRITTEN.labels(backend="local").inc(len(data))
+            else:
+                STORAGE_UPLOAD_TOTAL.labels(backend="local", status="deduplicated").inc()
+                STORAGE_BYTES_DEDUPLICATED.labels(backend="local").inc(len(data))
             return uri
         except Exception:
             STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="local").observe(
@@ -34,6 +55,81 @@ class LocalStorageBackend:
             STORAGE_UPLOAD_TOTAL.labels(backend="local", status="failure").inc()
             raise
 
+    async def save_async(self, study_instance_uid: str, data: bytes) -> str:
+        """save() on the bounded storage executor so disk writes do not block the event loop."""
+        return await get_storage_executor().run(self.save, study_instance_uid, data)
+
+    async def save_stream_async(
+        self, study_instance_uid: str, chunks: AsyncIterator[bytes], source_md5: SourceMD5 | None = None
+    ) -> str:
+        """
+        Stream chunks to a temp file next to the target, then rename it into place atomically.
+        Only one chunk is held in memory; a failed transfer leaves any previous file untouched.
+        With STORAGE_DEDUP_ENABLED the chunks are hashed while written, and the temp file is discarded
+        instead of renamed when the `.sha256` sidecar already records the same content.
+        `source_md5` is not used: the sidecar holds a SHA-256.
+        """
+        file_path = await get_storage_executor().run(study_file_path, study_instance_uid)
+        return await self._save_stream(file_path, chunks)
+
+    async def save_instance_stream_async(
+        self,
+        study_instance_uid: str,
+        sop_instance_uid: str,
+        chunks: AsyncIterator[bytes],
+        source_md5: SourceMD5 | None = None,
+    ) -> str:
+        """Stream one instance to {STORAGE_PATH}/studies/{StudyInstanceUID}/{SOPInstanceUID}.dcm (atomic rename)."""
+        file_path = await get_storage_executor().run(instance_file_path, study_instance_uid, sop_instance_uid)
+        return await self._save_stream(file_path, chunks)
+
+    def study_prefix(self, study_instance_uid: str) -> str:
+        """file:// URI of the directory holding a study's instances (full-study mode), with trailing slash."""
+        return _study_dir(study_instance_uid).as_uri() + "/"
+
+    async def _save_stream(self, file_path: Path, chunks: AsyncIterator[bytes]) -> str:
+        executor = get_storage_executor()
+        start = time.perf_counter()
+        digest = hashlib.sha256() if get_settings().storage_dedup_enabled else None
+        sidecar = sidecar_path(file_path)
+        tmp_path: Path | None = None
+        f = None
+        size_bytes = 0
+        try:
+            tmp_path = file_path.with_name(f"{file_path.name}.{uuid4().hex}.tmp")
+            f = await executor.run(open, tmp_path, "wb")
+            async for chunk in chunks:
+                await executor.run(_write_chunk, f, chunk, digest)
+                size_bytes += len(chunk)
+            await executor.run(f.close)
+            if digest is not None and await executor.run(_stored_digest_matches, file_path, digest.hexdigest()):
+                await executor.run(tmp_path.unlink, True)
+                STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="local").observe(time.perf_counter() - start)
+                STORAGE_UPLOAD_TOTAL.labels(backend="local", status="deduplicated").inc()
+                STORAGE_BYTES_DEDUPLICATED.labels(backend="local").inc(size_bytes)
+                return file_path.as_uri()
+            # Drop any sidecar first so it never vouches for other content, even after a crash.
+            await executor.run(sidecar.unlink, True)
+            await executor.run(os.replace, tmp_path, file_path)
+            if digest is not None:
+                await executor.run(sidecar.write_text, digest.hexdigest())
+            STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="local").observe(
+                time.perf_counter() - start
+            )
+            STORAGE_UPLOAD_TOTAL.labels(backend="local", status="success").inc()
+            STORAGE_BYTES_WRITTEN.labels(backend="local").inc(size_bytes)
+            return file_path.as_uri()
+        except Exception:
+            if f is not None:
+                await executor.run(f.close)
+            if tmp_path is not None:
+                await executor.run(tmp_path.unlink, True)
+            STORAGE_UPLOAD_DURATION_SECONDS.labels(backend="local").observe(
+                time.perf_counter() - start
+            )
+            STORAGE_UPLOAD_TOTAL.labels(backend="local", status="failure").inc()
+            raise
+
 
 def save_dicom(study_instance_uid: str, data: bytes) -> str:
     """
@@ -41,12 +137,76 @@ def save_dicom(study_instance_uid: str, data: bytes) -> str:
     Creates parent directories if needed. Overwrites if file exists (idempotent).
     Returns the storage path as file URI, e.g. file:///data/dicom/studies/1.2.3.dcm.
     """
+    file_path = study_file_path(study_instance_uid)
+    sidecar_path(file_path).unlink(missing_ok=True)
+    file_path.write_bytes(data)
+    return file_path.as_uri()
+
+
+def save_dicom_dedup(study_instance_uid: str, data: bytes) -> tuple[str, bool]:
+    """
+    Like save_dicom, but skip the write when `{file}.sha256` records the same SHA-256 as `data`.
+    The sidecar is removed before and rewritten after the data, so it never vouches for other content.
+    Returns (file URI, whether the file was written).
+    """
+    file_path = study_file_path(study_instance_uid)
+    sidecar = sidecar_path(file_path)
+    digest = sha256_hex(data)
+    if _stored_digest_matches(file_path, digest):
+        return file_path.as_uri(), False
+    sidecar.unlink(missing_ok=True)
+    file_path.write_bytes(data)
+    sidecar.write_text(digest)
+    return file_path.as_uri(), True
+
+
+def sha256_hex(data: bytes) -> str:
+    digest = hashlib.sha256()
+    view = memoryview(data)
+    for offset in range(0, len(view), _HASH_CHUNK_BYTES):
+        digest.update(view[offset : offset + _HASH_CHUNK_BYTES])
+    return digest.hexdigest()
+
+
+def _stored_digest_matches(file_path: Path, digest: str) -> bool:
+    """True if `file_path` exists and its `.sha256` sidecar records `digest`."""
+    try:
+        return file_path.is_file() and sidecar_path(file_path).read_text().strip() == digest
+    except FileNotFoundError:
+        return False
+
+
+def _write_chunk(f: BinaryIO, chunk: bytes, digest: "hashlib._Hash | None") -> None:
+    f.write(chunk)
+    if digest is not None:
+        digest.update(chunk)
+
+
+def sidecar_path(file_path: Path) -> Path:
+    """Checksum sidecar next to a stored study file: {file}.sha256."""
+    return file_path.with_name(f"{file_path.name}.sha256")
+
+
+def study_file_path(study_instance_uid: str) -> Path:
+    """Return {STORAGE_PATH}/studies/{StudyInstanceUID}.dcm, creating the directory if needed."""
     settings = get_settings()
     base = Path(settings.storage_path)
     studies_dir = base / "studies"
     studies_dir.mkdir(parents=True, exist_ok=True)
+    return studies_dir / f"{_safe_name(study_instance_uid)}.dcm"
+
+
+def instance_file_path(study_instance_uid: str, sop_instance_uid: str) -> Path:
+    """Return {STORAGE_PATH}/studies/{StudyInstanceUID}/{SOPInstanceUID}.dcm, creating the directory if needed."""
+    study_dir = _study_dir(study_instance_uid)
+    study_dir.mkdir(parents=True, exist_ok=True)
+    return study_dir / f"{_safe_name(sop_instance_uid)}.dcm"
+
+
+def _study_dir(study_instance_uid: str) -> Path:
+    return Path(get_settings().storage_path).resolve() / "studies" / _safe_name(study_instance_uid)
+
+
+def _safe_name(uid: str) -> str:
     # Sanitize UID for filename (replace path separators if any)
-    safe_uid = study_instance_uid.replace("/", "_").replace("\\", "_")
-    file_path = studies_dir / f"{safe_uid}.dcm"
-    file_path.write_bytes(data)
-    return file_path.as_uri()
+    return uid.replace("/", "_").replace("\\", "_")
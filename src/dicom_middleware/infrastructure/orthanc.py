@@ -1,7 +1,17 @@
-"""Orthanc REST API client."""
+"""Orthanc REST API client. One pooled, keep-alive httpx client is shared per process."""
+
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
 
 import httpx
 from dicom_middleware.config import get_settings
+from dicom_middleware.infrastructure.circuit_breaker import ORTHANC, guard
+from dicom_middleware.observability.metrics import ORTHANC_POOL_CONNECTIONS, ORTHANC_POOL_MAX_CONNECTIONS
+
+# Archive downloads can be much larger than a single instance.
+_ARCHIVE_READ_TIMEOUT_SECONDS = 60.0
+
+_http_client: httpx.AsyncClient | None = None
 
 
 def _orthanc_auth() -> httpx.Auth | None:
@@ -12,52 +22,186 @@ def _orthanc_auth() -> httpx.Auth | None:
     return None
 
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_connection_count(client: httpx.AsyncClient, idle: bool) -> int:
+    """Count pooled connections by idle state; 0 if the transport does not expose a pool."""
+    pool = getattr(client._transport, "_pool", None)
+    connections = getattr(pool, "connections", None) or []
+    return sum(1 for c in connections if c.is_idle() == idle)
+
+
+def get_orthanc_http_client() -> httpx.AsyncClient:
+    """Return the shared Orthanc HTTP client (created on first call, closed in app shutdown)."""
+    global _http_client
+    if _http_client is None:
+        s = get_settings()
+        _http_client = httpx.AsyncClient(
+            auth=_orthanc_auth(),
+            timeout=httpx.Timeout(
+                connect=s.orthanc_connect_timeout_seconds,
+                read=s.orthanc_read_timeout_seconds,
+                write=s.orthanc_read_timeout_seconds,
+                pool=s.orthanc_pool_timeout_seconds,
+            ),
+            limits=httpx.Limits(
+                max_connections=s.orthanc_max_connections,
+                max_keepalive_connections=s.orthanc_max_keepalive_connections,
+                keepalive_expiry=s.orthanc_keepalive_expiry_seconds,
+            ),
+            http2=s.orthanc_http2 and _http2_available(),
+        )
+        client = _http_client
+        ORTHANC_POOL_MAX_CONNECTIONS.set(s.orthanc_max_connections)
+        ORTHANC_POOL_CONNECTIONS.labels(state="active").set_function(lambda: _pool_connection_count(client, idle=False))
+        ORTHANC_POOL_CONNECTIONS.labels(state="idle").set_function(lambda: _pool_connection_count(client, idle=True))
+    return _http_client
+
+
+async def close_orthanc_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        # set() is ignored while a callback is installed; replace it so the closed client is released.
+        ORTHANC_POOL_CONNECTIONS.labels(state="active").set_function(lambda: 0)
+        ORTHANC_POOL_CONNECTIONS.labels(state="idle").set_function(lambda: 0)
+
+
 class OrthancClient:
-    """Client for Orthanc REST API."""
+    """Client for Orthanc REST API. Uses the shared pooled HTTP client unless one is passed in."""
 
-    def __init__(self, base_url: str | None = None) -> None:
+    def __init__(self, base_url: str | None = None, http_client: httpx.AsyncClient | None = None) -> None:
         self.base_url = (base_url or get_settings().orthanc_url).rstrip("/")
-        self.auth = _orthanc_auth()
+        self._http = http_client or get_orthanc_http_client()
 
     async def get_study_ids(self) -> list[str]:
         """List all study IDs (Orthanc internal IDs)."""
-        async with httpx.AsyncClient(timeout=30.0, auth=self.auth) as client:
-            r = await client.get(f"{self.base_url}/studies")
+        with guard(ORTHANC):
+            r = await self._http.get(f"{self.base_url}/studies")
+            r.raise_for_status()
+        return r.json()
+
+    async def find_studies(self, limit: int, since: int = 0) -> list[dict[str, str]]:
+        """
+        Page through all studies with POST /tools/find (Expand), `limit` at a time starting at offset `since`.
+        Returns [{"orthanc_study_id", "study_instance_uid"}] in one request instead of one GET per study.
+        """
+        with guard(ORTHANC):
+            r = await self._http.post(
+                f"{self.base_url}/tools/find",
+                json={"Level": "Study", "Query": {}, "Expand": True, "Limit": limit, "Since": since},
+            )
+            r.raise_for_status()
+        return [
+            {
+                "orthanc_study_id": study["ID"],
+                "study_instance_uid": study.get("MainDicomTags", {}).get("StudyInstanceUID", ""),
+            }
+            for study in r.json()
+        ]
+
+    async def get_changes(self, since: int, limit: int) -> dict:
+        """
+        Read Orthanc's change log after sequence number `since`.
+        Returns {"Changes": [{"ChangeType", "ResourceType", "ID", "Seq", ...}], "Done": bool, "Last": int}.
+        """
+        with guard(ORTHANC):
+            r = await self._http.get(f"{self.base_url}/changes", params={"since": since, "limit": limit})
             r.raise_for_status()
-            return r.json()
+        return r.json()
 
     async def get_study_instance_uid(self, orthanc_study_id: str) -> str:
         """Get DICOM Study Instance UID for an Orthanc study ID."""
-        async with httpx.AsyncClient(timeout=30.0, auth=self.auth) as client:
-            r = await client.get(f"{self.base_url}/studies/{orthanc_study_id}")
+        with guard(ORTHANC):
+            r = await self._http.get(f"{self.base_url}/studies/{orthanc_study_id}")
             r.raise_for_status()
-            data = r.json()
-            return data.get("MainDicomTags", {}).get("StudyInstanceUID", "")
+        data = r.json()
+        return data.get("MainDicomTags", {}).get("StudyInstanceUID", "")
 
     async def get_study_archive(self, orthanc_study_id: str) -> bytes:
         """Retrieve the DICOM archive (ZIP) for a study. Returns raw bytes."""
-        async with httpx.AsyncClient(timeout=60.0, auth=self.auth) as client:
-            r = await client.get(f"{self.base_url}/studies/{orthanc_study_id}/archive")
+        s = get_settings()
+        with guard(ORTHANC):
+            r = await self._http.get(
+                f"{self.base_url}/studies/{orthanc_study_id}/archive",
+                timeout=httpx.Timeout(
+                    connect=s.orthanc_connect_timeout_seconds,
+                    read=max(s.orthanc_read_timeout_seconds, _ARCHIVE_READ_TIMEOUT_SECONDS),
+                    write=s.orthanc_read_timeout_seconds,
+                    pool=s.orthanc_pool_timeout_seconds,
+                ),
+            )
             r.raise_for_status()
-            return r.content
+        return r.content
 
-    async def get_first_instance_archive(self, orthanc_study_id: str) -> bytes:
-        """Get study -> first series -> first instance, return DICOM bytes. Orthanc hierarchy is Study -> Series -> Instances."""
-        async with httpx.AsyncClient(timeout=30.0, auth=self.auth) as client:
-            r = await client.get(f"{self.base_url}/studies/{orthanc_study_id}")
-            r.raise_for_status()
-            data = r.json()
-            series_list = data.get("Series", [])
-            if not series_list:
-                raise ValueError(f"No series in study {orthanc_study_id}")
-            first_series_id = series_list[0]
-            r2 = await client.get(f"{self.base_url}/series/{first_series_id}")
+    async def get_first_instance_id(self, orthanc_study_id: str) -> str:
+        """Resolve study -> first series -> first instance ID. Orthanc hierarchy is Study -> Series -> Instances."""
+        with guard(ORTHANC):
+            r = await self._http.get(f"{self.base_url}/studies/{orthanc_study_id}")
+            r.raise_for_status()
+        data = r.json()
+        series_list = data.get("Series", [])
+        if not series_list:
+            raise ValueError(f"No series in study {orthanc_study_id}")
+        first_series_id = series_list[0]
+        with guard(ORTHANC):
+            r2 = await self._http.get(f"{self.base_url}/series/{first_series_id}")
             r2.raise_for_status()
-            series_data = r2.json()
-            instances = series_data.get("Instances", [])
-            if not instances:
-                raise ValueError(f"No instances in study {orthanc_study_id}")
-            first_instance_id = instances[0]
-            r3 = await client.get(f"{self.base_url}/instances/{first_instance_id}/file")
+        series_data = r2.json()
+        instances = series_data.get("Instances", [])
+        if not instances:
+            raise ValueError(f"No instances in study {orthanc_study_id}")
+        return instances[0]
+
+    async def get_study_instances(self, orthanc_study_id: str) -> list[dict[str, str]]:
+        """
+        List every instance of a study across all series in one request (GET /studies/{id}/instances).
+        Returns [{"orthanc_instance_id", "sop_instance_uid"}]; the SOP UID falls back to the Orthanc ID.
+        """
+        with guard(ORTHANC):
+            r = await self._http.get(f"{self.base_url}/studies/{orthanc_study_id}/instances")
+            r.raise_for_status()
+        return [
+            {
+                "orthanc_instance_id": instance["ID"],
+                "sop_instance_uid": instance.get("MainDicomTags", {}).get("SOPInstanceUID") or instance["ID"],
+            }
+            for instance in r.json()
+        ]
+
+    async def get_first_instance_archive(self, orthanc_study_id: str) -> bytes:
+        """Get study -> first series -> first instance, return DICOM bytes."""
+        first_instance_id = await self.get_first_instance_id(orthanc_study_id)
+        with guard(ORTHANC):
+            r3 = await self._http.get(f"{self.base_url}/instances/{first_instance_id}/file")
             r3.raise_for_status()
-            return r3.content
+        return r3.content
+
+    async def get_instance_md5(self, orthanc_instance_id: str) -> str | None:
+        """MD5 of the stored instance file as recorded by Orthanc (None if Orthanc does not store MD5s)."""
+        with guard(ORTHANC):
+            r = await self._http.get(f"{self.base_url}/instances/{orthanc_instance_id}/attachments/dicom/md5")
+            if r.status_code in (400, 404):
+                return None
+            r.raise_for_status()
+        return r.text.strip() or None
+
+    @asynccontextmanager
+    async def stream_instance(self, orthanc_instance_id: str, chunk_size: int) -> AsyncIterator[AsyncIterator[bytes]]:
+        """
+        Open the instance file and yield an iterator of body chunks; the response is closed on exit.
+        Only opening the response is a call for the circuit breaker: errors in the body surface in the caller.
+        """
+        url = f"{self.base_url}/instances/{orthanc_instance_id}/file"
+        async with AsyncExitStack() as stack:
+            with guard(ORTHANC):
+                r = await stack.enter_async_context(self._http.stream("GET", url))
+                r.raise_for_status()
+            yield r.aiter_bytes(chunk_size)
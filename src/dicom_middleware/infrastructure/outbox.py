@@ -0,0 +1,220 @@
+"""Transactional outbox relay: publish committed outbox rows to Kafka, mark them sent, prune old ones."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.models import OutboxRecord
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.infrastructure.event_codec import outbox_value
+from dicom_middleware.infrastructure.kafka_producer import KafkaMessage, publish_messages_settled
+from dicom_middleware.observability.logging import get_logger
+from dicom_middleware.observability.metrics import (
+    OUTBOX_LAG_SECONDS,
+    OUTBOX_PARKED,
+    OUTBOX_PRUNED,
+    OUTBOX_PUBLISHED,
+    OUTBOX_RELAY_FAILURES,
+    OUTBOX_ROW_FAILURES,
+)
+
+_log = get_logger(__name__)
+
+# Back off up to this long while Kafka or the DB is failing.
+_MAX_BACKOFF_SECONDS = 30.0
+# How often the relay deletes sent rows past their retention.
+_PRUNE_INTERVAL_SECONDS = 3600.0
+# last_error is truncated to this length.
+_MAX_ERROR_CHARS = 1000
+
+
+def _message(record: OutboxRecord) -> KafkaMessage:
+    headers = [(name, value.encode("utf-8")) for name, value in record.headers]
+    return KafkaMessage(
+        value=outbox_value(record.payload, headers),
+        key=record.message_key.encode("utf-8") if record.message_key else None,
+        headers=headers,
+    )
+
+
+class OutboxRelay:
+    """
+    Background task that claims unsent outbox rows in id order with FOR UPDATE SKIP LOCKED,
+    publishes them, and marks them sent in the same transaction. Replicas running the relay
+    concurrently claim disjoint batches. Delivery is at-least-once: a crash after publish but
+    before commit republishes the batch.
+
+    A row that fails to publish (e.g. too large, topic deleted or not authorized) does not hold back
+    the rest of its batch: it stays unsent with its attempt count and last error, and is parked after
+    `max_attempts`, so it no longer blocks the rows claimed after it. A retried row may be published
+    after later events. If no row of a claim could be published (Kafka is likely down), only the
+    oldest one is charged an attempt, so an outage does not park the whole backlog.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        interval_seconds: float,
+        session_factory=None,
+        max_attempts: int = 10,
+        retention_seconds: float = 0.0,
+    ) -> None:
+        self._batch_size = batch_size
+        self._interval_seconds = interval_seconds
+        self._session_factory = session_factory
+        self._max_attempts = max_attempts
+        self._retention_seconds = retention_seconds
+        self._next_prune = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def relay_once(self) -> int:
+        """
+        Publish one batch of unsent rows. Returns the number of rows marked sent.
+        Failed rows are recorded in the same transaction; then the first publish error is raised.
+        """
+        factory = self._session_factory or get_session_factory()
+        async with factory() as session:
+            result = await session.execute(
+                select(OutboxRecord)
+                .where(OutboxRecord.sent_at.is_(None), OutboxRecord.parked_at.is_(None))
+                .order_by(OutboxRecord.id)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            records = list(result.scalars())
+            if not records:
+                await session.rollback()
+                return 0
+            by_topic: dict[str, list[OutboxRecord]] = {}
+            for record in records:
+                by_topic.setdefault(record.topic, []).append(record)
+            errors: dict[int, BaseException] = {}
+            for topic, topic_records in by_topic.items():
+                results = await publish_messages_settled(topic, [_message(r) for r in topic_records])
+                errors.update((r.id, error) for r, error in zip(topic_records, results) if error is not None)
+            now = datetime.now(timezone.utc)
+            sent = [r for r in records if r.id not in errors]
+            if sent:
+                await session.execute(
+                    update(OutboxRecord).where(OutboxRecord.id.in_([r.id for r in sent])).values(sent_at=now)
+                )
+            if errors:
+                charged = {r.id for r in records if r.id in errors} if sent else {records[0].id}
+                await self._record_failures(session, [r for r in records if r.id in errors], errors, charged, now)
+            await session.commit()
+        OUTBOX_PUBLISHED.inc(len(sent))
+        for record in sent:
+            if record.created_at is not None:
+                OUTBOX_LAG_SECONDS.observe(max((now - record.created_at).total_seconds(), 0.0))
+        if errors:
+            raise next(iter(errors.values()))
+        return len(sent)
+
+    async def _record_failures(
+        self,
+        session,
+        failed: list[OutboxRecord],
+        errors: dict[int, BaseException],
+        charged: set[int],
+        now: datetime,
+    ) -> None:
+        """Store each failed row's last error; rows in `charged` also count an attempt and may be parked."""
+        OUTBOX_ROW_FAILURES.inc(len(failed))
+        for record in failed:
+            error = errors[record.id]
+            values: dict = {"last_error": f"{type(error).__name__}: {error}"[:_MAX_ERROR_CHARS]}
+            if record.id in charged:
+                values["attempts"] = record.attempts + 1
+                if values["attempts"] >= self._max_attempts:
+                    values["parked_at"] = now
+                    OUTBOX_PARKED.inc()
+                    _log.error(
+                        "outbox_row_parked",
+                        outbox_id=record.id,
+                        topic=record.topic,
+                        attempts=values["attempts"],
+                        error=values["last_error"],
+                    )
+            await session.execute(update(OutboxRecord).where(OutboxRecord.id == record.id).values(**values))
+
+    async def prune_once(self) -> int:
+        """Delete sent rows older than the retention period. Returns the number of rows deleted."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self._retention_seconds)
+        factory = self._session_factory or get_session_factory()
+        async with factory() as session:
+            result = await session.execute(
+                delete(OutboxRecord).where(OutboxRecord.sent_at.is_not(None), OutboxRecord.sent_at < cutoff)
+            )
+            await session.commit()
+        OUTBOX_PRUNED.inc(result.rowcount)
+        if result.rowcount:
+            _log.info("outbox_pruned", rows=result.rowcount)
+        return result.rowcount
+
+    async def _prune_if_due(self) -> None:
+        if not self._retention_seconds or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + _PRUNE_INTERVAL_SECONDS
+        try:
+            await self.prune_once()
+        except Exception as e:
+            _log.warning("outbox_prune_failed", error=str(e))
+
+    async def run(self) -> None:
+        """Relay until cancelled; a full batch is followed immediately by the next one. Prunes hourly."""
+        backoff = self._interval_seconds
+        while True:
+            await self._prune_if_due()
+            try:
+                sent = await self.relay_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                OUTBOX_RELAY_FAILURES.inc()
+                _log.warning("outbox_relay_failed", error=str(e), retry_in_seconds=backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+                continue
+            backoff = self._interval_seconds
+            if sent < self._batch_size:
+                await asyncio.sleep(self._interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="outbox-relay")
+            _log.info("outbox_relay_started", batch_size=self._batch_size)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_relay: OutboxRelay | None = None
+
+
+def get_outbox_relay() -> OutboxRelay:
+    global _relay
+    if _relay is None:
+        settings = get_settings()
+        _relay = OutboxRelay(
+            batch_size=settings.outbox_relay_batch_size,
+            interval_seconds=settings.outbox_relay_interval_ms / 1000,
+            max_attempts=settings.outbox_relay_max_attempts,
+            retention_seconds=settings.outbox_retention_hours * 3600,
+        )
+    return _relay
+
+
+async def close_outbox_relay() -> None:
+    global _relay
+    if _relay is not None:
+        await _relay.stop()
+        _relay = None
@@ -1,38 +1,98 @@
-"""PostgreSQL repository: idempotent upsert by study_instance_uid."""
+"""PostgreSQL repository: idempotent upsert by study_instance_uid; outbox rows in the same transaction; poller cursors."""
 
+from collections.abc import Sequence
+from typing import Any
 from uuid import UUID
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import String, any_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import Insert, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from dicom_middleware.db.models import StudyRecord
+from dicom_middleware.db.models import OutboxRecord, PollerCursorRecord, StudyRecord
 from dicom_middleware.domain.entities import StudyMetadata
+from dicom_middleware.domain.events import DicomMetadataEvent
+from dicom_middleware.infrastructure.event_codec import encode_metadata_event, outbox_payload
+
+
+def study_row(
+    correlation_id: UUID, metadata: StudyMetadata, content_fingerprint: str | None = None
+) -> dict[str, Any]:
+    """Column values for one studies row. Without a fingerprint the column is left out (stored one unchanged)."""
+    row = {
+        "correlation_id": correlation_id,
+        "study_instance_uid": metadata.study_instance_uid,
+        "patient_id": metadata.patient_id,
+        "modality": metadata.modality,
+        "study_date": metadata.study_date,
+    }
+    if content_fingerprint is not None:
+        row["content_fingerprint"] = content_fingerprint
+    return row
+
+
+def outbox_row(topic: str, event: DicomMetadataEvent) -> dict[str, Any]:
+    """
+    Column values for one outbox row carrying a metadata event (keyed by study, correlation_id header).
+    The payload is already in the configured encoding (see event_codec.outbox_payload).
+    """
+    value, encoding_headers = encode_metadata_event(event)
+    return {
+        "topic": topic,
+        "message_key": event.study_instance_uid,
+        "payload": outbox_payload(value, encoding_headers),
+        "headers": [["correlation_id", event.correlation_id], *([k, v.decode("utf-8")] for k, v in encoding_headers)],
+        "correlation_id": UUID(event.correlation_id),
+    }
+
+
+def build_upsert_statement(rows: list[dict[str, Any]]) -> Insert:
+    """
+    Multi-row INSERT ... ON CONFLICT (study_instance_uid) DO UPDATE.
+    Rows must have distinct study_instance_uid values (Postgres rejects updating one row twice).
+    content_fingerprint is only written when a row carries one, so with change detection off the
+    statement does not touch the column.
+    """
+    with_fingerprint = any("content_fingerprint" in row for row in rows)
+    if with_fingerprint:
+        rows = [{"content_fingerprint": None, **row} for row in rows]
+    stmt = insert(StudyRecord).values(rows)
+    set_ = {
+        "patient_id": stmt.excluded.patient_id,
+        "modality": stmt.excluded.modality,
+        "study_date": stmt.excluded.study_date,
+    }
+    if with_fingerprint:
+        set_["content_fingerprint"] = func.coalesce(stmt.excluded.content_fingerprint, StudyRecord.content_fingerprint)
+    return stmt.on_conflict_do_update(index_elements=["study_instance_uid"], set_=set_)
 
 
 async def upsert_study(
     session: AsyncSession,
     correlation_id: UUID,
     metadata: StudyMetadata,
+    outbox: dict[str, Any] | None = None,
+    content_fingerprint: str | None = None,
 ) -> None:
     """
-    Insert or ignore study by study_instance_uid (idempotent).
-    Uses ON CONFLICT DO NOTHING so duplicate processing creates no extra row.
+    Insert or update study by study_instance_uid (idempotent).
+    Uses ON CONFLICT DO UPDATE so duplicate processing creates no extra row.
+    `outbox` (see outbox_row) is inserted in the same transaction.
     """
-    stmt = insert(StudyRecord).values(
-        correlation_id=correlation_id,
-        study_instance_uid=metadata.study_instance_uid,
-        patient_id=metadata.patient_id,
-        modality=metadata.modality,
-        study_date=metadata.study_date,
-    ).on_conflict_do_update(
-        index_elements=["study_instance_uid"],
-        set_={
-            "patient_id": metadata.patient_id,
-            "modality": metadata.modality,
-            "study_date": metadata.study_date,
-        },
+    await upsert_studies(
+        session, [study_row(correlation_id, metadata, content_fingerprint)], [outbox] if outbox else ()
     )
-    await session.execute(stmt)
+
+
+async def upsert_studies(
+    session: AsyncSession,
+    rows: list[dict[str, Any]],
+    outbox_rows: Sequence[dict[str, Any]] = (),
+) -> None:
+    """Upsert many studies (and insert their outbox rows) in one transaction. Rows are written in UID order."""
+    ordered = sorted(rows, key=lambda r: r["study_instance_uid"])
+    await session.execute(build_upsert_statement(ordered))
+    if outbox_rows:
+        await session.execute(insert(OutboxRecord).values(list(outbox_rows)))
     await session.commit()
 
 
@@ -42,3 +102,47 @@ async def exists_by_study_instance_uid(session: AsyncSession, study_instance_uid
         select(StudyRecord.id).where(StudyRecord.study_instance_uid == study_instance_uid).limit(1)
     )
     return r.scalar() is not None
+
+
+async def get_content_fingerprint(session: AsyncSession, study_instance_uid: str) -> str | None:
+    """Return the fingerprint recorded for the last completed ingestion of this study, if any."""
+    r = await session.execute(
+        select(StudyRecord.content_fingerprint).where(StudyRecord.study_instance_uid == study_instance_uid)
+    )
+    return r.scalar()
+
+
+async def set_content_fingerprint(session: AsyncSession, study_instance_uid: str, content_fingerprint: str) -> None:
+    """Record the fingerprint of a study whose storage and publish stages completed, and commit."""
+    await session.execute(
+        update(StudyRecord)
+        .where(StudyRecord.study_instance_uid == study_instance_uid)
+        .values(content_fingerprint=content_fingerprint)
+    )
+    await session.commit()
+
+
+async def existing_study_instance_uids(session: AsyncSession, study_instance_uids: Sequence[str]) -> set[str]:
+    """Return the subset of `study_instance_uids` already stored, in one `= ANY(:uids)` query."""
+    if not study_instance_uids:
+        return set()
+    uids = bindparam("uids", list(study_instance_uids), type_=ARRAY(String))
+    r = await session.execute(select(StudyRecord.study_instance_uid).where(StudyRecord.study_instance_uid == any_(uids)))
+    return set(r.scalars())
+
+
+async def get_poller_cursor(session: AsyncSession, name: str) -> int | None:
+    """Return the stored sequence number for cursor `name`, or None if it was never saved."""
+    r = await session.execute(select(PollerCursorRecord.seq).where(PollerCursorRecord.name == name))
+    return r.scalar()
+
+
+async def save_poller_cursor(session: AsyncSession, name: str, seq: int) -> None:
+    """Insert or move cursor `name` to `seq` and commit."""
+    stmt = insert(PollerCursorRecord).values(name=name, seq=seq)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"seq": stmt.excluded.seq, "updated_at": func.now()},
+    )
+    await session.execute(stmt)
+    await session.commit()
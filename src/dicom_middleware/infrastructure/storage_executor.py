@@ -0,0 +1,62 @@
+"""Bounded thread executor for blocking storage I/O (local disk writes, GCS uploads)."""
+
+import asyncio
+import contextvars
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from dicom_middleware.config import get_settings
+from dicom_middleware.observability.metrics import STORAGE_EXECUTOR_ACTIVE, STORAGE_EXECUTOR_QUEUE_DEPTH
+
+T = TypeVar("T")
+
+
+class StorageExecutor:
+    """
+    Runs blocking storage calls on a dedicated thread pool so the event loop keeps serving other work.
+    Concurrency is capped at `max_workers`; callers beyond that wait (queue depth is exported as a metric).
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._slots = asyncio.Semaphore(max_workers)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run fn(*args) in the executor, keeping the caller's context (e.g. correlation ID for logs)."""
+        STORAGE_EXECUTOR_QUEUE_DEPTH.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            STORAGE_EXECUTOR_QUEUE_DEPTH.dec()
+        STORAGE_EXECUTOR_ACTIVE.inc()
+        try:
+            ctx = contextvars.copy_context()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args))
+        finally:
+            STORAGE_EXECUTOR_ACTIVE.dec()
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        """Wait for running storage calls to finish (blocking: call it off the event loop)."""
+        self._executor.shutdown(wait=True)
+
+
+_executor: StorageExecutor | None = None
+
+
+def get_storage_executor() -> StorageExecutor:
+    global _executor
+    if _executor is None:
+        _executor = StorageExecutor(max_workers=get_settings().storage_max_workers)
+    return _executor
+
+
+async def close_storage_executor() -> None:
+    """Let in-flight uploads finish on a helper thread, so the event loop keeps running meanwhile."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        await asyncio.to_thread(executor.shutdown)
@@ -1,7 +1,7 @@
 """Factory for storage backend (local or GCS). Cached per backend type."""
 
 from dicom_middleware.config import get_settings
-from dicom_middleware.domain.storage import StorageBackend
+from dicom_middleware.domain.storage import AsyncStorageBackend
 from dicom_middleware.infrastructure.gcs_storage import GCSStorageBackend
 from dicom_middleware.infrastructure.local_storage import LocalStorageBackend
 
@@ -9,7 +9,7 @@ _cached_local: LocalStorageBackend | None = None
 _cached_gcs: GCSStorageBackend | None = None
 
 
-def get_storage_backend() -> StorageBackend:
+def get_storage_backend() -> AsyncStorageBackend:
     """
     Return the configured storage backend (local or GCS).
     Backend instance is cached per type; changing STORAGE_BACKEND at runtime requires process restart.
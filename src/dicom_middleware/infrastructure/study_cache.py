@@ -0,0 +1,158 @@
+"""In-process study cache: Orthanc ID -> Study Instance UID (LRU + TTL) and a Bloom filter of ingested UIDs."""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.models import StudyRecord
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.observability.logging import get_logger
+from dicom_middleware.observability.metrics import STUDY_CACHE_BLOOM_ENTRIES, STUDY_CACHE_ENTRIES, STUDY_CACHE_LOOKUPS
+
+_log = get_logger(__name__)
+
+# Rows fetched per round trip while warming the filter from the studies table.
+_WARM_BATCH_ROWS = 10000
+
+
+class TTLCache:
+    """Bounded mapping with least-recently-used eviction and a per-entry time to live."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter sized for `capacity` items at `error_rate` false positives.
+    No false negatives; the false-positive rate grows once more than `capacity` items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing (Kirsch–Mitzenmacher): k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self._bits[pos >> 3] & mask:
+                self._bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class StudyCache:
+    """
+    Caches what the poller would otherwise re-fetch every cycle: the Study Instance UID of an
+    Orthanc study ID, and whether a UID was probably ingested. "Ingested" is a Bloom filter answer:
+    a hit may be a false positive and must be confirmed against the DB (the poller does so in
+    batches); a miss means "check the DB", never "new".
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, bloom_capacity: int, bloom_error_rate: float) -> None:
+        self._uids = TTLCache(max_entries, ttl_seconds)
+        self._ingested = BloomFilter(bloom_capacity, bloom_error_rate)
+        self._bloom_capacity = bloom_capacity
+
+    def get_uid(self, orthanc_study_id: str) -> str | None:
+        uid = self._uids.get(orthanc_study_id)
+        STUDY_CACHE_LOOKUPS.labels(cache="orthanc_uid", result="hit" if uid else "miss").inc()
+        return uid
+
+    def set_uid(self, orthanc_study_id: str, study_instance_uid: str) -> None:
+        self._uids.set(orthanc_study_id, study_instance_uid)
+        STUDY_CACHE_ENTRIES.set(len(self._uids))
+
+    def is_ingested(self, study_instance_uid: str) -> bool:
+        known = study_instance_uid in self._ingested
+        STUDY_CACHE_LOOKUPS.labels(cache="ingested", result="hit" if known else "miss").inc()
+        return known
+
+    def record_false_positives(self, count: int) -> None:
+        """Count `is_ingested` hits that the DB did not confirm."""
+        if count:
+            STUDY_CACHE_LOOKUPS.labels(cache="ingested", result="false_positive").inc(count)
+
+    def mark_ingested(self, study_instance_uid: str) -> None:
+        self._ingested.add(study_instance_uid)
+        STUDY_CACHE_BLOOM_ENTRIES.set(self._ingested.count)
+        if self._ingested.count == self._bloom_capacity + 1:
+            _log.warning("study_cache_bloom_over_capacity", capacity=self._bloom_capacity)
+
+    def record(self, orthanc_study_id: str, study_instance_uid: str) -> None:
+        """Remember a study that was just ingested."""
+        self.set_uid(orthanc_study_id, study_instance_uid)
+        self.mark_ingested(study_instance_uid)
+
+    async def warm(self, session_factory=None) -> int:
+        """Add every UID in the studies table to the ingested filter. Returns the number of rows read."""
+        factory = session_factory or get_session_factory()
+        rows = 0
+        async with factory() as session:
+            result = await session.stream_scalars(
+                select(StudyRecord.study_instance_uid).execution_options(yield_per=_WARM_BATCH_ROWS)
+            )
+            async for uid in result:
+                self.mark_ingested(uid)
+                rows += 1
+        _log.info("study_cache_warmed", studies=rows)
+        return rows
+
+
+_study_cache: StudyCache | None = None
+
+
+def get_study_cache() -> StudyCache | None:
+    """Return the process-wide study cache, or None when STUDY_CACHE_ENABLED is false."""
+    global _study_cache
+    settings = get_settings()
+    if not settings.study_cache_enabled:
+        return None
+    if _study_cache is None:
+        _study_cache = StudyCache(
+            max_entries=settings.study_cache_max_entries,
+            ttl_seconds=settings.study_cache_ttl_seconds,
+            bloom_capacity=settings.study_cache_bloom_capacity,
+            bloom_error_rate=settings.study_cache_bloom_error_rate,
+        )
+    return _study_cache
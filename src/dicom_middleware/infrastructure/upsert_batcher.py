@@ -0,0 +1,154 @@
+"""Micro-batching writer: coalesce study upserts from concurrent pipelines into one transaction."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.domain.entities import StudyMetadata
+from dicom_middleware.infrastructure.repository import study_row, upsert_studies
+from dicom_middleware.observability.logging import get_logger
+from dicom_middleware.observability.metrics import (
+    DB_UPSERT_BATCH_DURATION_SECONDS,
+    DB_UPSERT_BATCH_FALLBACKS,
+    DB_UPSERT_BATCH_ROWS,
+)
+
+_log = get_logger(__name__)
+
+
+@dataclass
+class _PendingUpsert:
+    row: dict[str, Any]
+    future: asyncio.Future
+    outbox: dict[str, Any] | None = None
+
+
+def _resolve(items: list[_PendingUpsert], error: BaseException | None = None) -> None:
+    for item in items:
+        if item.future.done():
+            continue
+        if error is None:
+            item.future.set_result(None)
+        else:
+            item.future.set_exception(error)
+
+
+def _outbox_rows(items: list[_PendingUpsert]) -> list[dict[str, Any]]:
+    # Every caller's event is kept, even when its study row was superseded within the batch.
+    return [item.outbox for item in items if item.outbox is not None]
+
+
+class StudyUpsertBatcher:
+    """
+    Collects upserts for up to `window_seconds` or `max_rows` rows, then writes them as one
+    multi-row upsert in a single transaction. Each caller awaits its own result; if a batch fails,
+    its rows are retried one by one so only the failing studies see an error (and go to the DLQ).
+    """
+
+    def __init__(self, max_rows: int, window_seconds: float, session_factory=None) -> None:
+        self._max_rows = max_rows
+        self._window_seconds = window_seconds
+        self._session_factory = session_factory
+        self._pending: list[_PendingUpsert] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._writes: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        correlation_id: UUID,
+        metadata: StudyMetadata,
+        outbox: dict[str, Any] | None = None,
+        content_fingerprint: str | None = None,
+    ) -> None:
+        """
+        Queue one upsert (plus its optional outbox row) and wait until its batch is committed.
+        Raises the row's DB error on failure.
+        """
+        loop = asyncio.get_running_loop()
+        item = _PendingUpsert(
+            row=study_row(correlation_id, metadata, content_fingerprint), future=loop.create_future(), outbox=outbox
+        )
+        self._pending.append(item)
+        if len(self._pending) >= self._max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window_seconds, self._flush)
+        await item.future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: list[_PendingUpsert]) -> None:
+        # Same UID twice in one statement is rejected by Postgres; last write wins, all callers share the outcome.
+        by_uid: dict[str, list[_PendingUpsert]] = {}
+        for item in batch:
+            by_uid.setdefault(item.row["study_instance_uid"], []).append(item)
+        rows = [items[-1].row for items in by_uid.values()]
+        start = time.perf_counter()
+        try:
+            await self._execute(rows, _outbox_rows(batch))
+        except Exception as e:
+            if len(rows) == 1:
+                _resolve(batch, e)
+                return
+            DB_UPSERT_BATCH_FALLBACKS.inc()
+            _log.warning("upsert_batch_failed_retrying_rows", rows=len(rows), error=str(e))
+            await self._write_rows_individually(by_uid)
+            return
+        finally:
+            DB_UPSERT_BATCH_DURATION_SECONDS.observe(time.perf_counter() - start)
+            DB_UPSERT_BATCH_ROWS.observe(len(rows))
+        _resolve(batch)
+
+    async def _write_rows_individually(self, by_uid: dict[str, list[_PendingUpsert]]) -> None:
+        for items in by_uid.values():
+            try:
+                await self._execute([items[-1].row], _outbox_rows(items))
+            except Exception as e:
+                _resolve(items, e)
+            else:
+                _resolve(items)
+
+    async def _execute(self, rows: list[dict[str, Any]], outbox_rows: list[dict[str, Any]]) -> None:
+        factory = self._session_factory or get_session_factory()
+        async with factory() as session:
+            await upsert_studies(session, rows, outbox_rows)
+
+    async def close(self) -> None:
+        """Flush anything pending and wait for in-flight batches."""
+        self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+
+_batcher: StudyUpsertBatcher | None = None
+
+
+def get_upsert_batcher() -> StudyUpsertBatcher:
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        _batcher = StudyUpsertBatcher(
+            max_rows=settings.db_upsert_batch_max_rows,
+            window_seconds=settings.db_upsert_batch_window_ms / 1000,
+        )
+    return _batcher
+
+
+async def close_upsert_batcher() -> None:
+    global _batcher
+    if _batcher is not None:
+        await _batcher.close()
+        _batcher = None
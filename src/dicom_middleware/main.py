@@ -11,28 +11,29 @@ from dicom_middleware.api.v1.routes.metrics import router as metrics_router
 from dicom_middleware.config import get_settings
 from dicom_middleware.api.openapi import OPENAPI_TAGS, custom_openapi_schema
 from dicom_middleware.correlation import CorrelationIdMiddleware
-from dicom_middleware.observability.logging import configure_logging
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup and shutdown lifecycle."""
+    """Startup and shutdown lifecycle: the pipeline's shared resources plus the API's job queue and poller."""
     settings = get_settings()
-    configure_logging(settings.log_level)
     from dicom_middleware.application.orthanc_poller import run_orthanc_poller
-    from dicom_middleware.db.session import init_db
-    await init_db()
+    from dicom_middleware.application.job_queue import close_job_queue, get_job_queue
+    from dicom_middleware.worker import close_pipeline_resources, open_pipeline_resources
+    await open_pipeline_resources()
+    if settings.ingestion_mode == "async":
+        await get_job_queue().start()
     poller_task = asyncio.create_task(run_orthanc_poller())
     yield
+    from dicom_middleware.api.v1.routes.admin import cancel_dlq_replay
+    await cancel_dlq_replay()
     poller_task.cancel()
     try:
         await poller_task
     except asyncio.CancelledError:
         pass
-    from dicom_middleware.infrastructure.kafka_producer import close_producer
-    from dicom_middleware.infrastructure.dlq import close_dlq_producer
-    await close_producer()
-    await close_dlq_producer()
+    await close_job_queue()
+    await close_pipeline_resources()
 
 
 APP_DESCRIPTION = """
@@ -1,6 +1,6 @@
 """Prometheus metrics for pipeline and API."""
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 # Request and pipeline metrics
 REQUEST_COUNT = Counter(
@@ -29,6 +29,43 @@ DLQ_MESSAGES = Counter(
     ["reason"],
 )
 
+# Pipeline stages (exemplars carry the correlation ID; exposed in OpenMetrics format)
+PIPELINE_DURATION_SECONDS = Histogram(
+    "dicom_middleware_pipeline_duration_seconds",
+    "End-to-end run_pipeline duration, successful or not",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+PIPELINE_ORTHANC_FETCH_SECONDS = Histogram(
+    "dicom_middleware_pipeline_orthanc_fetch_seconds",
+    "Pipeline stage: resolve and download the instance (header prefix when streaming) from Orthanc",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+PIPELINE_PARSE_SECONDS = Histogram(
+    "dicom_middleware_pipeline_parse_seconds",
+    "Pipeline stage: extract metadata and compute the content fingerprint",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+PIPELINE_DB_SECONDS = Histogram(
+    "dicom_middleware_pipeline_db_seconds",
+    "Pipeline stage: study upsert (with outbox row) and fingerprint reads/writes",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+PIPELINE_STORAGE_SECONDS = Histogram(
+    "dicom_middleware_pipeline_storage_seconds",
+    "Pipeline stage: write raw DICOM to storage (includes the body download when streaming)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+PIPELINE_KAFKA_SECONDS = Histogram(
+    "dicom_middleware_pipeline_kafka_seconds",
+    "Pipeline stage: publish the metadata event and wait for the acknowledgement",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 30.0),
+)
+PIPELINE_STAGE_IN_FLIGHT = Gauge(
+    "dicom_middleware_pipeline_stage_in_flight",
+    "Pipelines currently in each stage",
+    ["stage"],
+)
+
 # Storage upload (local and GCS)
 STORAGE_UPLOAD_DURATION_SECONDS = Histogram(
     "dicom_middleware_storage_upload_duration_seconds",
@@ -41,3 +78,274 @@ STORAGE_UPLOAD_TOTAL = Counter(
     "Storage uploads by backend and status",
     ["backend", "status"],
 )
+STORAGE_BYTES_WRITTEN = Counter(
+    "dicom_middleware_storage_bytes_written_total",
+    "Raw DICOM bytes written or uploaded by backend",
+    ["backend"],
+)
+STORAGE_BYTES_DEDUPLICATED = Counter(
+    "dicom_middleware_storage_bytes_deduplicated_total",
+    "Raw DICOM bytes not written because an identical object already existed",
+    ["backend"],
+)
+STORAGE_EXECUTOR_QUEUE_DEPTH = Gauge(
+    "dicom_middleware_storage_executor_queue_depth",
+    "Storage operations waiting for a free storage executor thread",
+)
+STORAGE_EXECUTOR_ACTIVE = Gauge(
+    "dicom_middleware_storage_executor_active",
+    "Storage operations currently running in the storage executor",
+)
+
+# Async ingestion queue (INGESTION_MODE=async)
+INGESTION_QUEUE_DEPTH = Gauge(
+    "dicom_middleware_ingestion_queue_depth",
+    "Ingestion jobs waiting in the in-process queue",
+)
+INGESTION_JOBS_TOTAL = Counter(
+    "dicom_middleware_ingestion_jobs_total",
+    "Ingestion jobs by outcome (enqueued, rejected, duplicate, succeeded, failed, cancelled)",
+    ["status"],
+)
+
+# Admission control (INGESTION_MAX_IN_FLIGHT)
+ADMISSION_IN_FLIGHT = Gauge(
+    "dicom_middleware_admission_in_flight",
+    "Requests holding an admission slot",
+    ["scope"],
+)
+ADMISSION_WAITING = Gauge(
+    "dicom_middleware_admission_waiting",
+    "Requests waiting for an admission slot",
+    ["scope"],
+)
+ADMISSION_QUEUE_WAIT_SECONDS = Histogram(
+    "dicom_middleware_admission_queue_wait_seconds",
+    "Time admitted requests waited for a slot",
+    ["scope"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+ADMISSION_REJECTED = Counter(
+    "dicom_middleware_admission_rejected_total",
+    "Requests rejected with 429 (queue_full: estimated wait over the deadline; timeout: deadline reached)",
+    ["scope", "reason"],
+)
+
+# Shared Orthanc HTTP client pool (values read from the pool at scrape time)
+ORTHANC_POOL_CONNECTIONS = Gauge(
+    "dicom_middleware_orthanc_pool_connections",
+    "Orthanc HTTP pool connections by state (active, idle)",
+    ["state"],
+)
+ORTHANC_POOL_MAX_CONNECTIONS = Gauge(
+    "dicom_middleware_orthanc_pool_max_connections",
+    "Configured maximum connections in the Orthanc HTTP pool",
+)
+
+# PostgreSQL connection pool (DB_POOL_ENABLED=true)
+DB_POOL_CHECKOUT_DURATION_SECONDS = Histogram(
+    "dicom_middleware_db_pool_checkout_duration_seconds",
+    "Time to check out a DB connection from the pool (wait, pre-ping and connect)",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "dicom_middleware_db_pool_checkout_timeouts_total",
+    "DB connection checkouts that timed out waiting for the pool",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "dicom_middleware_db_pool_checked_out",
+    "DB connections currently checked out of the pool",
+)
+DB_POOL_CAPACITY = Gauge(
+    "dicom_middleware_db_pool_capacity",
+    "Maximum DB connections the pool may open (size + max overflow)",
+)
+DB_POOL_SATURATION = Gauge(
+    "dicom_middleware_db_pool_saturation_ratio",
+    "Checked-out DB connections divided by pool capacity",
+)
+
+# Micro-batched study upserts (DB_UPSERT_BATCH_ENABLED=true)
+DB_UPSERT_BATCH_ROWS = Histogram(
+    "dicom_middleware_db_upsert_batch_rows",
+    "Rows written per batched study upsert",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+DB_UPSERT_BATCH_DURATION_SECONDS = Histogram(
+    "dicom_middleware_db_upsert_batch_duration_seconds",
+    "Duration of one batched upsert transaction",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_UPSERT_BATCH_FALLBACKS = Counter(
+    "dicom_middleware_db_upsert_batch_fallbacks_total",
+    "Failed upsert batches retried row by row to isolate the failing studies",
+)
+
+# Kafka publishing
+KAFKA_SEND_DURATION_SECONDS = Histogram(
+    "dicom_middleware_kafka_send_duration_seconds",
+    "Time from send to broker acknowledgement, per message",
+    ["topic"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+KAFKA_PUBLISH_BATCH_SIZE = Histogram(
+    "dicom_middleware_kafka_publish_batch_size",
+    "Messages handed to the producer per publish call (awaited concurrently)",
+    ["topic"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+# Transactional outbox
+OUTBOX_PUBLISHED = Counter(
+    "dicom_middleware_outbox_published_total",
+    "Outbox rows published to Kafka and marked sent",
+)
+OUTBOX_RELAY_FAILURES = Counter(
+    "dicom_middleware_outbox_relay_failures_total",
+    "Relay batches that failed and were left unsent for retry",
+)
+OUTBOX_ROW_FAILURES = Counter(
+    "dicom_middleware_outbox_row_failures_total",
+    "Outbox rows whose publish failed (left unsent with attempts and last_error recorded)",
+)
+OUTBOX_PARKED = Counter(
+    "dicom_middleware_outbox_parked_total",
+    "Outbox rows parked after OUTBOX_RELAY_MAX_ATTEMPTS failed publishes",
+)
+OUTBOX_PRUNED = Counter(
+    "dicom_middleware_outbox_pruned_total",
+    "Sent outbox rows deleted after OUTBOX_RETENTION_HOURS",
+)
+OUTBOX_LAG_SECONDS = Histogram(
+    "dicom_middleware_outbox_lag_seconds",
+    "Time from outbox insert (DB commit) to Kafka acknowledgement",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+# Orthanc poller
+ORTHANC_CHANGES_CURSOR = Gauge(
+    "dicom_middleware_orthanc_changes_cursor",
+    "Last Orthanc /changes sequence number processed and persisted",
+)
+ORTHANC_CHANGES_PROCESSED = Counter(
+    "dicom_middleware_orthanc_changes_processed_total",
+    "Orthanc study change events handled by the poller",
+    ["change_type"],
+)
+ORTHANC_POLL_CYCLE_DURATION_SECONDS = Histogram(
+    "dicom_middleware_orthanc_poll_cycle_duration_seconds",
+    "Duration of one Orthanc poller cycle",
+    ["mode"],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0),
+)
+ORTHANC_POLL_CYCLE_STUDIES = Histogram(
+    "dicom_middleware_orthanc_poll_cycle_studies",
+    "Studies per Orthanc poller cycle: scanned (seen in Orthanc) and new (sent to the pipeline)",
+    ["mode", "kind"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000, 1000000),
+)
+ORTHANC_POLL_INTERVAL_SECONDS = Gauge(
+    "dicom_middleware_orthanc_poll_interval_seconds",
+    "Current (adaptive) Orthanc poll interval",
+)
+
+# Study cache
+STUDY_CACHE_LOOKUPS = Counter(
+    "dicom_middleware_study_cache_lookups_total",
+    "Study cache lookups",
+    ["cache", "result"],
+)
+STUDY_CACHE_ENTRIES = Gauge(
+    "dicom_middleware_study_cache_entries",
+    "Orthanc ID -> Study Instance UID mappings held",
+)
+STUDY_CACHE_BLOOM_ENTRIES = Gauge(
+    "dicom_middleware_study_cache_bloom_entries",
+    "Ingested Study Instance UIDs added to the Bloom filter",
+)
+
+# Ingestion deduplication
+INGESTION_COALESCED = Counter(
+    "dicom_middleware_ingestion_coalesced_total",
+    "Ingestions that reused a concurrent execution instead of running the pipeline again",
+    ["scope"],
+)
+
+# Change detection
+PIPELINE_UNCHANGED = Counter(
+    "dicom_middleware_pipeline_unchanged_total",
+    "Re-ingested studies whose content fingerprint matched, so write stages were skipped",
+)
+PIPELINE_SKIPPED_STAGES = Counter(
+    "dicom_middleware_pipeline_skipped_stages_total",
+    "Pipeline stages skipped because the study content was unchanged",
+    ["stage"],
+)
+PIPELINE_SKIPPED_BYTES = Counter(
+    "dicom_middleware_pipeline_skipped_bytes_total",
+    "Bytes of raw DICOM not written to storage because the study content was unchanged",
+)
+
+# Ingestion requests (INGESTION_MODE=kafka) and pipeline workers
+INGESTION_REQUESTS_PUBLISHED = Counter(
+    "dicom_middleware_ingestion_requests_published_total",
+    "Ingestion requests published to the internal ingestion topic",
+    ["source"],
+)
+WORKER_MESSAGES = Counter(
+    "dicom_middleware_worker_messages_total",
+    "Ingestion requests handled by pipeline workers",
+    ["status"],
+)
+WORKER_IN_FLIGHT = Gauge(
+    "dicom_middleware_worker_in_flight",
+    "Ingestion requests currently being processed by this worker",
+)
+WORKER_COMMIT_FAILURES = Counter(
+    "dicom_middleware_worker_commit_failures_total",
+    "Offset commits that failed (the batch is redelivered, ingestion is idempotent)",
+)
+
+# DLQ replay
+DLQ_REPLAY_MESSAGES = Counter(
+    "dicom_middleware_dlq_replay_messages_total",
+    "DLQ messages handled by a replay (replayed, failed again, or skipped by the filter)",
+    ["result"],
+)
+DLQ_REPLAY_CHECKPOINTS = Counter(
+    "dicom_middleware_dlq_replay_checkpoints_total",
+    "DLQ replay batches whose offsets were committed",
+)
+
+# Full-study ingestion
+FULL_STUDY_DURATION_SECONDS = Histogram(
+    "dicom_middleware_full_study_duration_seconds",
+    "Time to list, download and store every instance of one study (full-study mode)",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+FULL_STUDY_INSTANCES = Histogram(
+    "dicom_middleware_full_study_instances",
+    "Instances stored per study (full-study mode)",
+    buckets=(1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+FULL_STUDY_INSTANCES_IN_FLIGHT = Gauge(
+    "dicom_middleware_full_study_instances_in_flight",
+    "Instance transfers currently running across all studies (full-study mode)",
+)
+
+# Circuit breakers per dependency (orthanc, postgres, storage, kafka)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "dicom_middleware_circuit_breaker_state",
+    "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)",
+    ["dependency"],
+)
+CIRCUIT_BREAKER_TRANSITIONS = Counter(
+    "dicom_middleware_circuit_breaker_transitions_total",
+    "Circuit breaker state changes by dependency and new state",
+    ["dependency", "state"],
+)
+CIRCUIT_BREAKER_REJECTED = Counter(
+    "dicom_middleware_circuit_breaker_rejected_total",
+    "Calls failed fast because the dependency's breaker was open",
+    ["dependency"],
+)
@@ -0,0 +1,65 @@
+"""Per-stage timing for run_pipeline: histograms with correlation ID exemplars, in-flight gauges, log fields."""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Literal
+
+from prometheus_client import Histogram
+
+from dicom_middleware.observability.metrics import (
+    PIPELINE_DB_SECONDS,
+    PIPELINE_KAFKA_SECONDS,
+    PIPELINE_ORTHANC_FETCH_SECONDS,
+    PIPELINE_PARSE_SECONDS,
+    PIPELINE_STAGE_IN_FLIGHT,
+    PIPELINE_STORAGE_SECONDS,
+)
+
+Stage = Literal["orthanc_fetch", "parse", "db", "storage", "kafka"]
+
+_STAGE_HISTOGRAMS: dict[str, Histogram] = {
+    "orthanc_fetch": PIPELINE_ORTHANC_FETCH_SECONDS,
+    "parse": PIPELINE_PARSE_SECONDS,
+    "db": PIPELINE_DB_SECONDS,
+    "storage": PIPELINE_STORAGE_SECONDS,
+    "kafka": PIPELINE_KAFKA_SECONDS,
+}
+
+
+class StageTimings:
+    """Accumulated seconds per stage for one pipeline run (a stage may run more than once)."""
+
+    def __init__(self, correlation_id: str) -> None:
+        self.correlation_id = correlation_id
+        self.seconds: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def as_log_fields(self) -> dict[str, float]:
+        """{"<stage>_ms": ...} rounded for the pipeline_success / failure log events."""
+        return {f"{stage}_ms": round(seconds * 1000, 2) for stage, seconds in self.seconds.items()}
+
+
+# Set by run_pipeline; coalesced write stages run in the leader's context and report to its timings.
+current_timings: ContextVar[StageTimings | None] = ContextVar("pipeline_stage_timings", default=None)
+
+
+@contextmanager
+def stage(name: Stage) -> Iterator[None]:
+    """Time one pipeline stage: in-flight gauge while running, then histogram (with exemplar) and run timings."""
+    in_flight = PIPELINE_STAGE_IN_FLIGHT.labels(stage=name)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        in_flight.dec()
+        timings = current_timings.get()
+        exemplar = {"correlation_id": str(timings.correlation_id)} if timings is not None else None
+        _STAGE_HISTOGRAMS[name].observe(elapsed, exemplar=exemplar)
+        if timings is not None:
+            timings.add(name, elapsed)
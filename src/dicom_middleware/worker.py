@@ -0,0 +1,210 @@
+"""
+Standalone pipeline worker: consume ingestion requests and run the pipeline.
+
+Run with `python -m dicom_middleware.worker`. Workers share the KAFKA_INGESTION_TOPIC consumer group,
+so pipeline capacity scales with worker processes (up to the topic's partition count) independently
+of API replicas. Offsets are committed manually once every request in a fetched batch has finished,
+never past a request that was neither ingested nor dead-lettered.
+"""
+
+import asyncio
+import signal
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.errors import KafkaError
+from pydantic import ValidationError
+
+from dicom_middleware.application.pipeline import DeadLetteredError
+from dicom_middleware.application.use_cases import process_new_study
+from dicom_middleware.config import get_settings
+from dicom_middleware.db.session import get_session_factory
+from dicom_middleware.domain.events import IngestionRequestEvent
+from dicom_middleware.infrastructure.circuit_breaker import CircuitOpenError, circuit_open_cause
+from dicom_middleware.observability.logging import configure_logging, correlation_id_ctx, get_logger
+from dicom_middleware.observability.metrics import WORKER_COMMIT_FAILURES, WORKER_IN_FLIGHT, WORKER_MESSAGES
+
+_log = get_logger(__name__)
+
+# How long one fetch waits for records before re-checking for shutdown.
+_POLL_TIMEOUT_MS = 1000
+# Shortest pause after a request failed fast on an open circuit breaker.
+_MIN_PAUSE_SECONDS = 1.0
+
+
+class IngestionWorker:
+    """
+    Fetches up to `concurrency` ingestion requests at a time, runs them concurrently and, once all of
+    them finished, commits each partition up to its first request that was neither ingested nor
+    dead-lettered. The consumer seeks back to that request, so it and the ones after it are fetched
+    again; that is safe because ingestion is idempotent by Study Instance UID. A crash before the
+    commit redelivers the whole batch.
+    """
+
+    def __init__(self, consumer: AIOKafkaConsumer, concurrency: int) -> None:
+        self._consumer = consumer
+        self._concurrency = concurrency
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Finish and commit the current batch, then return from run()."""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            await self.run_once()
+
+    async def run_once(self) -> int:
+        """
+        Fetch, process and commit one batch. Returns the number of requests handled.
+        If a request failed fast on an open circuit breaker, the worker then pauses until the breaker
+        lets probes through instead of fetching requests that would all fail the same way.
+        """
+        batch = await self._consumer.getmany(timeout_ms=_POLL_TIMEOUT_MS, max_records=self._concurrency)
+        records = [(tp, record) for tp, partition_records in batch.items() for record in partition_records]
+        if not records:
+            return 0
+        errors = await asyncio.gather(*(self._handle(record.value) for _, record in records))
+        offsets = {tp: partition_records[-1].offset + 1 for tp, partition_records in batch.items()}
+        circuit_open: CircuitOpenError | None = None
+        for (tp, record), error in zip(records, errors):
+            if error is not None:
+                offsets[tp] = min(offsets[tp], record.offset)
+                circuit_open = circuit_open or circuit_open_cause(error)
+        for tp, offset in offsets.items():
+            if offset <= batch[tp][-1].offset:
+                self._consumer.seek(tp, offset)
+        try:
+            await self._consumer.commit(offsets)
+        except KafkaError as e:
+            # Typically a rebalance moved the partitions; the new owner reprocesses the batch.
+            WORKER_COMMIT_FAILURES.inc()
+            _log.warning("worker_commit_failed", records=len(records), error=str(e))
+        if circuit_open is not None:
+            await self._pause(circuit_open)
+        return len(records)
+
+    async def _pause(self, error: CircuitOpenError) -> None:
+        """Stop fetching until the open breaker lets probes through, or until stop() is called."""
+        seconds = max(error.retry_after, _MIN_PAUSE_SECONDS)
+        _log.warning("worker_paused", dependency=error.dependency, seconds=round(seconds, 1))
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except TimeoutError:
+            pass
+
+    async def _handle(self, value: bytes) -> Exception | None:
+        """
+        Run the pipeline for one request. Returns None once the request is settled: ingested, invalid,
+        or dead-lettered by the pipeline. Otherwise (the DLQ send failed, the failure happened outside
+        a pipeline stage, or a breaker was open) returns the error, and the request is fetched again.
+        """
+        try:
+            request = IngestionRequestEvent.model_validate_json(value)
+        except ValidationError as e:
+            WORKER_MESSAGES.labels(status="invalid").inc()
+            _log.warning("worker_request_invalid", error=str(e))
+            return None
+        correlation_id_ctx.set(request.correlation_id)
+        WORKER_IN_FLIGHT.inc()
+        try:
+            factory = get_session_factory()
+            async with factory() as session:
+                await process_new_study(request.correlation_id, request.orthanc_study_id, session)
+        except Exception as e:
+            settled = isinstance(e, DeadLetteredError) and circuit_open_cause(e) is None
+            WORKER_MESSAGES.labels(status="failed" if settled else "retried").inc()
+            _log.warning(
+                "worker_pipeline_failed",
+                orthanc_study_id=request.orthanc_study_id,
+                correlation_id=request.correlation_id,
+                retried=not settled,
+                error=str(e),
+            )
+            return None if settled else e
+        finally:
+            WORKER_IN_FLIGHT.dec()
+        WORKER_MESSAGES.labels(status="succeeded").inc()
+        return None
+
+
+def _consumer() -> AIOKafkaConsumer:
+    settings = get_settings()
+    return AIOKafkaConsumer(
+        settings.kafka_ingestion_topic,
+        bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
+        group_id=settings.worker_group_id,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+    )
+
+
+async def open_pipeline_resources() -> None:
+    """Set up what run_pipeline needs (DB, study cache, Orthanc client, outbox relay); shared with the API lifespan."""
+    settings = get_settings()
+    configure_logging(settings.log_level)
+    from dicom_middleware.db.session import init_db
+    from dicom_middleware.infrastructure.orthanc import get_orthanc_http_client
+    from dicom_middleware.infrastructure.study_cache import get_study_cache
+
+    await init_db()
+    study_cache = get_study_cache()
+    if study_cache is not None:
+        await study_cache.warm()
+    get_orthanc_http_client()
+    if settings.kafka_outbox_enabled:
+        from dicom_middleware.infrastructure.outbox import get_outbox_relay
+        get_outbox_relay().start()
+
+
+async def close_pipeline_resources() -> None:
+    """Flush and close everything opened by open_pipeline_resources or lazily by the pipeline."""
+    from dicom_middleware.infrastructure.outbox import close_outbox_relay
+    await close_outbox_relay()
+    from dicom_middleware.infrastructure.kafka_producer import close_producer
+    from dicom_middleware.infrastructure.dlq import close_dlq_producer
+    await close_producer()
+    await close_dlq_producer()
+    from dicom_middleware.infrastructure.orthanc import close_orthanc_http_client
+    await close_orthanc_http_client()
+    from dicom_middleware.infrastructure.upsert_batcher import close_upsert_batcher
+    await close_upsert_batcher()
+    from dicom_middleware.db.session import close_engine
+    await close_engine()
+    from dicom_middleware.infrastructure.storage_executor import close_storage_executor
+    await close_storage_executor()
+
+
+async def run_worker() -> None:
+    """Start shared resources, consume until SIGINT/SIGTERM, then commit and shut down cleanly."""
+    settings = get_settings()
+    await open_pipeline_resources()
+    if settings.worker_metrics_port is not None:
+        from prometheus_client import start_http_server
+        start_http_server(settings.worker_metrics_port)
+
+    consumer = _consumer()
+    await consumer.start()
+    worker = IngestionWorker(consumer, settings.worker_concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    _log.info(
+        "worker_started",
+        topic=settings.kafka_ingestion_topic,
+        group_id=settings.worker_group_id,
+        concurrency=settings.worker_concurrency,
+    )
+    try:
+        await worker.run()
+    finally:
+        await consumer.stop()
+        await close_pipeline_resources()
+        _log.info("worker_stopped")
+
+
+def main() -> None:
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
@@ -23,3 +23,13 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
         base_url="http://test",
     ) as ac:
         yield ac
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers() -> Generator[None, None, None]:
+    """Breakers are process-wide; failures injected by one test must not open them for the next."""
+    from dicom_middleware.infrastructure import circuit_breaker
+
+    circuit_breaker._breakers.clear()
+    yield
+    circuit_breaker._breakers.clear()
@@ -0,0 +1,47 @@
+"""Integration tests for the admin API (DLQ replay), mounted on a bare app."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from dicom_middleware.api.v1.routes import admin
+from dicom_middleware.application.dlq_replay import ReplayReport
+
+
+@pytest.mark.asyncio
+async def test_dlq_replay_runs_in_background_and_rejects_concurrent_start():
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/v1/admin")
+    release = asyncio.Event()
+    calls = []
+
+    async def fake_replay_dlq(replay_filter, concurrency, rate, max_messages, on_start):
+        calls.append((replay_filter, concurrency, rate))
+        on_start(type("Replayer", (), {"report": ReplayReport(scanned=3, matched=2, replayed=2)})())
+        await release.wait()
+
+    with patch("dicom_middleware.api.v1.routes.admin.replay_dlq", side_effect=fake_replay_dlq):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            r = await client.post(
+                "/api/v1/admin/dlq/replay",
+                json={"reasons": ["Storage write failure"], "since": "2025-02-19T10:00:00Z", "rate_per_second": 5},
+            )
+            assert r.status_code == 202
+            await asyncio.sleep(0)
+            assert (await client.post("/api/v1/admin/dlq/replay", json={})).status_code == 409
+
+            r = await client.get("/api/v1/admin/dlq/replay")
+            assert r.json()["running"] is True
+            assert r.json()["report"]["replayed"] == 2
+
+            release.set()
+            await admin._replay_task
+            assert (await client.get("/api/v1/admin/dlq/replay")).json()["running"] is False
+
+    replay_filter, concurrency, rate = calls[0]
+    assert replay_filter.reasons == frozenset({"Storage write failure"})
+    assert replay_filter.since.year == 2025
+    assert (concurrency, rate) == (None, 5)
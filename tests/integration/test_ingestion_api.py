@@ -17,7 +17,26 @@ async def test_health_returns_200(client: AsyncClient):
 async def test_ready_returns_200(client: AsyncClient):
     r = await client.get("/ready")
     assert r.status_code == 200
-    assert r.json() == {"status": "ok"}
+    assert r.json() == {
+        "status": "ok",
+        "circuit_breakers": {"orthanc": "closed", "postgres": "closed", "storage": "closed", "kafka": "closed"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_open_breaker_as_degraded(client: AsyncClient):
+    import httpx
+
+    from dicom_middleware.infrastructure.circuit_breaker import ORTHANC, get_circuit_breaker
+
+    breaker = get_circuit_breaker(ORTHANC)
+    for _ in range(breaker.min_calls):
+        with pytest.raises(httpx.ConnectError), breaker.guard():
+            raise httpx.ConnectError("down")
+    r = await client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["status"] == "degraded"
+    assert r.json()["circuit_breakers"]["orthanc"] == "open"
 
 
 @pytest.mark.asyncio
@@ -40,3 +59,74 @@ async def test_ingestion_accepts_post_and_returns_correlation_id(client: AsyncCl
         data = r.json()
         assert "correlation_id" in data or "status" in data
     assert "X-Correlation-ID" in r.headers
+
+
+@pytest.mark.asyncio
+async def test_ingestion_async_mode_returns_202_and_job_status(client: AsyncClient):
+    from unittest.mock import MagicMock, patch
+
+    from dicom_middleware.application.job_queue import IngestionJobQueue
+
+    queue = IngestionJobQueue(maxsize=10, workers=1, retention=100)
+    settings = MagicMock()
+    settings.ingestion_mode = "async"
+    with (
+        patch("dicom_middleware.api.v1.routes.ingestion.get_settings", return_value=settings),
+        patch("dicom_middleware.api.v1.routes.ingestion.get_job_queue", return_value=queue),
+    ):
+        r = await client.post("/api/v1/ingestion/studies", json={"ID": "orthanc-id-1"})
+        assert r.status_code == 202
+        correlation_id = r.json()["correlation_id"]
+        assert r.headers["X-Correlation-ID"] == correlation_id
+
+        r = await client.get(f"/api/v1/ingestion/jobs/{correlation_id}")
+        assert r.status_code == 200
+        assert r.json()["status"] == "queued"
+        assert r.json()["orthanc_study_id"] == "orthanc-id-1"
+
+        r = await client.get("/api/v1/ingestion/jobs/unknown")
+        assert r.status_code == 404
+
+        r = await client.post(
+            "/api/v1/ingestion/studies", json={"ID": "orthanc-id-2"}, headers={"X-Correlation-ID": correlation_id}
+        )
+        assert r.status_code == 409
+        assert (await client.get(f"/api/v1/ingestion/jobs/{correlation_id}")).json()["orthanc_study_id"] == "orthanc-id-1"
+
+
+@pytest.mark.asyncio
+async def test_ingestion_kafka_mode_publishes_request_and_returns_202(client: AsyncClient):
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    settings = MagicMock()
+    settings.ingestion_mode = "kafka"
+    with (
+        patch("dicom_middleware.api.v1.routes.ingestion.get_settings", return_value=settings),
+        patch("dicom_middleware.api.v1.routes.ingestion.request_ingestion", new_callable=AsyncMock) as request,
+        patch("dicom_middleware.api.v1.routes.ingestion.process_new_study", new_callable=AsyncMock) as process,
+    ):
+        r = await client.post("/api/v1/ingestion/studies", json={"ID": "orthanc-id-1"})
+        assert r.status_code == 202
+        correlation_id = r.json()["correlation_id"]
+        request.assert_awaited_once_with(correlation_id, "orthanc-id-1", source="api")
+        process.assert_not_called()
+
+        request.side_effect = RuntimeError("broker down")
+        r = await client.post("/api/v1/ingestion/studies", json={"ID": "orthanc-id-2"})
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_ingestion_returns_429_with_retry_after_when_over_admission_limit(client: AsyncClient):
+    from unittest.mock import patch
+
+    from dicom_middleware.application.admission import AdmissionController
+
+    admission = AdmissionController(max_in_flight=1, queue_timeout=0.0, scope="test")
+    with patch("dicom_middleware.api.v1.routes.ingestion.get_ingestion_admission", return_value=admission):
+        async with admission.admit():
+            r = await client.post("/api/v1/ingestion/studies", json={"ID": "orthanc-id-1"})
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+    assert "X-Correlation-ID" in r.headers
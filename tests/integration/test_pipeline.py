@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock, patch, MagicMock
 from uuid import uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from dicom_middleware.application.pipeline import run_pipeline
+from dicom_middleware.application.pipeline import DeadLetteredError, run_pipeline
 from dicom_middleware.domain.entities import StudyMetadata
 
 
@@ -15,6 +15,16 @@ def mock_session():
     return s
 
 
+@pytest.fixture(autouse=True)
+def write_session(mock_session):
+    """The coalesced write stages open their own session; hand them the same mock."""
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=mock_session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    with patch("dicom_middleware.application.pipeline.get_session_factory", return_value=MagicMock(return_value=session_cm)):
+        yield
+
+
 @pytest.mark.asyncio
 async def test_pipeline_send_to_dlq_on_storage_failure(mock_session):
     """When storage fails (e.g. read-only local or GCS error), pipeline sends to DLQ."""
@@ -34,13 +44,414 @@ async def test_pipeline_send_to_dlq_on_storage_failure(mock_session):
             study_date="20250101",
         )
         mock_storage = MagicMock()
-        mock_storage.save.side_effect = OSError("Permission denied")
+        mock_storage.save_async = AsyncMock(side_effect=OSError("Permission denied"))
         get_storage_backend.return_value = mock_storage
 
-        with pytest.raises(OSError):
+        with pytest.raises(DeadLetteredError) as exc_info:
             await run_pipeline("a1b2c3d4-e5f6-7890-abcd-ef1234567890", "orthanc-study-id", mock_session)
+        assert isinstance(exc_info.value.error, OSError)
 
         send_dlq.assert_called_once()
         payload = send_dlq.call_args[0][0]
         assert payload.error_reason == "Storage write failure"
         assert payload.correlation_id == "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+
+
+def _dicom_with_pixels(study_uid: str, pixel_bytes: int) -> bytes:
+    import io
+
+    from pydicom import Dataset
+    from pydicom.dataset import FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian
+
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    ds.file_meta.MediaStorageSOPInstanceUID = study_uid + ".1.1"
+    ds.StudyInstanceUID = study_uid
+    ds.SeriesInstanceUID = study_uid + ".1"
+    ds.PatientID = "P1"
+    ds.Modality = "MR"
+    ds.BitsAllocated = 16
+    ds.PixelData = b"\x01" * pixel_bytes
+    buf = io.BytesIO()
+    ds.save_as(buf, enforce_file_format=True)
+    return buf.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_streaming_pipeline_pipes_chunks_to_storage(mock_session):
+    """Streaming mode parses the header prefix and forwards every chunk to storage unbuffered."""
+    import httpx
+
+    from dicom_middleware.config import Settings
+    from dicom_middleware.infrastructure.orthanc import OrthancClient
+
+    dicom = _dicom_with_pixels("1.2.840.99", 200_000)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/studies/s1":
+            return httpx.Response(200, json={"Series": ["se1"]})
+        if request.url.path == "/series/se1":
+            return httpx.Response(200, json={"Instances": ["i1"]})
+        return httpx.Response(200, content=dicom)
+
+    received: list[bytes] = []
+
+    async def save_stream_async(uid, chunks, source_md5=None):
+        async for chunk in chunks:
+            received.append(chunk)
+        return f"file:///data/studies/{uid}.dcm"
+
+    settings = Settings(
+        pipeline_streaming_enabled=True,
+        orthanc_stream_chunk_bytes=8192,
+        dicom_header_prefix_bytes=1024,
+    )
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with (
+        patch("dicom_middleware.application.pipeline.get_settings", return_value=settings),
+        patch(
+            "dicom_middleware.application.pipeline.OrthancClient",
+            return_value=OrthancClient(base_url="http://orthanc", http_client=http),
+        ),
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock) as upsert,
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock) as publish,
+    ):
+        get_storage_backend.return_value.save_stream_async = save_stream_async
+        await run_pipeline("a1b2c3d4-e5f6-7890-abcd-ef1234567890", "s1", mock_session)
+    await http.aclose()
+
+    assert upsert.call_args[0][2].study_instance_uid == "1.2.840.99"
+    assert b"".join(received) == dicom
+    assert max(len(c) for c in received) <= 8192
+    assert publish.call_args[0][0].storage_path == "file:///data/studies/1.2.840.99.dcm"
+
+
+@pytest.mark.asyncio
+async def test_outbox_mode_stores_first_and_commits_event_with_upsert(mock_session):
+    """Outbox mode: storage runs before the DB write, the event rides in the upsert transaction, no direct publish."""
+    from dicom_middleware.config import Settings
+
+    calls = []
+    with (
+        patch("dicom_middleware.application.pipeline.get_settings", return_value=Settings(kafka_outbox_enabled=True)),
+        patch("dicom_middleware.application.pipeline.OrthancClient") as OrthancCls,
+        patch("dicom_middleware.application.pipeline.extract_metadata") as extract,
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock) as upsert,
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock) as publish,
+    ):
+        OrthancCls.return_value.get_first_instance_archive = AsyncMock(return_value=b"dummy-dicom-bytes")
+        extract.return_value = StudyMetadata(study_instance_uid="1.2.3", patient_id="P1")
+        storage = MagicMock()
+        storage.save_async = AsyncMock(side_effect=lambda *a: calls.append("storage") or "file:///s/1.2.3.dcm")
+        get_storage_backend.return_value = storage
+        upsert.side_effect = lambda *a: calls.append("db")
+
+        await run_pipeline("a1b2c3d4-e5f6-7890-abcd-ef1234567890", "orthanc-study-id", mock_session)
+
+    assert calls == ["storage", "db"]
+    publish.assert_not_called()
+    outbox = upsert.call_args[0][3]
+    assert outbox["topic"] == "dicom.metadata.v1"
+    assert outbox["message_key"] == "1.2.3"
+    assert '"storage_path":"file:///s/1.2.3.dcm"' in outbox["payload"]
+
+
+@pytest.mark.asyncio
+async def test_same_study_uid_from_two_pipelines_is_written_and_published_once(mock_session):
+    """Two Orthanc IDs resolving to one Study Instance UID concurrently share the write stages."""
+    import asyncio
+
+    async def slow_upsert(*args):
+        await asyncio.sleep(0.01)
+
+    with (
+        patch("dicom_middleware.application.pipeline.OrthancClient") as OrthancCls,
+        patch("dicom_middleware.application.pipeline.extract_metadata") as extract,
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock, side_effect=slow_upsert) as upsert,
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock) as publish,
+    ):
+        OrthancCls.return_value.get_first_instance_archive = AsyncMock(return_value=b"dummy-dicom-bytes")
+        extract.return_value = StudyMetadata(study_instance_uid="1.2.3")
+        get_storage_backend.return_value.save_async = AsyncMock(return_value="file:///s/1.2.3.dcm")
+
+        await asyncio.gather(
+            run_pipeline(str(uuid4()), "orthanc-a", mock_session),
+            run_pipeline(str(uuid4()), "orthanc-b", mock_session),
+        )
+
+    upsert.assert_awaited_once()
+    publish.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_mode_skips_writes_another_replica_finished():
+    from contextlib import asynccontextmanager
+
+    from dicom_middleware.application.pipeline import _coalesce_by_uid
+    from dicom_middleware.config import Settings
+
+    keys = []
+
+    @asynccontextmanager
+    async def contended_lock(key, timeout_seconds):
+        keys.append(key)
+        yield False
+
+    write = AsyncMock()
+    with (
+        patch(
+            "dicom_middleware.application.pipeline.get_settings",
+            return_value=Settings(ingestion_dedup_mode="advisory_lock"),
+        ),
+        patch("dicom_middleware.application.pipeline.advisory_lock", contended_lock),
+        patch("dicom_middleware.application.pipeline._already_ingested", new_callable=AsyncMock, return_value=True),
+    ):
+        await _coalesce_by_uid("1.2.3", MagicMock(), write)
+
+    assert keys == ["study:1.2.3"]
+    write.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_change_detection_skips_storage_and_kafka_for_unchanged_study(mock_session):
+    """A re-ingested study with the recorded fingerprint skips the write stages entirely."""
+    import hashlib
+
+    from dicom_middleware.config import Settings
+
+    dicom = b"dummy-dicom-bytes"
+    with (
+        patch(
+            "dicom_middleware.application.pipeline.get_settings",
+            return_value=Settings(pipeline_change_detection_enabled=True),
+        ),
+        patch("dicom_middleware.application.pipeline.OrthancClient") as OrthancCls,
+        patch("dicom_middleware.application.pipeline.extract_metadata") as extract,
+        patch(
+            "dicom_middleware.application.pipeline.get_content_fingerprint",
+            new_callable=AsyncMock,
+            return_value="sha256:" + hashlib.sha256(dicom).hexdigest(),
+        ),
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock) as upsert,
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock) as publish,
+    ):
+        OrthancCls.return_value.get_first_instance_archive = AsyncMock(return_value=dicom)
+        extract.return_value = StudyMetadata(study_instance_uid="1.2.3")
+
+        metadata = await run_pipeline(str(uuid4()), "orthanc-study-id", mock_session)
+
+    assert metadata.study_instance_uid == "1.2.3"
+    upsert.assert_not_called()
+    get_storage_backend.assert_not_called()
+    publish.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_change_detection_records_fingerprint_after_publish(mock_session):
+    from dicom_middleware.config import Settings
+
+    order = []
+    with (
+        patch(
+            "dicom_middleware.application.pipeline.get_settings",
+            return_value=Settings(pipeline_change_detection_enabled=True),
+        ),
+        patch("dicom_middleware.application.pipeline.OrthancClient") as OrthancCls,
+        patch("dicom_middleware.application.pipeline.extract_metadata") as extract,
+        patch("dicom_middleware.application.pipeline.get_content_fingerprint", new_callable=AsyncMock, return_value="sha256:old"),
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock),
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch(
+            "dicom_middleware.application.pipeline.publish_metadata_event",
+            new_callable=AsyncMock,
+            side_effect=lambda e: order.append("publish"),
+        ),
+        patch(
+            "dicom_middleware.application.pipeline.set_content_fingerprint",
+            new_callable=AsyncMock,
+            side_effect=lambda s, uid, fp: order.append(fp),
+        ),
+    ):
+        OrthancCls.return_value.get_first_instance_archive = AsyncMock(return_value=b"new-bytes")
+        extract.return_value = StudyMetadata(study_instance_uid="1.2.3")
+        get_storage_backend.return_value.save_async = AsyncMock(return_value="file:///s/1.2.3.dcm")
+
+        await run_pipeline(str(uuid4()), "orthanc-study-id", mock_session)
+
+    assert order[0] == "publish"
+    assert order[1].startswith("sha256:") and order[1] != "sha256:old"
+
+
+def _full_study_handler(instances: dict[str, bytes]):
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/studies/s1/instances":
+            return httpx.Response(
+                200,
+                json=[{"ID": iid, "MainDicomTags": {"SOPInstanceUID": f"sop.{iid}"}} for iid in instances],
+            )
+        iid = request.url.path.split("/")[2]
+        return httpx.Response(200, content=instances[iid])
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_full_study_mode_stores_every_instance_with_bounded_fan_out(mock_session):
+    """Full-study mode streams all instances, never more than the per-study limit at once, and publishes one event."""
+    import asyncio
+
+    import httpx
+
+    from dicom_middleware.config import Settings
+    from dicom_middleware.infrastructure.orthanc import OrthancClient
+
+    instances = {f"i{n}": _dicom_with_pixels("1.2.840.77", 10_000 + n) for n in range(7)}
+    stored: dict[str, bytes] = {}
+    in_flight = 0
+    peak = 0
+
+    async def save_instance_stream_async(uid, sop_uid, chunks, source_md5=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        body = b""
+        async for chunk in chunks:
+            body += chunk
+            await asyncio.sleep(0)
+        stored[sop_uid] = body
+        in_flight -= 1
+        return f"file:///data/studies/{uid}/{sop_uid}.dcm"
+
+    settings = Settings(
+        pipeline_full_study_enabled=True,
+        pipeline_full_study_concurrency=3,
+        orthanc_stream_chunk_bytes=4096,
+        dicom_header_prefix_bytes=1024,
+    )
+    http = httpx.AsyncClient(transport=httpx.MockTransport(_full_study_handler(instances)))
+    with (
+        patch("dicom_middleware.application.pipeline.get_settings", return_value=settings),
+        patch(
+            "dicom_middleware.application.pipeline.OrthancClient",
+            return_value=OrthancClient(base_url="http://orthanc", http_client=http),
+        ),
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock) as upsert,
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock) as publish,
+    ):
+        storage = get_storage_backend.return_value
+        storage.save_instance_stream_async = save_instance_stream_async
+        storage.study_prefix.return_value = "file:///data/studies/1.2.840.77/"
+        await run_pipeline("a1b2c3d4-e5f6-7890-abcd-ef1234567890", "s1", mock_session)
+    await http.aclose()
+
+    assert upsert.call_args[0][2].study_instance_uid == "1.2.840.77"
+    assert stored == {f"sop.{iid}": body for iid, body in instances.items()}
+    assert 1 < peak <= 3
+    publish.assert_awaited_once()
+    event = publish.call_args[0][0]
+    assert event.storage_path == "file:///data/studies/1.2.840.77/"
+    assert event.instance_count == 7
+
+
+@pytest.mark.asyncio
+async def test_full_study_mode_dead_letters_failed_instance_transfer(mock_session):
+    """One failed instance upload fails the study with a storage DLQ reason and nothing is published."""
+    import httpx
+
+    from dicom_middleware.config import Settings
+    from dicom_middleware.infrastructure.orthanc import OrthancClient
+
+    instances = {f"i{n}": _dicom_with_pixels("1.2.840.78", 1000) for n in range(4)}
+
+    async def save_instance_stream_async(uid, sop_uid, chunks, source_md5=None):
+        async for _ in chunks:
+            pass
+        if sop_uid == "sop.i2":
+            raise OSError("disk full")
+        return f"file:///data/studies/{uid}/{sop_uid}.dcm"
+
+    settings = Settings(pipeline_full_study_enabled=True, pipeline_full_study_concurrency=2)
+    http = httpx.AsyncClient(transport=httpx.MockTransport(_full_study_handler(instances)))
+    with (
+        patch("dicom_middleware.application.pipeline.get_settings", return_value=settings),
+        patch(
+            "dicom_middleware.application.pipeline.OrthancClient",
+            return_value=OrthancClient(base_url="http://orthanc", http_client=http),
+        ),
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock),
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock) as publish,
+        patch("dicom_middleware.application.pipeline.send_to_dlq", new_callable=AsyncMock) as send_dlq,
+    ):
+        get_storage_backend.return_value.save_instance_stream_async = save_instance_stream_async
+        with pytest.raises(DeadLetteredError) as exc_info:
+            await run_pipeline("a1b2c3d4-e5f6-7890-abcd-ef1234567890", "s1", mock_session)
+        assert isinstance(exc_info.value.error, OSError)
+    await http.aclose()
+
+    publish.assert_not_called()
+    send_dlq.assert_called_once()
+    assert send_dlq.call_args[0][0].error_reason == "Storage write failure"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_success_log_carries_stage_timings(mock_session):
+    from structlog.testing import capture_logs
+
+    with (
+        patch("dicom_middleware.application.pipeline.OrthancClient") as OrthancCls,
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock),
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.publish_metadata_event", new_callable=AsyncMock),
+        capture_logs() as logs,
+    ):
+        OrthancCls.return_value.get_first_instance_archive = AsyncMock(
+            return_value=_dicom_with_pixels("1.2.840.55", 100)
+        )
+        get_storage_backend.return_value.save_async = AsyncMock(return_value="file:///data/studies/1.2.840.55.dcm")
+        await run_pipeline(str(uuid4()), "orthanc-study-id", mock_session)
+
+    success = next(e for e in logs if e["event"] == "pipeline_success")
+    for field in ("orthanc_fetch_ms", "parse_ms", "db_ms", "storage_ms", "kafka_ms", "duration_ms"):
+        assert success[field] >= 0
+
+
+@pytest.mark.asyncio
+async def test_open_storage_breaker_fails_fast_with_distinct_dlq_reason(mock_session):
+    """Once storage failures open its breaker, pipelines skip the storage call and dead-letter as circuit open."""
+    from dicom_middleware.infrastructure.circuit_breaker import STORAGE, CircuitOpenError, get_circuit_breaker
+
+    with (
+        patch("dicom_middleware.application.pipeline.OrthancClient") as OrthancCls,
+        patch("dicom_middleware.application.pipeline.extract_metadata") as extract,
+        patch("dicom_middleware.application.pipeline.upsert_study", new_callable=AsyncMock),
+        patch("dicom_middleware.application.pipeline.get_storage_backend") as get_storage_backend,
+        patch("dicom_middleware.application.pipeline.send_to_dlq", new_callable=AsyncMock) as send_dlq,
+    ):
+        OrthancCls.return_value.get_first_instance_archive = AsyncMock(return_value=b"dummy-dicom-bytes")
+        extract.return_value = StudyMetadata(study_instance_uid="1.2.3")
+        storage = get_storage_backend.return_value
+        storage.save_async = AsyncMock(side_effect=OSError("bucket unreachable"))
+
+        for _ in range(get_circuit_breaker(STORAGE).min_calls):
+            with pytest.raises(DeadLetteredError):
+                await run_pipeline(str(uuid4()), "orthanc-study-id", mock_session)
+        assert get_circuit_breaker(STORAGE).state == "open"
+        calls = storage.save_async.await_count
+
+        with pytest.raises(DeadLetteredError) as exc_info:
+            await run_pipeline(str(uuid4()), "orthanc-study-id", mock_session)
+        assert isinstance(exc_info.value.error, CircuitOpenError)
+
+    assert storage.save_async.await_count == calls
+    assert send_dlq.call_args[0][0].error_reason == "Dependency unavailable (circuit open)"
@@ -0,0 +1,89 @@
+"""Unit tests for ingestion admission control."""
+
+import asyncio
+
+import pytest
+
+from dicom_middleware.application.admission import AdmissionController, AdmissionRejectedError
+
+
+async def _hold(controller: AdmissionController, release: asyncio.Event, order: list[int], n: int) -> None:
+    async with controller.admit():
+        order.append(n)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_limit_then_queues_in_fifo_order():
+    controller = AdmissionController(max_in_flight=2, queue_timeout=5.0, scope="test")
+    release = asyncio.Event()
+    order: list[int] = []
+    tasks = [asyncio.create_task(_hold(controller, release, order, n)) for n in range(5)]
+    await asyncio.sleep(0.01)
+    assert order == [0, 1]
+    assert (controller.in_flight, controller.waiting) == (2, 3)
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == [0, 1, 2, 3, 4]
+    assert (controller.in_flight, controller.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_waiter_is_rejected_at_the_deadline_with_retry_after():
+    controller = AdmissionController(max_in_flight=1, queue_timeout=0.02, scope="test")
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], 0))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with controller.admit():
+            pass
+    assert exc_info.value.reason == "timeout"
+    assert exc_info.value.retry_after >= 1
+    assert controller.waiting == 0
+
+    release.set()
+    await holder
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_immediately_when_estimated_wait_exceeds_deadline():
+    controller = AdmissionController(max_in_flight=1, queue_timeout=0.05, scope="test")
+    async with controller.admit():
+        await asyncio.sleep(0.2)  # mean service time is now well over the deadline
+
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], 0))
+    await asyncio.sleep(0)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with controller.admit():
+            pass
+    assert exc_info.value.reason == "queue_full"
+    assert loop.time() - started < 0.05
+    assert exc_info.value.retry_after == 1
+
+    release.set()
+    await holder
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    controller = AdmissionController(max_in_flight=1, queue_timeout=5.0, scope="test")
+    release = asyncio.Event()
+    order: list[int] = []
+    holder = asyncio.create_task(_hold(controller, release, order, 0))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(_hold(controller, release, order, 1))
+    waiting = asyncio.create_task(_hold(controller, release, order, 2))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, waiting)
+    assert order == [0, 2]
+    assert (controller.in_flight, controller.waiting) == (0, 0)
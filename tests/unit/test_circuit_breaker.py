@@ -0,0 +1,124 @@
+"""Unit tests for per-dependency circuit breakers (fake clock)."""
+
+import httpx
+import pytest
+
+from dicom_middleware.infrastructure.circuit_breaker import (
+    ORTHANC,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breaker,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: FakeClock, **overrides) -> CircuitBreaker:
+    config = {
+        "window_size": 10,
+        "min_calls": 4,
+        "failure_rate": 0.5,
+        "open_seconds": 30.0,
+        "half_open_max_calls": 2,
+        "is_failure": lambda e: isinstance(e, OSError),
+        "clock": clock,
+    }
+    return CircuitBreaker("test", **{**config, **overrides})
+
+
+def _call(breaker: CircuitBreaker, error: Exception | None = None) -> None:
+    with breaker.guard():
+        if error is not None:
+            raise error
+
+
+def _fail(breaker: CircuitBreaker, times: int = 1) -> None:
+    for _ in range(times):
+        with pytest.raises(OSError):
+            _call(breaker, OSError("down"))
+
+
+def test_opens_at_failure_rate_once_min_calls_reached():
+    breaker = _breaker(FakeClock())
+    _fail(breaker, 3)
+    assert breaker.state == "closed"  # below min_calls
+    _call(breaker)
+    _call(breaker)
+    _fail(breaker)  # 4 failures of 6 calls
+    assert breaker.state == "open"
+
+
+def test_open_breaker_fails_fast_without_running_the_call():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _fail(breaker, 4)
+    clock.now = 10.0
+    ran = False
+    with pytest.raises(CircuitOpenError) as exc_info:
+        with breaker.guard():
+            ran = True
+    assert not ran
+    assert exc_info.value.dependency == "test"
+    assert exc_info.value.retry_after == pytest.approx(20.0)
+
+
+def test_half_open_probes_close_the_breaker_after_enough_successes():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _fail(breaker, 4)
+    clock.now = 30.0
+    assert breaker.state == "half_open"
+    with breaker.guard(), breaker.guard():
+        with pytest.raises(CircuitOpenError):
+            _call(breaker)  # only two probes at a time
+    assert breaker.state == "closed"
+    _fail(breaker, 3)
+    assert breaker.state == "closed"  # window was reset
+
+
+def test_failed_probe_reopens_the_breaker():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    _fail(breaker, 4)
+    clock.now = 31.0
+    _fail(breaker)
+    assert breaker.state == "open"
+    assert breaker.retry_after() == pytest.approx(30.0)
+
+
+def test_errors_that_are_not_dependency_failures_count_as_successes():
+    breaker = _breaker(FakeClock())
+    for _ in range(10):
+        with pytest.raises(ValueError):
+            _call(breaker, ValueError("bad input"))
+        with pytest.raises(CircuitOpenError):
+            _call(breaker, CircuitOpenError("other", 1.0))
+    _fail(breaker, 4)
+    assert breaker.state == "closed"
+
+
+def test_orthanc_breaker_ignores_client_errors():
+    breaker = get_circuit_breaker(ORTHANC)
+    request = httpx.Request("GET", "http://orthanc/studies/x")
+    not_found = httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+    for _ in range(breaker.min_calls):
+        with pytest.raises(httpx.HTTPStatusError):
+            _call(breaker, not_found)
+    assert breaker.state == "closed"
+    for _ in range(breaker.min_calls):
+        with pytest.raises(httpx.ConnectError):
+            _call(breaker, httpx.ConnectError("refused", request=request))
+    assert breaker.state == "open"
+
+
+def test_disabled_breaker_never_opens():
+    breaker = _breaker(FakeClock(), enabled=False)
+    _fail(breaker, 10)
+    _call(breaker)
+    assert breaker.state == "closed"
@@ -0,0 +1,75 @@
+"""Unit tests for the correlation ID / request metrics ASGI middleware."""
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from dicom_middleware.correlation import CorrelationIdMiddleware
+from dicom_middleware.observability.logging import correlation_id_ctx
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def item(item_id: str) -> dict:
+        return {"item_id": item_id, "correlation_id": correlation_id_ctx.get()}
+
+    @router.get("/files/{file_path:path}")
+    async def file(file_path: str) -> dict:
+        return {"file_path": file_path}
+
+    nested = APIRouter()
+    nested.include_router(router, prefix="/test")
+    app.include_router(nested, prefix="/api")
+    sub = FastAPI()
+    sub.include_router(router, prefix="/test")
+    app.mount("/mounted", sub)
+    app.add_middleware(CorrelationIdMiddleware)
+    return app
+
+
+def _count(endpoint: str, status: str) -> float:
+    labels = {"method": "GET", "endpoint": endpoint, "status": status}
+    return REGISTRY.get_sample_value("dicom_middleware_requests_total", labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_forwarded_correlation_id_is_in_context_and_response():
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        r = await client.get("/api/test/items/42", headers={"X-Correlation-ID": "cid-forwarded"})
+    assert r.json()["correlation_id"] == "cid-forwarded"
+    assert r.headers.get_list("X-Correlation-ID") == ["cid-forwarded"]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_counted_by_route_template():
+    template = "/api/test/items/{item_id}"
+    before_ok, before_unmatched = _count(template, "200"), _count("unmatched", "404")
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        r1 = await client.get("/api/test/items/1")
+        await client.get("/api/test/items/2")
+        r3 = await client.get("/no/such/path")
+    assert r1.headers["X-Correlation-ID"] != ""
+    assert r3.status_code == 404 and r3.headers["X-Correlation-ID"]
+    assert _count(template, "200") == before_ok + 2
+    assert _count("unmatched", "404") == before_unmatched + 1
+    assert REGISTRY.get_sample_value("dicom_middleware_request_duration_seconds_count", {"endpoint": template}) >= 2
+
+
+@pytest.mark.asyncio
+async def test_template_comes_from_the_route_not_from_parameter_values():
+    cases = {
+        "/api/test/items/items": "/api/test/items/{item_id}",
+        "/api/test/files/a/b/items": "/api/test/files/{file_path}",
+        "/mounted/test/items/7": "/mounted/test/items/{item_id}",
+    }
+    before = {template: _count(template, "200") for template in cases.values()}
+    async with AsyncClient(transport=ASGITransport(app=_app()), base_url="http://test") as client:
+        for path in cases:
+            assert (await client.get(path)).status_code == 200
+    for template in cases.values():
+        assert _count(template, "200") == before[template] + 1
+    assert _count("/api/test/{item_id}/{item_id}", "200") == 0
@@ -0,0 +1,41 @@
+"""Unit tests for engine/pool configuration (no database connection is opened)."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.pool import NullPool
+
+import dicom_middleware.db.session as db_session
+from dicom_middleware.config import Settings
+from dicom_middleware.db.session import InstrumentedAsyncQueuePool, close_engine, get_engine
+
+
+@pytest.fixture(autouse=True)
+async def _reset_engine():
+    await close_engine()
+    yield
+    await close_engine()
+
+
+def test_get_engine_uses_null_pool_by_default():
+    with patch("dicom_middleware.db.session.get_settings", return_value=Settings()):
+        engine = get_engine()
+    assert isinstance(engine.pool, NullPool)
+
+
+def test_get_engine_pooled_mode_applies_settings():
+    settings = Settings(
+        db_pool_enabled=True,
+        db_pool_size=4,
+        db_pool_max_overflow=2,
+        db_pool_timeout_seconds=3.0,
+        db_pool_recycle_seconds=600,
+    )
+    with patch("dicom_middleware.db.session.get_settings", return_value=settings):
+        engine = get_engine()
+        assert isinstance(engine.pool, InstrumentedAsyncQueuePool)
+        assert engine.pool.size() == 4
+        assert engine.pool._max_overflow == 2
+        assert engine.pool.timeout() == 3.0
+        assert engine.pool._recycle == 600
+        assert db_session._saturation() == 0.0
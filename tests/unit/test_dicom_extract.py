@@ -58,3 +58,19 @@ def test_extract_metadata_missing_study_instance_uid_raises():
     dcmwrite(buf, ds, implicit_vr=True, little_endian=True)
     with pytest.raises(ValueError, match="Missing StudyInstanceUID"):
         extract_metadata(buf.getvalue())
+
+
+def test_extract_metadata_from_header_prefix():
+    data = _make_minimal_dicom("1.2.3", patient_id="P001", modality="CT", study_date="20250101")
+    meta = extract_metadata(data[: len(data) - 10], truncated=True)
+    assert meta.study_instance_uid == "1.2.3"
+    assert meta.patient_id == "P001"
+
+
+def test_extract_metadata_prefix_too_short_raises_truncated():
+    from dicom_middleware.infrastructure.dicom_extract import TruncatedHeaderError
+
+    data = _make_minimal_dicom("1.2.3.4.5.6.7.8.9", patient_id="P001", modality="CT", study_date="20250101")
+    uid_end = data.index(b"1.2.3.4.5.6.7.8.9") + 5
+    with pytest.raises(TruncatedHeaderError):
+        extract_metadata(data[:uid_end], truncated=True)
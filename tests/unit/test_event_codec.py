@@ -0,0 +1,123 @@
+"""Unit tests for metadata event wire encodings and the file-based Avro schema registry."""
+
+import json
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from dicom_middleware.config import Settings
+from dicom_middleware.domain.events import DicomMetadataEvent
+from dicom_middleware.infrastructure import event_codec
+from dicom_middleware.infrastructure.avro import FileSchemaRegistry
+from dicom_middleware.infrastructure.event_codec import (
+    AVRO_CONTENT_TYPE,
+    CONTENT_TYPE_HEADER,
+    decode_metadata_event,
+    encode_metadata_event,
+    outbox_payload,
+    outbox_value,
+)
+from dicom_middleware.infrastructure.kafka_producer import publish_metadata_event
+
+AVRO_HEADERS = [(CONTENT_TYPE_HEADER, AVRO_CONTENT_TYPE)]
+
+
+def _event(**overrides) -> DicomMetadataEvent:
+    fields = {
+        "correlation_id": "cid-1",
+        "study_instance_uid": "1.2.3",
+        "patient_id": "P1",
+        "modality": "CT",
+        "study_date": "20250101",
+        "storage_path": "gs://bucket/studies/1.2.3/",
+        "instance_count": 12,
+        "timestamp": "2025-01-01T12:30:45.123456+00:00",
+    }
+    return DicomMetadataEvent(**{**fields, **overrides})
+
+
+@pytest.fixture
+def avro_settings():
+    settings = Settings(kafka_event_encoding="avro")
+    with patch("dicom_middleware.infrastructure.event_codec.get_settings", return_value=settings):
+        yield
+
+
+def test_json_is_default_and_has_no_encoding_header():
+    with patch("dicom_middleware.infrastructure.event_codec.get_settings", return_value=Settings()):
+        value, headers = encode_metadata_event(_event())
+    assert headers == []
+    assert value == _event().to_json_bytes()
+    assert decode_metadata_event(value, headers) == _event()
+
+
+def test_avro_round_trip_with_schema_id_framing(avro_settings):
+    event = _event()
+    value, headers = encode_metadata_event(event)
+    assert headers == AVRO_HEADERS
+    assert value[:5] == b"\x00\x00\x00\x00\x01"
+    assert len(value) < len(event.to_json_bytes()) / 2
+    assert decode_metadata_event(value, headers) == event
+
+
+def test_avro_round_trip_with_nulls(avro_settings):
+    event = _event(patient_id=None, modality=None, study_date=None, instance_count=None)
+    value, headers = encode_metadata_event(event)
+    assert decode_metadata_event(value, headers) == event
+
+
+def test_avro_decode_rejects_unknown_schema_id(avro_settings):
+    value, headers = encode_metadata_event(_event())
+    with pytest.raises(ValueError, match="Unknown schema id 99"):
+        decode_metadata_event(value[:1] + (99).to_bytes(4, "big") + value[5:], headers)
+    with pytest.raises(ValueError, match="Malformed"):
+        decode_metadata_event(value[:-4], headers)
+
+
+def test_avro_decodes_messages_from_older_writer_schema(tmp_path):
+    """A consumer decodes with the writer schema named by the ID; fields it lacked get the event defaults."""
+    packaged = json.loads((event_codec._PACKAGED_SCHEMAS / "dicom_metadata_event/v1.avsc").read_text())
+    v0 = {**packaged, "fields": [f for f in packaged["fields"] if f["name"] != "instance_count"]}
+    (tmp_path / "v0.avsc").write_text(json.dumps(v0))
+    (tmp_path / "v1.avsc").write_text(json.dumps(packaged))
+    subject = event_codec.METADATA_EVENT_SUBJECT
+    (tmp_path / "registry.json").write_text(
+        json.dumps(
+            {
+                "schemas": [
+                    {"id": 7, "subject": subject, "version": 1, "path": "v0.avsc"},
+                    {"id": 8, "subject": subject, "version": 2, "path": "v1.avsc"},
+                ]
+            }
+        )
+    )
+    registry = FileSchemaRegistry(tmp_path)
+    assert registry.latest(subject).id == 8
+    record = {**_event().model_dump(), "timestamp": datetime(2025, 1, 1, 12, 30, 45, 123456, tzinfo=timezone.utc)}
+    old_value = registry.by_id(7).encode(record)
+    with patch.object(event_codec, "_registry", registry):
+        decoded = decode_metadata_event(old_value, AVRO_HEADERS)
+    assert decoded == _event(instance_count=None)
+
+
+def test_outbox_payload_stores_avro_as_base64(avro_settings):
+    value, headers = encode_metadata_event(_event())
+    payload = outbox_payload(value, headers)
+    assert payload.isascii()
+    assert outbox_value(payload, headers) == value
+    json_value = _event().to_json_bytes()
+    assert outbox_payload(json_value, []) == json_value.decode()
+
+
+@pytest.mark.asyncio
+async def test_publish_in_avro_mode_adds_content_type_header(avro_settings):
+    producer = AsyncMock()
+    with (
+        patch("dicom_middleware.infrastructure.kafka_producer.get_producer", AsyncMock(return_value=producer)),
+        patch("dicom_middleware.infrastructure.kafka_producer.get_settings", return_value=Settings()),
+    ):
+        await publish_metadata_event(_event())
+    kwargs = producer.send_and_wait.call_args.kwargs
+    assert kwargs["headers"] == [("correlation_id", b"cid-1"), *AVRO_HEADERS]
+    assert decode_metadata_event(kwargs["value"], kwargs["headers"]) == _event()
@@ -85,3 +85,96 @@ def test_gcs_save_on_error_raises_runtime_error():
             backend.save("1.2.3", b"data")
         assert "GCS upload failed" in str(exc_info.value)
         assert "sensitive" not in str(exc_info.value)
+
+
+def _dedup_backend(existing_blob):
+    from dicom_middleware.infrastructure.gcs_storage import GCSStorageBackend
+
+    mock_bucket = MagicMock()
+    mock_bucket.get_blob.return_value = existing_blob
+    mock_client = MagicMock()
+    mock_client.bucket.return_value = mock_bucket
+    backend = GCSStorageBackend()
+    backend._client = mock_client
+    return backend, mock_bucket
+
+
+def _dedup_settings():
+    settings = MagicMock()
+    settings.gcs_bucket = "my-bucket"
+    settings.gcs_upload_timeout_seconds = 60
+    settings.storage_dedup_enabled = True
+    return settings
+
+
+def test_gcs_save_skips_upload_when_md5_matches():
+    import base64
+    import hashlib
+
+    existing = MagicMock()
+    existing.size = len(b"dicom-bytes")
+    existing.md5_hash = base64.b64encode(hashlib.md5(b"dicom-bytes").digest()).decode()
+    backend, bucket = _dedup_backend(existing)
+    with patch("dicom_middleware.infrastructure.gcs_storage.get_settings", return_value=_dedup_settings()):
+        uri = backend.save("1.2.3.4", b"dicom-bytes")
+    assert uri == "gs://my-bucket/studies/1.2.3.4.dcm"
+    bucket.get_blob.assert_called_once_with("studies/1.2.3.4.dcm", timeout=60)
+    bucket.blob.assert_not_called()
+
+
+def test_gcs_save_compares_crc32c_for_composite_objects():
+    import base64
+
+    import google_crc32c
+
+    existing = MagicMock()
+    existing.size = len(b"dicom-bytes")
+    existing.md5_hash = None
+    existing.crc32c = base64.b64encode(google_crc32c.value(b"other-bytes").to_bytes(4, "big")).decode()
+    backend, bucket = _dedup_backend(existing)
+    with patch("dicom_middleware.infrastructure.gcs_storage.get_settings", return_value=_dedup_settings()):
+        backend.save("1.2.3.4", b"dicom-bytes")
+    bucket.blob.return_value.upload_from_string.assert_called_once()
+
+
+async def test_gcs_stream_skips_upload_when_orthanc_md5_matches():
+    import base64
+    import hashlib
+
+    existing = MagicMock()
+    existing.size = 11
+    existing.md5_hash = base64.b64encode(hashlib.md5(b"dicom-bytes").digest()).decode()
+    backend, bucket = _dedup_backend(existing)
+    read = []
+
+    async def chunks():
+        read.append(True)
+        yield b"dicom-bytes"
+
+    async def source_md5():
+        return hashlib.md5(b"dicom-bytes").hexdigest()
+
+    with patch("dicom_middleware.infrastructure.gcs_storage.get_settings", return_value=_dedup_settings()):
+        uri = await backend.save_instance_stream_async("1.2.3", "1.2.3.4", chunks(), source_md5)
+    assert uri == "gs://my-bucket/studies/1.2.3/1.2.3.4.dcm"
+    bucket.get_blob.assert_called_once_with("studies/1.2.3/1.2.3.4.dcm", timeout=60)
+    bucket.blob.assert_not_called()
+    assert read == []
+
+
+async def test_gcs_stream_uploads_when_orthanc_md5_differs():
+    existing = MagicMock()
+    existing.md5_hash = "AAAAAAAAAAAAAAAAAAAAAA=="
+    backend, bucket = _dedup_backend(existing)
+    settings = _dedup_settings()
+    settings.gcs_resumable_chunk_bytes = 256 * 1024
+
+    async def chunks():
+        yield b"dicom-bytes"
+
+    async def source_md5():
+        return "0123456789abcdef0123456789abcdef"
+
+    with patch("dicom_middleware.infrastructure.gcs_storage.get_settings", return_value=settings):
+        await backend.save_stream_async("1.2.3", chunks(), source_md5)
+    bucket.blob.return_value.open.return_value.write.assert_called_once_with(b"dicom-bytes")
@@ -0,0 +1,94 @@
+"""Unit tests for the in-process ingestion job queue (async mode)."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from dicom_middleware.application.job_queue import DuplicateJobError, IngestionJobQueue, QueueFullError
+
+
+def _session_factory():
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=MagicMock())
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=session_cm)
+
+
+async def _wait_for_status(queue: IngestionJobQueue, correlation_id: str, status: str) -> None:
+    for _ in range(100):
+        if queue.get(correlation_id).status == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {correlation_id} never reached {status}")
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_pipeline_and_marks_succeeded():
+    queue = IngestionJobQueue(maxsize=10, workers=2, retention=100)
+    with (
+        patch("dicom_middleware.application.job_queue.get_session_factory", return_value=_session_factory()),
+        patch("dicom_middleware.application.job_queue.process_new_study", new_callable=AsyncMock) as process,
+    ):
+        job = queue.submit("cid-1", "orthanc-1")
+        assert job.status == "queued"
+        await queue.start()
+        await _wait_for_status(queue, "cid-1", "succeeded")
+        await queue.stop()
+    process.assert_awaited_once()
+    assert process.call_args[0][:2] == ("cid-1", "orthanc-1")
+
+
+@pytest.mark.asyncio
+async def test_worker_records_failure():
+    queue = IngestionJobQueue(maxsize=10, workers=1, retention=100)
+    with (
+        patch("dicom_middleware.application.job_queue.get_session_factory", return_value=_session_factory()),
+        patch(
+            "dicom_middleware.application.job_queue.process_new_study",
+            new_callable=AsyncMock,
+            side_effect=RuntimeError("Orthanc unreachable"),
+        ),
+    ):
+        queue.submit("cid-2", "orthanc-2")
+        await queue.start()
+        await _wait_for_status(queue, "cid-2", "failed")
+        await queue.stop()
+    assert queue.get("cid-2").error == "Orthanc unreachable"
+
+
+def test_submit_raises_when_queue_full():
+    queue = IngestionJobQueue(maxsize=1, workers=1, retention=100)
+    queue.submit("cid-1", "orthanc-1")
+    with pytest.raises(QueueFullError):
+        queue.submit("cid-2", "orthanc-2")
+    assert queue.get("cid-2") is None
+
+
+@pytest.mark.asyncio
+async def test_stop_marks_running_and_queued_jobs_cancelled():
+    queue = IngestionJobQueue(maxsize=10, workers=1, retention=100)
+    started = asyncio.Event()
+
+    async def hang(*args):
+        started.set()
+        await asyncio.Event().wait()
+
+    with (
+        patch("dicom_middleware.application.job_queue.get_session_factory", return_value=_session_factory()),
+        patch("dicom_middleware.application.job_queue.process_new_study", side_effect=hang),
+    ):
+        queue.submit("cid-1", "orthanc-1")
+        queue.submit("cid-2", "orthanc-2")
+        await queue.start()
+        await started.wait()
+        await queue.stop()
+    assert [queue.get(cid).status for cid in ("cid-1", "cid-2")] == ["cancelled", "cancelled"]
+
+
+def test_submit_rejects_a_reused_correlation_id_without_touching_the_job():
+    queue = IngestionJobQueue(maxsize=10, workers=1, retention=100)
+    queue.submit("cid-1", "orthanc-1")
+    with pytest.raises(DuplicateJobError):
+        queue.submit("cid-1", "orthanc-other")
+    assert queue.get("cid-1").orthanc_study_id == "orthanc-1"
@@ -0,0 +1,116 @@
+"""Unit tests for Kafka producer configuration and publish modes."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from dicom_middleware.config import Settings
+from dicom_middleware.domain.events import DicomMetadataEvent
+from dicom_middleware.infrastructure.kafka_producer import (
+    _event_message,
+    producer_config,
+    publish_messages,
+    publish_metadata_event,
+)
+
+
+def _event(uid: str) -> DicomMetadataEvent:
+    return DicomMetadataEvent(
+        correlation_id=f"cid-{uid}",
+        study_instance_uid=uid,
+        patient_id="P1",
+        modality="CT",
+        study_date="20250101",
+        storage_path=f"/storage/{uid}.dcm",
+        timestamp="2025-01-01T00:00:00+00:00",
+    )
+
+
+def _batched_producer() -> MagicMock:
+    producer = MagicMock()
+
+    async def send(topic, value, key=None, headers=None):
+        delivery = asyncio.get_running_loop().create_future()
+        delivery.set_result(None)
+        return delivery
+
+    producer.send = AsyncMock(side_effect=send)
+    return producer
+
+
+def _batch_size_sum(topic: str) -> float:
+    return REGISTRY.get_sample_value("dicom_middleware_kafka_publish_batch_size_sum", {"topic": topic}) or 0.0
+
+
+def test_producer_config_immediate_has_no_batching():
+    config = producer_config(Settings(kafka_publish_mode="immediate", kafka_compression_type="gzip"))
+    assert config["acks"] == "all"
+    assert config["enable_idempotence"] is True
+    assert "linger_ms" not in config
+    assert "compression_type" not in config
+
+
+def test_producer_config_batched():
+    config = producer_config(
+        Settings(kafka_publish_mode="batched", kafka_linger_ms=10, kafka_max_batch_bytes=131072, kafka_compression_type="gzip")
+    )
+    assert config["linger_ms"] == 10
+    assert config["max_batch_size"] == 131072
+    assert config["compression_type"] == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_immediate_mode_uses_send_and_wait_without_key():
+    producer = AsyncMock()
+    with (
+        patch("dicom_middleware.infrastructure.kafka_producer.get_producer", AsyncMock(return_value=producer)),
+        patch("dicom_middleware.infrastructure.kafka_producer.get_settings", return_value=Settings()),
+    ):
+        await publish_metadata_event(_event("1.2.3"))
+    producer.send_and_wait.assert_awaited_once()
+    assert "key" not in producer.send_and_wait.call_args.kwargs
+    assert producer.send_and_wait.call_args.kwargs["headers"] == [("correlation_id", b"cid-1.2.3")]
+
+
+@pytest.mark.asyncio
+async def test_batched_mode_keys_by_study_and_sends_all_before_waiting():
+    producer = _batched_producer()
+    before = _batch_size_sum("dicom.metadata.v1")
+    with (
+        patch("dicom_middleware.infrastructure.kafka_producer.get_producer", AsyncMock(return_value=producer)),
+        patch(
+            "dicom_middleware.infrastructure.kafka_producer.get_settings",
+            return_value=Settings(kafka_publish_mode="batched"),
+        ),
+    ):
+        await publish_messages("dicom.metadata.v1", [_event_message(_event(uid)) for uid in ("1.2.3", "1.2.4")])
+    assert [c.kwargs["key"] for c in producer.send.call_args_list] == [b"1.2.3", b"1.2.4"]
+    producer.send_and_wait.assert_not_called()
+    assert _batch_size_sum("dicom.metadata.v1") - before == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_mode_raises_delivery_error():
+    producer = MagicMock()
+
+    async def send(topic, value, key=None, headers=None):
+        delivery = asyncio.get_running_loop().create_future()
+        if key == b"1.2.4":
+            delivery.set_exception(RuntimeError("broker unavailable"))
+        else:
+            delivery.set_result(None)
+        return delivery
+
+    producer.send = AsyncMock(side_effect=send)
+    with (
+        patch("dicom_middleware.infrastructure.kafka_producer.get_producer", AsyncMock(return_value=producer)),
+        patch(
+            "dicom_middleware.infrastructure.kafka_producer.get_settings",
+            return_value=Settings(kafka_publish_mode="batched"),
+        ),
+    ):
+        with pytest.raises(RuntimeError, match="broker unavailable"):
+            await publish_messages("dicom.metadata.v1", [_event_message(_event(uid)) for uid in ("1.2.3", "1.2.4")])
+    assert producer.send.await_count == 2
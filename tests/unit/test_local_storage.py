@@ -0,0 +1,80 @@
+"""Unit tests for local storage content-hash deduplication."""
+
+from unittest.mock import patch
+
+from dicom_middleware.config import Settings
+from dicom_middleware.infrastructure.local_storage import LocalStorageBackend, sha256_hex
+
+
+def test_identical_content_is_not_rewritten(tmp_path):
+    settings = Settings(storage_path=tmp_path, storage_dedup_enabled=True)
+    backend = LocalStorageBackend()
+    with patch("dicom_middleware.infrastructure.local_storage.get_settings", return_value=settings):
+        uri = backend.save("1.2.3", b"dicom-bytes")
+        target = tmp_path / "studies" / "1.2.3.dcm"
+        mtime = target.stat().st_mtime_ns
+        with patch("pathlib.Path.write_bytes") as write_bytes:
+            assert backend.save("1.2.3", b"dicom-bytes") == uri
+        write_bytes.assert_not_called()
+    assert target.stat().st_mtime_ns == mtime
+    assert (tmp_path / "studies" / "1.2.3.dcm.sha256").read_text() == sha256_hex(b"dicom-bytes")
+
+
+def test_changed_content_is_rewritten_with_new_sidecar(tmp_path):
+    settings = Settings(storage_path=tmp_path, storage_dedup_enabled=True)
+    backend = LocalStorageBackend()
+    with patch("dicom_middleware.infrastructure.local_storage.get_settings", return_value=settings):
+        backend.save("1.2.3", b"old")
+        backend.save("1.2.3", b"new")
+    assert (tmp_path / "studies" / "1.2.3.dcm").read_bytes() == b"new"
+    assert (tmp_path / "studies" / "1.2.3.dcm.sha256").read_text() == sha256_hex(b"new")
+
+
+def test_write_without_dedup_drops_stale_sidecar(tmp_path):
+    backend = LocalStorageBackend()
+    with patch(
+        "dicom_middleware.infrastructure.local_storage.get_settings",
+        return_value=Settings(storage_path=tmp_path, storage_dedup_enabled=True),
+    ):
+        backend.save("1.2.3", b"old")
+    with patch(
+        "dicom_middleware.infrastructure.local_storage.get_settings",
+        return_value=Settings(storage_path=tmp_path),
+    ):
+        backend.save("1.2.3", b"new")
+    assert not (tmp_path / "studies" / "1.2.3.dcm.sha256").exists()
+
+
+async def test_instances_are_stored_under_study_prefix(tmp_path):
+    async def chunks(*parts):
+        for part in parts:
+            yield part
+
+    backend = LocalStorageBackend()
+    with patch("dicom_middleware.infrastructure.local_storage.get_settings", return_value=Settings(storage_path=tmp_path)):
+        uri = await backend.save_instance_stream_async("1.2.3", "1.2.3.4", chunks(b"ab", b"cd"))
+        prefix = backend.study_prefix("1.2.3")
+    assert (tmp_path / "studies" / "1.2.3" / "1.2.3.4.dcm").read_bytes() == b"abcd"
+    assert uri.startswith(prefix)
+    assert prefix.endswith("/studies/1.2.3/")
+
+
+async def test_streamed_identical_content_is_not_replaced(tmp_path):
+    async def chunks(*parts):
+        for part in parts:
+            yield part
+
+    backend = LocalStorageBackend()
+    settings = Settings(storage_path=tmp_path, storage_dedup_enabled=True)
+    with patch("dicom_middleware.infrastructure.local_storage.get_settings", return_value=settings):
+        uri = await backend.save_stream_async("1.2.3", chunks(b"dicom-", b"bytes"))
+        target = tmp_path / "studies" / "1.2.3.dcm"
+        inode = target.stat().st_ino
+        with patch("dicom_middleware.infrastructure.local_storage.os.replace") as replace:
+            assert await backend.save_stream_async("1.2.3", chunks(b"dicom-bytes")) == uri
+        replace.assert_not_called()
+        await backend.save_stream_async("1.2.3", chunks(b"changed"))
+    assert target.stat().st_ino != inode
+    assert target.read_bytes() == b"changed"
+    assert (tmp_path / "studies" / "1.2.3.dcm.sha256").read_text() == sha256_hex(b"changed")
+    assert sorted(p.name for p in (tmp_path / "studies").iterdir()) == ["1.2.3.dcm", "1.2.3.dcm.sha256"]
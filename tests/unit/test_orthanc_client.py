@@ -0,0 +1,67 @@
+"""Unit tests for the Orthanc REST client (httpx MockTransport, no network)."""
+
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+import dicom_middleware.infrastructure.orthanc as orthanc
+from dicom_middleware.infrastructure.orthanc import OrthancClient, get_orthanc_http_client
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    routes = {
+        "/studies/s1": {"Series": ["se1"], "MainDicomTags": {"StudyInstanceUID": "1.2.3"}},
+        "/series/se1": {"Instances": ["i1"]},
+    }
+    if request.url.path == "/instances/i1/file":
+        return httpx.Response(200, content=b"DICM-bytes")
+    if request.url.path in routes:
+        return httpx.Response(200, json=routes[request.url.path])
+    return httpx.Response(404)
+
+
+@pytest.mark.asyncio
+async def test_first_instance_archive_reuses_one_http_client():
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return _handler(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        client = OrthancClient(base_url="http://orthanc:8042", http_client=http)
+        data = await client.get_first_instance_archive("s1")
+        uid = await client.get_study_instance_uid("s1")
+
+    assert data == b"DICM-bytes"
+    assert uid == "1.2.3"
+    assert requests == ["/studies/s1", "/series/se1", "/instances/i1/file", "/studies/s1"]
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_cached_and_configured():
+    settings = MagicMock()
+    settings.orthanc_username = None
+    settings.orthanc_password = None
+    settings.orthanc_max_connections = 7
+    settings.orthanc_max_keepalive_connections = 3
+    settings.orthanc_keepalive_expiry_seconds = 15.0
+    settings.orthanc_http2 = False
+    settings.orthanc_connect_timeout_seconds = 2.0
+    settings.orthanc_read_timeout_seconds = 20.0
+    settings.orthanc_pool_timeout_seconds = 4.0
+    orthanc._http_client = None
+    with patch("dicom_middleware.infrastructure.orthanc.get_settings", return_value=settings):
+        first = get_orthanc_http_client()
+        second = get_orthanc_http_client()
+    try:
+        assert first is second
+        assert first.timeout.connect == 2.0
+        assert first.timeout.read == 20.0
+        assert first.timeout.pool == 4.0
+    finally:
+        await orthanc.close_orthanc_http_client()
+    assert orthanc._http_client is None
+    assert REGISTRY.get_sample_value("dicom_middleware_orthanc_pool_connections", {"state": "active"}) == 0
@@ -0,0 +1,180 @@
+"""Unit tests for the Orthanc poller's /changes mode (mocked Orthanc client and DB)."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from dicom_middleware.application.orthanc_poller import _poll_changes
+
+
+def _client(page: dict) -> MagicMock:
+    client = MagicMock()
+    client.get_changes = AsyncMock(return_value=page)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_poll_changes_processes_stable_studies_once_and_stores_cursor():
+    page = {
+        "Changes": [
+            {"ChangeType": "NewStudy", "ResourceType": "Study", "ID": "s1", "Seq": 11},
+            {"ChangeType": "NewInstance", "ResourceType": "Instance", "ID": "i1", "Seq": 12},
+            {"ChangeType": "StableStudy", "ResourceType": "Study", "ID": "s1", "Seq": 13},
+            {"ChangeType": "NewStudy", "ResourceType": "Study", "ID": "s3", "Seq": 14},
+            {"ChangeType": "StableStudy", "ResourceType": "Study", "ID": "s2", "Seq": 15},
+            {"ChangeType": "StableStudy", "ResourceType": "Study", "ID": "s1", "Seq": 16},
+        ],
+        "Done": True,
+        "Last": 16,
+    }
+    client = _client(page)
+    with (
+        patch("dicom_middleware.application.orthanc_poller._process_study_if_new", new_callable=AsyncMock) as process,
+        patch("dicom_middleware.application.orthanc_poller._store_cursor", new_callable=AsyncMock) as store,
+    ):
+        result = await _poll_changes(client, since=10, limit=100)
+
+    assert result == (16, 2, True)
+    client.get_changes.assert_awaited_once_with(10, 100)
+    assert [c.args[1] for c in process.await_args_list] == ["s1", "s2"]  # s3 is not stable yet
+    store.assert_awaited_once_with(16)
+
+
+@pytest.mark.asyncio
+async def test_poll_changes_without_new_changes_keeps_cursor():
+    client = _client({"Changes": [], "Done": True, "Last": 14})
+    with (
+        patch("dicom_middleware.application.orthanc_poller._process_study_if_new", new_callable=AsyncMock) as process,
+        patch("dicom_middleware.application.orthanc_poller._store_cursor", new_callable=AsyncMock) as store,
+    ):
+        result = await _poll_changes(client, since=14, limit=100)
+
+    assert result == (14, 0, True)
+    process.assert_not_called()
+    store.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_not_stored_when_processing_raises():
+    client = _client({"Changes": [{"ChangeType": "StableStudy", "ResourceType": "Study", "ID": "s1"}], "Done": True, "Last": 20})
+    with (
+        patch(
+            "dicom_middleware.application.orthanc_poller._process_study_if_new",
+            new_callable=AsyncMock,
+            side_effect=RuntimeError("db down"),
+        ),
+        patch("dicom_middleware.application.orthanc_poller._store_cursor", new_callable=AsyncMock) as store,
+    ):
+        with pytest.raises(RuntimeError):
+            await _poll_changes(client, since=10, limit=100)
+    store.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_uid_lookup_replays_the_page_but_unknown_study_is_skipped():
+    import httpx
+
+    request = httpx.Request("GET", "http://orthanc/studies/s1")
+
+    def status_error(code: int) -> httpx.HTTPStatusError:
+        return httpx.HTTPStatusError(str(code), request=request, response=httpx.Response(code, request=request))
+
+    client = _client({"Changes": [{"ChangeType": "StableStudy", "ResourceType": "Study", "ID": "s1"}], "Done": True, "Last": 20})
+    client.get_study_instance_uid = AsyncMock(side_effect=status_error(503))
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=MagicMock())
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    with (
+        patch("dicom_middleware.application.orthanc_poller.get_study_cache", return_value=None),
+        patch("dicom_middleware.application.orthanc_poller.get_session_factory", return_value=MagicMock(return_value=session_cm)),
+        patch("dicom_middleware.application.orthanc_poller._store_cursor", new_callable=AsyncMock) as store,
+    ):
+        with pytest.raises(httpx.HTTPStatusError):
+            await _poll_changes(client, since=10, limit=100)
+        store.assert_not_called()
+
+        client.get_study_instance_uid.side_effect = status_error(404)
+        assert await _poll_changes(client, since=10, limit=100) == (20, 1, True)
+        store.assert_awaited_once_with(20)
+
+
+@pytest.mark.asyncio
+async def test_bulk_mode_checks_each_page_once_and_bounds_concurrency():
+    import asyncio
+
+    from dicom_middleware.application.orthanc_poller import _poll_bulk
+
+    pages = [
+        [{"orthanc_study_id": f"s{i}", "study_instance_uid": f"1.2.{i}"} for i in range(3)],
+        [{"orthanc_study_id": "s3", "study_instance_uid": "1.2.3"}, {"orthanc_study_id": "s4", "study_instance_uid": ""}],
+    ]
+    client = MagicMock()
+    client.find_studies = AsyncMock(side_effect=pages)
+    in_flight = peak = 0
+
+    async def ingest(orthanc_study_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=MagicMock())
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    with (
+        patch("dicom_middleware.application.orthanc_poller.get_session_factory", return_value=MagicMock(return_value=session_cm)),
+        patch(
+            "dicom_middleware.application.orthanc_poller.existing_study_instance_uids",
+            new_callable=AsyncMock,
+            side_effect=[{"1.2.0"}, set()],
+        ) as existing,
+        patch("dicom_middleware.application.orthanc_poller._ingest_study", side_effect=ingest) as ingest_mock,
+    ):
+        scanned, new = await _poll_bulk(client, page_size=3, concurrency=2)
+
+    assert (scanned, new) == (5, 3)
+    assert [c.args for c in client.find_studies.await_args_list] == [(3, 0), (3, 3)]
+    assert existing.await_args_list[0].args[1] == ["1.2.0", "1.2.1", "1.2.2"]
+    assert sorted(c.args[0] for c in ingest_mock.call_args_list) == ["s1", "s2", "s3"]
+    assert peak == 2
+
+
+
+@pytest.mark.asyncio
+async def test_pipeline_failures_are_swallowed_but_open_breaker_stops_the_cycle():
+    from dicom_middleware.application.orthanc_poller import _ingest_study
+    from dicom_middleware.infrastructure.circuit_breaker import CircuitOpenError
+
+    with patch(
+        "dicom_middleware.application.orthanc_poller.process_new_study",
+        new_callable=AsyncMock,
+        side_effect=RuntimeError("storage failed"),
+    ) as process:
+        await _ingest_study("s1")
+        process.side_effect = CircuitOpenError("orthanc", 12.0)
+        with pytest.raises(CircuitOpenError):
+            await _ingest_study("s2")
+
+
+@pytest.mark.asyncio
+async def test_exists_check_session_is_closed_before_the_pipeline_runs():
+    from dicom_middleware.application.orthanc_poller import _process_study_if_new
+
+    events: list[str] = []
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(side_effect=lambda: events.append("session_open") or MagicMock())
+    session_cm.__aexit__ = AsyncMock(side_effect=lambda *exc: events.append("session_closed"))
+
+    async def ingest(orthanc_study_id):
+        events.append("ingest")
+
+    with (
+        patch("dicom_middleware.application.orthanc_poller.get_study_cache", return_value=None),
+        patch("dicom_middleware.application.orthanc_poller.get_session_factory", return_value=MagicMock(return_value=session_cm)),
+        patch("dicom_middleware.application.orthanc_poller.exists_by_study_instance_uid", AsyncMock(return_value=False)),
+        patch("dicom_middleware.application.orthanc_poller._ingest_study", side_effect=ingest),
+    ):
+        assert await _process_study_if_new(MagicMock(), "s1", "1.2.3") is True
+
+    assert events == ["session_open", "session_closed", "ingest"]
@@ -0,0 +1,150 @@
+"""Unit tests for the transactional outbox relay (mocked session and producer)."""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from aiokafka.errors import MessageSizeTooLargeError, TopicAuthorizationFailedError
+from sqlalchemy.dialects import postgresql
+
+from dicom_middleware.db.models import OutboxRecord
+from dicom_middleware.infrastructure.outbox import OutboxRelay
+
+
+def _record(id_: int, topic: str = "dicom.metadata.v1", attempts: int = 0) -> OutboxRecord:
+    return OutboxRecord(
+        id=id_,
+        topic=topic,
+        message_key=f"1.2.{id_}",
+        payload=f'{{"study_instance_uid":"1.2.{id_}"}}',
+        headers=[["correlation_id", f"cid-{id_}"]],
+        correlation_id=uuid4(),
+        created_at=datetime.now(timezone.utc),
+        attempts=attempts,
+    )
+
+
+def _session_factory(records: list[OutboxRecord]):
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value = iter(records)
+    session.execute = AsyncMock(side_effect=[result] + [MagicMock() for _ in records])
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=session_cm), session
+
+
+@pytest.mark.asyncio
+async def test_relay_claims_with_skip_locked_publishes_and_marks_sent():
+    factory, session = _session_factory([_record(1), _record(2)])
+    relay = OutboxRelay(batch_size=10, interval_seconds=0.1, session_factory=factory)
+    with patch(
+        "dicom_middleware.infrastructure.outbox.publish_messages_settled",
+        new_callable=AsyncMock,
+        return_value=[None, None],
+    ) as publish:
+        sent = await relay.relay_once()
+
+    assert sent == 2
+    claim_sql = str(session.execute.call_args_list[0][0][0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in claim_sql
+    assert "sent_at IS NULL" in claim_sql
+    assert "parked_at IS NULL" in claim_sql
+    topic, messages = publish.call_args[0]
+    assert topic == "dicom.metadata.v1"
+    assert [m.key for m in messages] == [b"1.2.1", b"1.2.2"]
+    assert messages[0].headers == [("correlation_id", b"cid-1")]
+    mark_sql = str(session.execute.call_args_list[1][0][0].compile(dialect=postgresql.dialect()))
+    assert mark_sql.startswith("UPDATE outbox SET sent_at")
+    session.commit.assert_awaited_once()
+
+
+def _statements(session) -> list[str]:
+    return [
+        str(c[0][0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        for c in session.execute.call_args_list
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unpublishable_row_does_not_hold_back_its_batch():
+    factory, session = _session_factory([_record(1), _record(2), _record(3)])
+    relay = OutboxRelay(batch_size=10, interval_seconds=0.1, session_factory=factory, max_attempts=3)
+    with patch(
+        "dicom_middleware.infrastructure.outbox.publish_messages_settled",
+        new_callable=AsyncMock,
+        return_value=[MessageSizeTooLargeError(), None, None],
+    ):
+        with pytest.raises(MessageSizeTooLargeError):
+            await relay.relay_once()
+
+    mark_sent, record_failure = _statements(session)[1:]
+    assert "sent_at=" in mark_sent and "outbox.id IN (2, 3)" in mark_sent
+    assert "attempts=1" in record_failure and "MessageSizeTooLargeError" in record_failure
+    assert "parked_at" not in record_failure and "outbox.id = 1" in record_failure
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_row_is_parked_after_max_attempts():
+    factory, session = _session_factory([_record(1, attempts=2), _record(2)])
+    relay = OutboxRelay(batch_size=10, interval_seconds=0.1, session_factory=factory, max_attempts=3)
+    with patch(
+        "dicom_middleware.infrastructure.outbox.publish_messages_settled",
+        new_callable=AsyncMock,
+        return_value=[TopicAuthorizationFailedError(), None],
+    ):
+        with pytest.raises(TopicAuthorizationFailedError):
+            await relay.relay_once()
+
+    record_failure = _statements(session)[2]
+    assert "attempts=3" in record_failure and "parked_at=" in record_failure
+
+
+@pytest.mark.asyncio
+async def test_failed_claim_charges_only_the_oldest_row():
+    factory, session = _session_factory([_record(1, attempts=2), _record(2, attempts=2)])
+    relay = OutboxRelay(batch_size=10, interval_seconds=0.1, session_factory=factory, max_attempts=3)
+    with patch(
+        "dicom_middleware.infrastructure.outbox.publish_messages_settled",
+        new_callable=AsyncMock,
+        return_value=[RuntimeError("broker unavailable"), RuntimeError("broker unavailable")],
+    ):
+        with pytest.raises(RuntimeError):
+            await relay.relay_once()
+
+    first, second = _statements(session)[1:]
+    assert "attempts=3" in first and "parked_at=" in first
+    assert "attempts" not in second and "last_error=" in second
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_sent_rows_past_retention():
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(rowcount=4))
+    session.commit = AsyncMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    relay = OutboxRelay(
+        batch_size=10, interval_seconds=0.1, session_factory=MagicMock(return_value=session_cm), retention_seconds=3600
+    )
+
+    assert await relay.prune_once() == 4
+    delete_sql = _statements(session)[0]
+    assert delete_sql.startswith("DELETE FROM outbox")
+    assert "sent_at IS NOT NULL" in delete_sql and "sent_at <" in delete_sql
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_relay_empty_outbox_returns_zero():
+    factory, session = _session_factory([])
+    relay = OutboxRelay(batch_size=10, interval_seconds=0.1, session_factory=factory)
+    assert await relay.relay_once() == 0
+    session.commit.assert_not_called()
@@ -17,3 +17,67 @@ async def test_upsert_study_calls_session():
     await upsert_study(session, cid, meta)
     session.execute.assert_called_once()
     session.commit.assert_called_once()
+
+
+def test_build_upsert_statement_is_single_multi_row_upsert():
+    from sqlalchemy.dialects import postgresql
+
+    from dicom_middleware.infrastructure.repository import build_upsert_statement, study_row
+
+    rows = [study_row(uuid4(), StudyMetadata(study_instance_uid=uid)) for uid in ("1.1", "1.2", "1.3")]
+    sql = str(build_upsert_statement(rows).compile(dialect=postgresql.dialect()))
+    assert sql.count("INSERT INTO studies") == 1
+    assert "ON CONFLICT (study_instance_uid) DO UPDATE" in sql
+    assert "excluded.patient_id" in sql
+    assert "%(study_instance_uid_m2)s" in sql
+
+
+def test_upsert_statement_writes_fingerprint_only_when_a_row_has_one():
+    from sqlalchemy.dialects import postgresql
+
+    from dicom_middleware.infrastructure.repository import build_upsert_statement, study_row
+
+    plain = [study_row(uuid4(), StudyMetadata(study_instance_uid="1.1"))]
+    assert "content_fingerprint" not in str(build_upsert_statement(plain).compile(dialect=postgresql.dialect()))
+
+    mixed = plain + [study_row(uuid4(), StudyMetadata(study_instance_uid="1.2"), "sha256:ab")]
+    compiled = build_upsert_statement(mixed).compile(dialect=postgresql.dialect())
+    assert "coalesce(excluded.content_fingerprint, studies.content_fingerprint)" in str(compiled)
+    assert compiled.params["content_fingerprint_m0"] is None
+    assert compiled.params["content_fingerprint_m1"] == "sha256:ab"
+
+
+@pytest.mark.asyncio
+async def test_upsert_study_with_outbox_row_commits_once():
+    from dicom_middleware.domain.events import DicomMetadataEvent
+    from dicom_middleware.infrastructure.repository import outbox_row
+
+    session = AsyncMock(spec=AsyncSession)
+    cid = uuid4()
+    event = DicomMetadataEvent(
+        correlation_id=str(cid),
+        study_instance_uid="1.2.3",
+        storage_path="file:///s/1.2.3.dcm",
+        timestamp="2025-01-01T00:00:00+00:00",
+    )
+    await upsert_study(session, cid, StudyMetadata(study_instance_uid="1.2.3"), outbox_row("dicom.metadata.v1", event))
+    assert session.execute.await_count == 2
+    assert "INSERT INTO outbox" in str(session.execute.call_args_list[1][0][0])
+    session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_existing_study_instance_uids_uses_single_any_query():
+    from sqlalchemy.dialects import postgresql
+
+    from dicom_middleware.infrastructure.repository import existing_study_instance_uids
+
+    session = AsyncMock(spec=AsyncSession)
+    result = MagicMock()
+    result.scalars.return_value = iter(["1.2"])
+    session.execute.return_value = result
+    assert await existing_study_instance_uids(session, ["1.1", "1.2"]) == {"1.2"}
+    sql = str(session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "studies.study_instance_uid = ANY (%(uids)s::VARCHAR[])" in sql
+    assert await existing_study_instance_uids(session, []) == set()
+    session.execute.assert_awaited_once()
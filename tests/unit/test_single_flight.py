@@ -0,0 +1,107 @@
+"""Unit tests for single-flight coalescing of concurrent ingestions."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from dicom_middleware.application.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution_and_result():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(100)))
+    assert results == ["done"] * 100
+    assert calls == 1
+    assert len(flight) == 0
+    assert await flight.do("k", work) == "done"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_callers_share_the_exception():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test")
+    done = asyncio.Event()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        done.set()
+        return 1
+
+    first = asyncio.create_task(flight.do("k", work))
+    second = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 1
+    assert done.is_set()
+
+
+@pytest.mark.asyncio
+async def test_process_new_study_runs_pipeline_once_in_its_own_session():
+    from dicom_middleware.application.use_cases import process_new_study
+    from dicom_middleware.domain.entities import StudyMetadata
+
+    async def slow_pipeline(correlation_id, orthanc_study_id, session):
+        await asyncio.sleep(0.01)
+        return StudyMetadata(study_instance_uid="1.2.3")
+
+    own_session = MagicMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=own_session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    with (
+        patch("dicom_middleware.application.use_cases.run_pipeline", new_callable=AsyncMock, side_effect=slow_pipeline) as run,
+        patch("dicom_middleware.application.use_cases.get_session_factory", return_value=MagicMock(return_value=session_cm)),
+    ):
+        # The first caller's (request-scoped) session is gone while the shared run continues.
+        first = asyncio.create_task(process_new_study("cid-0", "same-orthanc-id", MagicMock()))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.gather(*(process_new_study(f"cid-{i}", "same-orthanc-id", MagicMock()) for i in range(1, 100)))
+    run.assert_awaited_once()
+    assert run.await_args.args[2] is own_session
+    session_cm.__aexit__.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_new_study_without_session_opens_its_own_in_off_mode():
+    from dicom_middleware.application.use_cases import process_new_study
+    from dicom_middleware.config import Settings
+    from dicom_middleware.domain.entities import StudyMetadata
+
+    own_session = MagicMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=own_session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    with (
+        patch("dicom_middleware.application.use_cases.get_settings", return_value=Settings(ingestion_dedup_mode="off")),
+        patch(
+            "dicom_middleware.application.use_cases.run_pipeline",
+            new_callable=AsyncMock,
+            return_value=StudyMetadata(study_instance_uid="1.2.3"),
+        ) as run,
+        patch("dicom_middleware.application.use_cases.get_session_factory", return_value=MagicMock(return_value=session_cm)),
+    ):
+        await process_new_study("cid", "orthanc-id")
+    assert run.await_args.args[2] is own_session
@@ -0,0 +1,38 @@
+"""Unit tests for pipeline stage timing."""
+
+from prometheus_client import REGISTRY
+from prometheus_client.openmetrics.exposition import generate_latest
+
+from dicom_middleware.observability.metrics import PIPELINE_STAGE_IN_FLIGHT
+from dicom_middleware.observability.stages import StageTimings, current_timings, stage
+
+
+def _count(name: str) -> float:
+    return REGISTRY.get_sample_value(f"dicom_middleware_pipeline_{name}_seconds_count") or 0.0
+
+
+def test_stage_records_histogram_timings_and_in_flight():
+    timings = StageTimings("cid-exemplar-1")
+    token = current_timings.set(timings)
+    before = _count("db")
+    try:
+        with stage("db"):
+            assert PIPELINE_STAGE_IN_FLIGHT.labels(stage="db")._value.get() == 1
+        with stage("db"):
+            pass
+        with stage("parse"):
+            pass
+    finally:
+        current_timings.reset(token)
+
+    assert _count("db") == before + 2
+    assert PIPELINE_STAGE_IN_FLIGHT.labels(stage="db")._value.get() == 0
+    assert set(timings.as_log_fields()) == {"db_ms", "parse_ms"}
+    assert 'correlation_id="cid-exemplar-1"' in generate_latest(REGISTRY).decode()
+
+
+def test_stage_without_run_context_still_observes():
+    before = _count("kafka")
+    with stage("kafka"):
+        pass
+    assert _count("kafka") == before + 1
@@ -0,0 +1,115 @@
+"""Unit tests for the bounded storage executor and async storage backends."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dicom_middleware.infrastructure.local_storage import LocalStorageBackend
+from dicom_middleware.infrastructure.storage_executor import StorageExecutor
+from dicom_middleware.observability.logging import correlation_id_ctx
+
+
+@pytest.mark.asyncio
+async def test_executor_caps_concurrency():
+    executor = StorageExecutor(max_workers=2)
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def blocking_write() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    try:
+        await asyncio.gather(*(executor.run(blocking_write) for _ in range(6)))
+    finally:
+        executor.shutdown()
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_executor_propagates_correlation_id():
+    executor = StorageExecutor(max_workers=1)
+    correlation_id_ctx.set("cid-42")
+    try:
+        seen = await executor.run(correlation_id_ctx.get)
+    finally:
+        executor.shutdown()
+    assert seen == "cid-42"
+
+
+@pytest.mark.asyncio
+async def test_local_save_async_writes_file(tmp_path):
+    settings = MagicMock()
+    settings.storage_path = tmp_path
+    executor = StorageExecutor(max_workers=1)
+    with (
+        patch("dicom_middleware.infrastructure.local_storage.get_settings", return_value=settings),
+        patch("dicom_middleware.infrastructure.local_storage.get_storage_executor", return_value=executor),
+    ):
+        uri = await LocalStorageBackend().save_async("1.2.3", b"dicom-bytes")
+    executor.shutdown()
+    assert uri == (tmp_path / "studies" / "1.2.3.dcm").as_uri()
+    assert (tmp_path / "studies" / "1.2.3.dcm").read_bytes() == b"dicom-bytes"
+
+
+@pytest.mark.asyncio
+async def test_local_save_stream_async_replaces_file_atomically(tmp_path):
+    settings = MagicMock()
+    settings.storage_path = tmp_path
+    settings.storage_dedup_enabled = False
+    executor = StorageExecutor(max_workers=1)
+
+    async def chunks():
+        for part in (b"abc", b"def", b"ghi"):
+            yield part
+
+    async def failing_chunks():
+        yield b"partial"
+        raise ConnectionError("Orthanc stream reset")
+
+    with (
+        patch("dicom_middleware.infrastructure.local_storage.get_settings", return_value=settings),
+        patch("dicom_middleware.infrastructure.local_storage.get_storage_executor", return_value=executor),
+    ):
+        backend = LocalStorageBackend()
+        uri = await backend.save_stream_async("1.2.3", chunks())
+        with pytest.raises(ConnectionError):
+            await backend.save_stream_async("1.2.3", failing_chunks())
+    executor.shutdown()
+    studies = tmp_path / "studies"
+    assert uri == (studies / "1.2.3.dcm").as_uri()
+    assert (studies / "1.2.3.dcm").read_bytes() == b"abcdefghi"
+    assert [p.name for p in studies.iterdir()] == ["1.2.3.dcm"]
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_uploads_without_blocking_the_loop():
+    from dicom_middleware.infrastructure import storage_executor
+
+    release = threading.Event()
+    finished = []
+
+    def upload() -> None:
+        release.wait(1.0)
+        finished.append(True)
+
+    with patch.object(storage_executor, "_executor", StorageExecutor(max_workers=1)):
+        in_flight = asyncio.create_task(storage_executor.get_storage_executor().run(upload))
+        await asyncio.sleep(0.01)
+        closing = asyncio.create_task(storage_executor.close_storage_executor())
+        await asyncio.sleep(0.01)
+        assert not closing.done()  # the loop still runs while the upload drains
+        release.set()
+        await closing
+        await in_flight
+        assert finished == [True]
+        assert storage_executor._executor is None
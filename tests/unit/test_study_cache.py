@@ -0,0 +1,94 @@
+"""Unit tests for the in-process study cache (TTL LRU and Bloom filter)."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from dicom_middleware.infrastructure.study_cache import BloomFilter, StudyCache, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expires_entries():
+    with patch("dicom_middleware.infrastructure.study_cache.time.monotonic", side_effect=[0.0, 5.0, 11.0]):
+        cache = TTLCache(max_entries=10, ttl_seconds=10)
+        cache.set("a", "1")
+        assert cache.get("a") == "1"
+        assert cache.get("a") is None
+
+
+def test_bloom_filter_has_no_false_negatives_and_is_compact():
+    bloom = BloomFilter(capacity=10000, error_rate=1e-6)
+    uids = [f"1.2.840.{i}" for i in range(10000)]
+    for uid in uids:
+        bloom.add(uid)
+    assert all(uid in bloom for uid in uids)
+    assert sum(f"9.9.{i}" in bloom for i in range(10000)) <= 1
+    assert bloom.size_bits // 8 < 40 * 1024
+
+
+def _session_factory() -> MagicMock:
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=MagicMock())
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=session_cm)
+
+
+@pytest.mark.asyncio
+async def test_poller_confirms_filter_hits_with_one_query_and_keeps_false_positives():
+    from dicom_middleware.application.orthanc_poller import _skip_confirmed
+
+    cache = StudyCache(max_entries=10, ttl_seconds=60, bloom_capacity=1000, bloom_error_rate=1e-6)
+    cache.record("s1", "1.2.3")
+    cache.record("s2", "1.2.4")  # stands in for a false positive: the DB does not have it
+    with (
+        patch("dicom_middleware.application.orthanc_poller.get_study_cache", return_value=cache),
+        patch("dicom_middleware.application.orthanc_poller.get_session_factory", return_value=_session_factory()),
+        patch(
+            "dicom_middleware.application.orthanc_poller.existing_study_instance_uids",
+            new_callable=AsyncMock,
+            return_value={"1.2.3"},
+        ) as existing,
+    ):
+        remaining = await _skip_confirmed(["s1", "s2", "s3"])
+    assert remaining == [("s2", "1.2.4"), ("s3", None)]
+    existing.assert_awaited_once()
+    assert sorted(existing.await_args.args[1]) == ["1.2.3", "1.2.4"]
+
+
+@pytest.mark.asyncio
+async def test_poller_caches_uid_and_batches_later_db_checks():
+    from dicom_middleware.application.orthanc_poller import _poll_all_studies
+
+    cache = StudyCache(max_entries=10, ttl_seconds=60, bloom_capacity=1000, bloom_error_rate=1e-6)
+    client = MagicMock()
+    client.get_study_ids = AsyncMock(return_value=["s1"])
+    client.get_study_instance_uid = AsyncMock(return_value="1.2.3")
+    with (
+        patch("dicom_middleware.application.orthanc_poller.get_study_cache", return_value=cache),
+        patch("dicom_middleware.application.orthanc_poller.get_session_factory", return_value=_session_factory()),
+        patch(
+            "dicom_middleware.application.orthanc_poller.exists_by_study_instance_uid",
+            new_callable=AsyncMock,
+            return_value=True,
+        ) as exists,
+        patch(
+            "dicom_middleware.application.orthanc_poller.existing_study_instance_uids",
+            new_callable=AsyncMock,
+            return_value={"1.2.3"},
+        ) as existing,
+    ):
+        assert await _poll_all_studies(client) == (1, 0)
+        assert await _poll_all_studies(client) == (1, 0)
+    client.get_study_instance_uid.assert_awaited_once()
+    exists.assert_awaited_once()
+    existing.assert_awaited_once()
@@ -0,0 +1,63 @@
+"""Unit tests for the micro-batching study upsert writer (mocked session)."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from dicom_middleware.domain.entities import StudyMetadata
+from dicom_middleware.infrastructure.upsert_batcher import StudyUpsertBatcher
+
+
+def _session_factory():
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=MagicMock())
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=session_cm)
+
+
+def _meta(uid: str) -> StudyMetadata:
+    return StudyMetadata(study_instance_uid=uid, patient_id="P1", modality="CT", study_date="20250101")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upserts_are_written_as_one_batch():
+    batcher = StudyUpsertBatcher(max_rows=10, window_seconds=0.01, session_factory=_session_factory())
+    with patch("dicom_middleware.infrastructure.upsert_batcher.upsert_studies", new_callable=AsyncMock) as upsert:
+        await asyncio.gather(*(batcher.submit(uuid4(), _meta(f"1.2.{i}")) for i in range(5)))
+    upsert.assert_awaited_once()
+    rows = upsert.call_args[0][1]
+    assert sorted(r["study_instance_uid"] for r in rows) == [f"1.2.{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_at_max_rows_and_collapses_duplicate_uids():
+    batcher = StudyUpsertBatcher(max_rows=3, window_seconds=10, session_factory=_session_factory())
+    with patch("dicom_middleware.infrastructure.upsert_batcher.upsert_studies", new_callable=AsyncMock) as upsert:
+        await asyncio.gather(
+            batcher.submit(uuid4(), _meta("1.1")),
+            batcher.submit(uuid4(), _meta("1.1")),
+            batcher.submit(uuid4(), _meta("1.2")),
+        )
+    upsert.assert_awaited_once()
+    assert len(upsert.call_args[0][1]) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_resolves_each_caller_with_its_own_outcome():
+    async def fake_upsert(session, rows, outbox_rows=()):
+        if any(r["study_instance_uid"] == "bad" for r in rows):
+            raise RuntimeError("constraint violation")
+
+    batcher = StudyUpsertBatcher(max_rows=10, window_seconds=0.01, session_factory=_session_factory())
+    with patch("dicom_middleware.infrastructure.upsert_batcher.upsert_studies", side_effect=fake_upsert):
+        results = await asyncio.gather(
+            batcher.submit(uuid4(), _meta("good-1")),
+            batcher.submit(uuid4(), _meta("bad")),
+            batcher.submit(uuid4(), _meta("good-2")),
+            return_exceptions=True,
+        )
+    assert results[0] is None
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] is None
@@ -0,0 +1,121 @@
+"""Unit tests for the standalone pipeline worker."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiokafka.errors import CommitFailedError, KafkaConnectionError
+from aiokafka.structs import TopicPartition
+
+from dicom_middleware.application.pipeline import DLQ_REASON_CIRCUIT_OPEN, DLQ_REASON_STORAGE, DeadLetteredError
+from dicom_middleware.domain.events import IngestionRequestEvent
+from dicom_middleware.infrastructure.circuit_breaker import CircuitOpenError
+from dicom_middleware.worker import IngestionWorker
+
+
+def _record(offset: int, orthanc_study_id: str) -> SimpleNamespace:
+    request = IngestionRequestEvent(
+        correlation_id=f"cid-{offset}", orthanc_study_id=orthanc_study_id, source="api", timestamp="t"
+    )
+    return SimpleNamespace(offset=offset, value=request.to_json_bytes())
+
+
+def _session_factory():
+    @asynccontextmanager
+    async def factory():
+        yield MagicMock()
+
+    return factory
+
+
+async def test_batch_is_processed_then_offsets_committed_per_partition():
+    tp0, tp1 = TopicPartition("ingest", 0), TopicPartition("ingest", 1)
+    consumer = MagicMock()
+    consumer.getmany = AsyncMock(return_value={tp0: [_record(4, "a"), _record(5, "b")], tp1: [_record(9, "c")]})
+    consumer.commit = AsyncMock()
+    processed: list[str] = []
+
+    async def process(correlation_id, orthanc_study_id, session):
+        consumer.commit.assert_not_called()
+        processed.append(orthanc_study_id)
+
+    with (
+        patch("dicom_middleware.worker.process_new_study", side_effect=process),
+        patch("dicom_middleware.worker.get_session_factory", return_value=_session_factory()),
+    ):
+        handled = await IngestionWorker(consumer, concurrency=8).run_once()
+
+    assert handled == 3
+    assert sorted(processed) == ["a", "b", "c"]
+    consumer.getmany.assert_awaited_once_with(timeout_ms=1000, max_records=8)
+    consumer.commit.assert_awaited_once_with({tp0: 6, tp1: 10})
+
+
+async def test_dead_lettered_and_invalid_requests_do_not_block_the_commit():
+    tp = TopicPartition("ingest", 0)
+    consumer = MagicMock()
+    consumer.getmany = AsyncMock(
+        return_value={tp: [_record(0, "a"), SimpleNamespace(offset=1, value=b"not json")]}
+    )
+    consumer.commit = AsyncMock(side_effect=CommitFailedError("rebalanced"))
+    dead_lettered = DeadLetteredError(DLQ_REASON_STORAGE, OSError("bucket unreachable"))
+
+    with (
+        patch("dicom_middleware.worker.process_new_study", AsyncMock(side_effect=dead_lettered)),
+        patch("dicom_middleware.worker.get_session_factory", return_value=_session_factory()),
+    ):
+        assert await IngestionWorker(consumer, concurrency=2).run_once() == 2
+
+    consumer.commit.assert_awaited_once_with({tp: 2})
+    consumer.seek.assert_not_called()
+
+
+async def test_request_not_dead_lettered_is_fetched_again():
+    tp0, tp1 = TopicPartition("ingest", 0), TopicPartition("ingest", 1)
+    consumer = MagicMock()
+    consumer.getmany = AsyncMock(
+        return_value={tp0: [_record(4, "a"), _record(5, "lost"), _record(6, "c")], tp1: [_record(9, "d")]}
+    )
+    consumer.commit = AsyncMock()
+
+    async def process(correlation_id, orthanc_study_id, session):
+        if orthanc_study_id == "lost":
+            raise KafkaConnectionError("DLQ unreachable")
+
+    with (
+        patch("dicom_middleware.worker.process_new_study", side_effect=process),
+        patch("dicom_middleware.worker.get_session_factory", return_value=_session_factory()),
+    ):
+        assert await IngestionWorker(consumer, concurrency=8).run_once() == 4
+
+    consumer.seek.assert_called_once_with(tp0, 5)
+    consumer.commit.assert_awaited_once_with({tp0: 5, tp1: 10})
+
+
+async def test_open_circuit_rewinds_and_pauses():
+    tp = TopicPartition("ingest", 0)
+    consumer = MagicMock()
+    consumer.getmany = AsyncMock(return_value={tp: [_record(0, "a"), _record(1, "b")]})
+    consumer.commit = AsyncMock()
+    fast_fail = DeadLetteredError(DLQ_REASON_CIRCUIT_OPEN, CircuitOpenError("storage", retry_after=12.0))
+    fast_fail.__cause__ = fast_fail.error
+
+    with (
+        patch("dicom_middleware.worker.process_new_study", AsyncMock(side_effect=fast_fail)),
+        patch("dicom_middleware.worker.get_session_factory", return_value=_session_factory()),
+        patch("dicom_middleware.worker.asyncio.wait_for", new_callable=AsyncMock) as wait_for,
+    ):
+        await IngestionWorker(consumer, concurrency=2).run_once()
+
+    consumer.seek.assert_called_once_with(tp, 0)
+    consumer.commit.assert_awaited_once_with({tp: 0})
+    assert wait_for.await_args.kwargs["timeout"] == 12.0
+    wait_for.await_args.args[0].close()
+
+
+async def test_empty_fetch_commits_nothing():
+    consumer = MagicMock()
+    consumer.getmany = AsyncMock(return_value={})
+    consumer.commit = AsyncMock()
+    assert await IngestionWorker(consumer, concurrency=2).run_once() == 0
+    consumer.commit.assert_not_called()